@@ -0,0 +1,150 @@
+import atexit
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+from werkzeug.local import LocalProxy
+
+from extensions import db
+from models import LoginAttempt, SecurityLog, UserActivity
+
+# Timestamp column stamped when an event is recorded, not when it is written
+TIME_COLUMNS = {LoginAttempt: 'attempted_at', SecurityLog: 'created_at', UserActivity: 'performed_at'}
+
+
+class AuditLogWriter:
+    """
+    Batched writer for LoginAttempt / SecurityLog / UserActivity rows
+
+    AUDIT_LOG_MODE = 'buffered' (default) queues events in memory and a
+    background thread writes them with one executemany per table, every
+    AUDIT_LOG_FLUSH_INTERVAL seconds or as soon as AUDIT_LOG_BATCH_SIZE are
+    waiting. Up to one interval of events can be lost if the process dies;
+    the queue is flushed on normal shutdown. When AUDIT_LOG_MAX_QUEUE events
+    are waiting, new ones are dropped and counted rather than slowing logins.
+    'sync' writes and commits each event in the request, as before.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._atexit_registered = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_LOG_MODE', 'buffered')
+        app.config.setdefault('AUDIT_LOG_BATCH_SIZE', 100)
+        app.config.setdefault('AUDIT_LOG_FLUSH_INTERVAL', 1.0)
+        app.config.setdefault('AUDIT_LOG_MAX_QUEUE', 10000)
+        app.extensions['audit_log'] = self
+        # For the writer thread and atexit, which run outside any app context
+        self.app = app
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def record(self, model, **values):
+        """Queue (or, in sync mode, write) one audit row; returns False if it was dropped"""
+        values.setdefault(TIME_COLUMNS[model], datetime.utcnow())
+        config = current_app.config
+        if config['AUDIT_LOG_MODE'] == 'sync':
+            db.session.add(model(**values))
+            db.session.commit()
+            self.written += 1
+            return True
+
+        with self._lock:
+            if len(self._queue) >= config['AUDIT_LOG_MAX_QUEUE']:
+                self.dropped += 1
+                return False
+            self._queue.append((model, values))
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self._thread.start()
+            if len(self._queue) >= config['AUDIT_LOG_BATCH_SIZE']:
+                self._wakeup.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._stopping and len(self._queue) < self.app.config['AUDIT_LOG_BATCH_SIZE']:
+                    self._wakeup.wait(self.app.config['AUDIT_LOG_FLUSH_INTERVAL'])
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    # -------------------------
+    # Writing
+    # -------------------------
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return 0
+
+            rows = defaultdict(list)
+            for model, values in batch:
+                rows[model].append(values)
+            with self.app.app_context():
+                try:
+                    for model, model_rows in rows.items():
+                        db.session.execute(insert(model), model_rows)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self.failed += len(batch)
+                    return 0
+                finally:
+                    db.session.remove()
+            self.written += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def shutdown(self):
+        """Stop the writer thread and flush whatever is still queued"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join()
+        self._thread = None
+        if self.app is not None:
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': current_app.config['AUDIT_LOG_MODE'],
+                'queue_depth': len(self._queue),
+                'max_queue': current_app.config['AUDIT_LOG_MAX_QUEUE'],
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'flushes': self.flushes
+            }
+
+
+# The current app's writer
+audit_log = LocalProxy(lambda: current_app.extensions['audit_log'])
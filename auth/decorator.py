@@ -1,7 +1,7 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import User
+from flask import current_app, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_current_user
+from auth.permissions import ROLES_CLAIM
 
 
 def role_required(role_name):
@@ -10,10 +10,13 @@ def role_required(role_name):
         @wraps(fn)
         @jwt_required()
         def wrapper(*args, **kwargs):
-            user = User.query.get(get_jwt_identity())
-            if not user:
-                return jsonify({'msg': 'User not found'}), 404
-            user_roles = [r.name for r in user.roles]  # fixed
+            claims = get_jwt()
+            if current_app.config.get('JWT_ROLES_CLAIM') and ROLES_CLAIM in claims:
+                # Roles were resolved when the token was issued
+                user_roles = claims[ROLES_CLAIM]
+            else:
+                # Loaded (and cached) by jwt_required; unknown users never get here
+                user_roles = get_current_user().roles
             if role_name not in user_roles:
                 return jsonify({'msg': 'Access forbidden: insufficient permissions'}), 403
             return fn(*args, **kwargs)
@@ -0,0 +1,119 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# werkzeug's own default; "pbkdf2:sha256:<iterations>" or "scrypt:<n>:<r>:<p>" also work
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasher:
+    """
+    Password hashing with a configurable werkzeug method (PASSWORD_HASH_METHOD)
+
+    Hashing and verification run inline on the request thread, which is
+    blocked for the whole hash either way. hashlib's scrypt and pbkdf2
+    release the GIL, so logins on different threads hash in parallel; a
+    semaphore caps how many run at once (PASSWORD_HASH_WORKERS) so a login
+    spike can't starve everything else of CPU. Hashes made with an older
+    method are replaced after a successful login on a separate
+    single-thread executor, so upgrades never hold up logins.
+    """
+
+    def __init__(self, app=None):
+        self._slots = None  # BoundedSemaphore sized from PASSWORD_HASH_WORKERS
+        self._rehash_executor = None
+        self._lock = threading.Lock()
+        self._normalized = {}  # configured method -> method prefix werkzeug writes
+        self.rehashed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('PASSWORD_REHASH_ON_LOGIN', True)
+        app.extensions['password_hasher'] = self
+
+    @property
+    def method(self):
+        return current_app.config['PASSWORD_HASH_METHOD']
+
+    def _get_slots(self):
+        with self._lock:
+            if self._slots is None:
+                workers = current_app.config['PASSWORD_HASH_WORKERS']
+                self._slots = threading.BoundedSemaphore(workers)
+            return self._slots
+
+    def _get_rehash_executor(self):
+        with self._lock:
+            if self._rehash_executor is None:
+                self._rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+            return self._rehash_executor
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._rehash_executor is not None:
+                self._rehash_executor.shutdown(wait=wait)
+            self._rehash_executor = None
+
+    # -------------------------
+    # Hash / verify
+    # -------------------------
+    def hash(self, password):
+        with self._get_slots():
+            return generate_password_hash(password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash or password is None:
+            return False
+        with self._get_slots():
+            return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash wasn't made with the configured method and cost"""
+        method = self.method
+        if method not in self._normalized:
+            # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"),
+            # so ask it once what it writes for this setting
+            self._normalized[method] = generate_password_hash('', method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._normalized[method]
+
+    def rehash_in_background(self, user_id, password_hash, password):
+        """
+        Store a fresh hash of `password` for the user, off the request thread.
+        Only applied if the stored hash is still `password_hash`, so a password
+        change in the meantime wins. Returns the Future, or None if not needed.
+        """
+        if not current_app.config['PASSWORD_REHASH_ON_LOGIN'] or not self.needs_rehash(password_hash):
+            return None
+        return self._get_rehash_executor().submit(self._rehash, current_app._get_current_object(),
+                                                  user_id, password_hash, password, self.method)
+
+    def _rehash(self, app, user_id, password_hash, password, method):
+        from extensions import db
+        from models import User
+
+        new_hash = generate_password_hash(password, method)
+        with app.app_context():
+            try:
+                result = db.session.execute(
+                    db.update(User)
+                    .where(User.id == user_id, User.password_hash == password_hash)
+                    .values(password_hash=new_hash)
+                )
+                db.session.commit()
+                if result.rowcount:
+                    self.rehashed += 1
+            except Exception:
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+# The current app's hasher
+password_hasher = LocalProxy(lambda: current_app.extensions['password_hasher'])
@@ -0,0 +1,26 @@
+from flask import current_app
+
+from extensions import jwt
+from auth.user_context import user_context
+
+ROLES_CLAIM = 'roles'
+
+
+# Roles and permissions are part of the cached UserContext, so these (and
+# role_required) cost no query once jwt_required has looked the user up
+def has_role(user_id, role_name):
+    context = user_context.resolve(user_id)
+    return context is not None and role_name in context.roles
+
+
+def has_permission(user_id, resource, action):
+    context = user_context.resolve(user_id)
+    return context is not None and (resource, action) in context.permissions
+
+
+@jwt.additional_claims_loader
+def _add_roles_claim(identity):
+    if not current_app.config.get('JWT_ROLES_CLAIM'):
+        return {}
+    context = user_context.resolve(identity)
+    return {ROLES_CLAIM: sorted(context.roles)} if context else {}
@@ -0,0 +1,204 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+# Reason stored on LoginAttempt rows that count towards the limits
+FAILURE_REASON = 'Invalid credentials'
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for sliding-window counters
+
+    Each key keeps a count for the current fixed window and the one before
+    it; the sliding estimate weights the previous window by how much of it
+    still overlaps the last `window` seconds. A shared store (e.g. Redis)
+    only has to implement these three methods.
+    """
+
+    @abstractmethod
+    def hit(self, key, window, now):
+        """Count one event for `key` at time `now` and return the new estimate"""
+
+    @abstractmethod
+    def count(self, key, window, now):
+        """Sliding-window estimate for `key` at time `now`"""
+
+    @abstractmethod
+    def clear(self, key=None):
+        """Forget one key, or every key when key is None"""
+
+
+class LocalBackend(RateLimitBackend):
+    """In-process counters; each worker process limits on its own"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = {}  # key -> [window index, current count, previous count]
+        self._lock = threading.Lock()
+
+    def _estimate(self, counter, window, now):
+        index = math.floor(now / window)
+        if counter[0] == index:
+            current, previous = counter[1], counter[2]
+        elif counter[0] == index - 1:
+            current, previous = 0, counter[1]
+        else:
+            current, previous = 0, 0
+        overlap = 1 - (now / window - index)
+        return index, current, previous, previous * overlap + current
+
+    def hit(self, key, window, now):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self.max_keys:
+                    self._prune(window, now)
+                counter = self._counters[key] = [math.floor(now / window), 0, 0]
+            index, current, previous, _ = self._estimate(counter, window, now)
+            if index < counter[0]:
+                # An event older than the current window (cold-start rebuild)
+                if counter[0] - index == 1:
+                    counter[2] += 1
+                return self._estimate(counter, window, now)[3]
+            counter[:] = [index, current + 1, previous]
+            return self._estimate(counter, window, now)[3]
+
+    def count(self, key, window, now):
+        with self._lock:
+            counter = self._counters.get(key)
+            return 0 if counter is None else self._estimate(counter, window, now)[3]
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._counters.clear()
+            else:
+                self._counters.pop(key, None)
+
+    def _prune(self, window, now):
+        stale = math.floor(now / window) - 1
+        for key in [key for key, counter in self._counters.items() if counter[0] < stale]:
+            del self._counters[key]
+
+    def __len__(self):
+        return len(self._counters)
+
+
+class LoginRateLimiter:
+    """
+    Failed-login limits per client IP and per account
+
+    `check` runs before password verification, so once a client or account
+    is over its limit further attempts cost no hash. Accounts are counted
+    under account_key(), which is the same whichever name a login uses.
+    A successful login clears the account's counter.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend or LocalBackend()
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_RATE_LIMIT_ENABLED', True)
+        app.config.setdefault('LOGIN_RATE_LIMIT_WINDOW', 300)
+        app.config.setdefault('LOGIN_RATE_LIMIT_PER_IP', 50)
+        app.config.setdefault('LOGIN_RATE_LIMIT_PER_ACCOUNT', 5)
+        app.config.setdefault('LOGIN_RATE_LIMIT_BACKEND', None)
+        if app.config['LOGIN_RATE_LIMIT_BACKEND'] is not None:
+            self.backend = app.config['LOGIN_RATE_LIMIT_BACKEND']
+        app.extensions['login_rate_limiter'] = self
+
+    @property
+    def enabled(self):
+        return current_app.config['LOGIN_RATE_LIMIT_ENABLED']
+
+    @staticmethod
+    def account_key(user_id, identifier):
+        """
+        Counter key for the account a login names: its user id when the
+        username or email matched a user, so switching between the two shares
+        one allowance; otherwise the lower-cased identifier. None for neither.
+        """
+        if user_id is not None:
+            return f'user:{user_id}'
+        if identifier:
+            return 'account:' + identifier.strip().lower()
+        return None
+
+    def _keys(self, ip_address, account):
+        keys = []
+        if ip_address:
+            keys.append(('ip:' + ip_address, current_app.config['LOGIN_RATE_LIMIT_PER_IP']))
+        if account:
+            keys.append((account, current_app.config['LOGIN_RATE_LIMIT_PER_ACCOUNT']))
+        return keys
+
+    def check(self, ip_address, account, now=None):
+        """
+        Seconds to wait before trying again, or None if the attempt may go
+        ahead. `account` is an account_key().
+        """
+        if not self.enabled:
+            return None
+        now = time.time() if now is None else now
+        window = current_app.config['LOGIN_RATE_LIMIT_WINDOW']
+        for key, limit in self._keys(ip_address, account):
+            if self.backend.count(key, window, now) >= limit:
+                self.rejected += 1
+                # When the current window rolls over and its count starts to decay
+                return max(1, math.ceil(window - now % window))
+        return None
+
+    def record_failure(self, ip_address, account, now=None):
+        if not self.enabled:
+            return
+        now = time.time() if now is None else now
+        window = current_app.config['LOGIN_RATE_LIMIT_WINDOW']
+        for key, _ in self._keys(ip_address, account):
+            self.backend.hit(key, window, now)
+
+    def record_success(self, account):
+        if self.enabled and account:
+            self.backend.clear(account)
+
+    def rebuild(self):
+        """
+        Replay recent failed LoginAttempt rows into the counters, so a restart
+        doesn't hand an attacker a fresh allowance. Returns the rows replayed.
+        """
+        from extensions import db
+        from models import LoginAttempt
+
+        if not self.enabled:
+            return 0
+        window = current_app.config['LOGIN_RATE_LIMIT_WINDOW']
+        since = datetime.utcnow() - timedelta(seconds=2 * window)
+        rows = db.session.execute(
+            db.select(LoginAttempt.ip_address, LoginAttempt.user_id, LoginAttempt.email, LoginAttempt.attempted_at)
+            .where(LoginAttempt.success.is_(False),
+                   LoginAttempt.failure_reason == FAILURE_REASON,
+                   LoginAttempt.attempted_at >= since)
+            .order_by(LoginAttempt.attempted_at)
+        ).all()
+        for ip_address, user_id, identifier, attempted_at in rows:
+            self.record_failure(ip_address, self.account_key(user_id, identifier),
+                                now=attempted_at.replace(tzinfo=timezone.utc).timestamp())
+        return len(rows)
+
+    def stats(self):
+        return {
+            'rejected': self.rejected,
+            'tracked_keys': len(self.backend) if hasattr(self.backend, '__len__') else None
+        }
+
+
+# The current app's limiter
+login_rate_limiter = LocalProxy(lambda: current_app.extensions['login_rate_limiter'])
@@ -0,0 +1,210 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from flask_jwt_extended import create_refresh_token
+from werkzeug.local import LocalProxy
+
+from extensions import db
+from models import RefreshToken
+
+
+def token_digest(token):
+    """Fixed-length lookup key for a refresh token; the token itself is never stored"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenStore:
+    """
+    Issues, rotates and revokes refresh tokens stored as SHA-256 digests
+
+    Every successful /api/auth/refresh revokes the presented token and
+    issues a new one (`replaced_by` links the two). Revoked digests are
+    also kept in an in-memory set, so replaying a token this process has
+    already revoked is rejected without a query. A background sweeper
+    deletes expired and revoked rows in chunks of REFRESH_TOKEN_SWEEP_BATCH
+    every REFRESH_TOKEN_SWEEP_INTERVAL seconds (0 disables it; see also
+    `flask sweep-refresh-tokens`).
+    """
+
+    def __init__(self, app=None):
+        self._revoked = OrderedDict()  # digest -> expires_at
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stop = threading.Event()
+        self.swept = 0
+        self.fast_rejects = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REFRESH_TOKEN_SWEEP_INTERVAL', 3600)
+        app.config.setdefault('REFRESH_TOKEN_SWEEP_BATCH', 1000)
+        app.config.setdefault('REFRESH_TOKEN_REVOKED_CACHE', 100000)
+        app.extensions['refresh_tokens'] = self
+
+    # -------------------------
+    # Revoked-digest set
+    # -------------------------
+    def _remember_revoked(self, digest, expires_at):
+        with self._lock:
+            self._revoked[digest] = expires_at
+            self._revoked.move_to_end(digest)
+            while len(self._revoked) > current_app.config['REFRESH_TOKEN_REVOKED_CACHE']:
+                self._revoked.popitem(last=False)
+
+    def is_known_revoked(self, token):
+        with self._lock:
+            return token_digest(token) in self._revoked
+
+    def load_revoked(self):
+        """Fill the revoked set from the database (at startup); returns how many were loaded"""
+        rows = db.session.execute(
+            db.select(RefreshToken.token_hash, RefreshToken.expires_at)
+            .where(RefreshToken.revoked.is_(True), RefreshToken.expires_at > datetime.utcnow())
+            .order_by(RefreshToken.expires_at.desc())
+            .limit(current_app.config['REFRESH_TOKEN_REVOKED_CACHE'])
+        ).all()
+        for digest, expires_at in reversed(rows):
+            self._remember_revoked(digest, expires_at)
+        return len(rows)
+
+    # -------------------------
+    # Issue / rotate / revoke
+    # -------------------------
+    def _new_token(self, user_id, ip_address, user_agent, token_id=None):
+        token = create_refresh_token(identity=user_id)
+        now = datetime.utcnow()
+        db.session.add(RefreshToken(
+            token_id=token_id or str(uuid.uuid4()),
+            user_id=user_id,
+            token_hash=token_digest(token),
+            expires_at=now + current_app.config['JWT_REFRESH_TOKEN_EXPIRES'],
+            revoked=False,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            created_at=now
+        ))
+        return token
+
+    def issue(self, user_id, ip_address=None, user_agent=None):
+        """Create and store a refresh token for the user; returns the token string"""
+        token = self._new_token(user_id, ip_address, user_agent)
+        db.session.commit()
+        self._start_sweeper()
+        return token
+
+    def rotate(self, user_id, token, ip_address=None, user_agent=None):
+        """
+        Swap a live refresh token for a new one; returns the new token string,
+        or None if the token is unknown, expired or already used
+        """
+        digest = token_digest(token)
+        if self.is_known_revoked(token):
+            self.fast_rejects += 1
+            return None
+
+        new_id = str(uuid.uuid4())
+        # Compare-and-set: of two concurrent refreshes with the same token, one wins
+        result = db.session.execute(
+            db.update(RefreshToken)
+            .where(RefreshToken.token_hash == digest,
+                   RefreshToken.user_id == user_id,
+                   RefreshToken.revoked.is_(False),
+                   RefreshToken.expires_at > datetime.utcnow())
+            .values(revoked=True, replaced_by=new_id)
+            .returning(RefreshToken.expires_at)
+        ).first()
+        if result is None:
+            db.session.rollback()
+            return None
+        new_token = self._new_token(user_id, ip_address, user_agent, token_id=new_id)
+        db.session.commit()
+        self._remember_revoked(digest, result.expires_at)
+        return new_token
+
+    def revoke(self, user_id, token):
+        """Revoke one of the user's refresh tokens; False if it wasn't live"""
+        digest = token_digest(token)
+        if self.is_known_revoked(token):
+            self.fast_rejects += 1
+            return False
+        result = db.session.execute(
+            db.update(RefreshToken)
+            .where(RefreshToken.token_hash == digest,
+                   RefreshToken.user_id == user_id,
+                   RefreshToken.revoked.is_(False))
+            .values(revoked=True)
+            .returning(RefreshToken.expires_at)
+        ).first()
+        db.session.commit()
+        if result is None:
+            return False
+        self._remember_revoked(digest, result.expires_at)
+        return True
+
+    # -------------------------
+    # Sweeping
+    # -------------------------
+    def sweep(self, now=None):
+        """Delete expired and revoked rows, one chunk per transaction; returns rows deleted"""
+        now = now or datetime.utcnow()
+        batch = current_app.config['REFRESH_TOKEN_SWEEP_BATCH']
+        deleted = 0
+        # Two predicates rather than one OR, so each can use ix_refresh_token_sweep
+        for condition in (RefreshToken.revoked.is_(True),
+                          db.and_(RefreshToken.revoked.is_(False), RefreshToken.expires_at <= now)):
+            while True:
+                ids = db.session.scalars(db.select(RefreshToken.token_id).where(condition).limit(batch)).all()
+                if not ids:
+                    break
+                db.session.execute(db.delete(RefreshToken).where(RefreshToken.token_id.in_(ids)))
+                db.session.commit()
+                deleted += len(ids)
+
+        with self._lock:
+            for digest in [d for d, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[digest]
+        self.swept += deleted
+        return deleted
+
+    def _start_sweeper(self):
+        interval = current_app.config['REFRESH_TOKEN_SWEEP_INTERVAL']
+        with self._lock:
+            if not interval or (self._sweeper is not None and self._sweeper.is_alive()):
+                return
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._run_sweeper, args=(current_app._get_current_object(),),
+                                             name='refresh-token-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _run_sweeper(self, app):
+        while not self._stop.wait(app.config['REFRESH_TOKEN_SWEEP_INTERVAL']):
+            with app.app_context():
+                try:
+                    self.sweep()
+                except Exception:
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+        self._sweeper = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'revoked_cached': len(self._revoked),
+                'fast_rejects': self.fast_rejects,
+                'swept': self.swept
+            }
+
+
+# The current app's store
+refresh_tokens = LocalProxy(lambda: current_app.extensions['refresh_tokens'])
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, has_app_context, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes
+from werkzeug.local import LocalProxy
+
+from extensions import db, jwt
+from models import User, Role, Permission, UserRole, RolePermission
+
+# What an authenticated request needs to know about its user: role names
+# and (resource, action) permission pairs included
+UserContext = namedtuple('UserContext', ['id', 'is_active', 'roles', 'permissions'])
+
+
+class UserContextCache:
+    """
+    Per-process cache of UserContext, checked on every @jwt_required request
+    and read by role_required and User.has_role / has_permission
+
+    A miss costs one query joining user -> user_role -> role ->
+    role_permission -> permission. Committed changes to a user's is_active
+    flag, role assignments or role permissions invalidate the affected
+    entries in this process; other workers see them within USER_CONTEXT_TTL,
+    which bounds how long a deactivated user's tokens keep working.
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()  # user_id -> (expires_at, UserContext)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CONTEXT_TTL', 30)
+        app.config.setdefault('USER_CONTEXT_CACHE_SIZE', 4096)
+        # Put the user's role names in access tokens so role_required trusts
+        # the token; role changes then apply once the token is refreshed
+        app.config.setdefault('JWT_ROLES_CLAIM', False)
+        app.extensions['user_context'] = self
+
+    def resolve(self, user_id):
+        """UserContext for a user, or None if there is no such user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        context = self._load(user_id)
+        if context is not None:
+            config = current_app.config
+            with self._lock:
+                self._entries[user_id] = (now + config['USER_CONTEXT_TTL'], context)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > config['USER_CONTEXT_CACHE_SIZE']:
+                    self._entries.popitem(last=False)
+        return context
+
+    def _load(self, user_id):
+        rows = db.session.execute(
+            db.select(User.id, User.is_active, Role.name, Permission.resource, Permission.action)
+            .outerjoin(UserRole, UserRole.user_id == User.id)
+            .outerjoin(Role, Role.role_id == UserRole.role_id)
+            .outerjoin(RolePermission, RolePermission.role_id == Role.role_id)
+            .outerjoin(Permission, Permission.permission_id == RolePermission.permission_id)
+            .where(User.id == user_id)
+        ).all()
+        if not rows:
+            return None
+        return UserContext(
+            id=rows[0].id,
+            # NULL predates the column default; treat it as active
+            is_active=rows[0].is_active is not False,
+            roles=frozenset(row.name for row in rows if row.name is not None),
+            permissions=frozenset((row.resource, row.action) for row in rows if row.resource is not None)
+        )
+
+    def invalidate(self, user_id=None):
+        """Drop one user's entry, or everything when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_entries': current_app.config['USER_CONTEXT_CACHE_SIZE'],
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+
+class AccessTokenDenylist:
+    """
+    jti values of access tokens revoked by logout, kept until the token
+    would have expired anyway. Lookups are a dict check; nothing is stored
+    in the database, so a revocation applies to the worker that handled
+    the logout (access tokens are short-lived, see JWT_ACCESS_TOKEN_EXPIRES).
+    """
+
+    def __init__(self, app=None):
+        self._entries = {}  # jti -> exp (unix time)
+        self._lock = threading.Lock()
+        self._next_prune = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['access_denylist'] = self
+
+    def add(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._entries[jti] = expires_at
+            if now >= self._next_prune:
+                for stale in [key for key, exp in self._entries.items() if exp <= now]:
+                    del self._entries[stale]
+                self._next_prune = now + 60
+
+    def __contains__(self, jti):
+        with self._lock:
+            return jti in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# The current app's cache and denylist
+user_context = LocalProxy(lambda: current_app.extensions['user_context'])
+access_denylist = LocalProxy(lambda: current_app.extensions['access_denylist'])
+
+
+@jwt.user_lookup_loader
+def _load_user_context(jwt_header, jwt_payload):
+    # Returning None makes @jwt_required answer with _user_lookup_error, so
+    # unknown and deactivated users are turned away before the view runs
+    context = user_context.resolve(jwt_payload['sub'])
+    return context if context is not None and context.is_active else None
+
+
+@jwt.user_lookup_error_loader
+def _user_lookup_error(jwt_header, jwt_payload):
+    if user_context.resolve(jwt_payload['sub']) is None:
+        return jsonify({'msg': 'User not found'}), 404
+    return jsonify({'msg': 'Account is disabled'}), 403
+
+
+@jwt.token_in_blocklist_loader
+def _is_access_token_revoked(jwt_header, jwt_payload):
+    return jwt_payload.get('type') == 'access' and jwt_payload['jti'] in access_denylist
+
+
+# Changes seen in a flush are remembered on the session and applied only
+# once the transaction commits; a rollback throws them away.
+_PENDING_KEY = 'user_context_invalidate'
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_user_changes(session, flush_context, instances):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed = obj in session.deleted or any(
+                attributes.get_history(obj, key, passive=attributes.PASSIVE_NO_INITIALIZE).has_changes()
+                for key in ('is_active', 'roles')
+            )
+            if obj.id is not None and changed:
+                pending.add(obj.id)
+        elif isinstance(obj, UserRole):
+            pending.add(obj.user_id)
+        elif isinstance(obj, (Role, Permission, RolePermission)):
+            # Could affect any number of users
+            pending.add(None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_user_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    # Sessions outside an app built by create_app have no cache to update
+    cache = current_app.extensions.get('user_context') if has_app_context() else None
+    if not pending or cache is None:
+        return
+    if None in pending:
+        cache.invalidate()
+    else:
+        for user_id in pending:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop(_PENDING_KEY, None)
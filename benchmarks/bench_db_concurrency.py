@@ -0,0 +1,119 @@
+"""
+Concurrent login + split traffic against a local SQLite file, per config profile
+
+    python -m benchmarks.bench_db_concurrency [--threads 8] [--rounds 25] [--profiles default production]
+
+Each profile runs in its own interpreter (the profile is picked when the app
+is imported) against a fresh SQLite file. Every thread logs in as its own
+user and then saves bill splits to a shared group ledger, so the writes all
+compete for the database lock. Reports requests per second, p95 latency and
+how many requests failed (e.g. with "database is locked").
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SPLIT = {
+    'receipt_data': {'items': [{'name': f"Item {i}", 'price': '4.25'} for i in range(10)]},
+    'participants': ['Ana', 'Ben', 'Cy'],
+    'tax_rate': 8.875,
+    'tip_percentage': 18,
+    'group_id': 'bench-group'
+}
+
+
+def child(profile, thread_count, rounds):
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ['APP_CONFIG'] = profile
+
+    from app import app
+    from extensions import db
+    from models import User
+
+    # Measure the database, not the password hash or the login limiter
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    app.config['LOGIN_RATE_LIMIT_ENABLED'] = False
+    app.config['AUDIT_LOG_MODE'] = 'sync'
+    app.config['UPLOAD_FOLDER'] = tmp.name
+    with app.app_context():
+        for i in range(thread_count):
+            user = User(username=f"bench{i}", email=f"bench{i}@example.com")
+            user.set_password('bench-password')
+            db.session.add(user)
+        db.session.commit()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def worker(i):
+        client = app.test_client()
+        mine, failed = [], 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            res = client.post('/api/auth/login', json={'username': f"bench{i}", 'password': 'bench-password'})
+            mine.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                failed += 1
+                continue
+            headers = {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+            start = time.perf_counter()
+            res = client.post('/api/split-bill', json=SPLIT, headers=headers)
+            mine.append(time.perf_counter() - start)
+            failed += res.status_code != 200
+        with lock:
+            latencies.extend(mine)
+            failures.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(json.dumps({
+        'profile': profile,
+        'requests': len(latencies),
+        'per_second': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'failed': sum(failures)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=25)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'production'])
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.threads, args.rounds)
+        return
+
+    print(f"{args.threads} threads x {args.rounds} rounds of login + split")
+    print(f"{'profile':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'failed':>8}")
+    for profile in args.profiles:
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_db_concurrency', '--child', profile,
+             '--threads', str(args.threads), '--rounds', str(args.rounds)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{profile:<14}{result['per_second']:>9.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p95_ms']:>9.1f}{result['failed']:>8}")
+
+
+if __name__ == '__main__':
+    main()
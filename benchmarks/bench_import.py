@@ -0,0 +1,78 @@
+"""
+Import and startup cost of the app, from `python -X importtime`
+
+    python -m benchmarks.bench_import [--top 15] [--repeat 5] [--max-ms 1500]
+
+Runs `import app; app.create_app()` in fresh interpreters against a
+throwaway SQLite database and reports the best wall time, the slowest
+modules by cumulative import time, and whether any module that should load
+lazily was imported. Exits with status 1 if one was, or if startup took
+longer than --max-ms, so it can guard against regressions in CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Only loaded once a receipt is OCR'd or Google login is used
+LAZY_MODULES = ('pytesseract', 'authlib', 'requests')
+
+STARTUP = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app\n"
+    "app.create_app()\n"
+    "print('startup_ms', (time.perf_counter() - start) * 1000)\n"
+    "print('loaded', ' '.join(m for m in sys.modules if m.split('.')[0] in {lazy}))\n"
+).format(lazy=set(LAZY_MODULES))
+
+
+def run_once(env):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+                         capture_output=True, text=True, env=env, check=True)
+    lines = out.stdout.splitlines()
+    startup_ms = float(lines[0].split()[1])
+    loaded = lines[1].split()[1:]
+
+    cumulative = {}  # module -> (nesting depth, cumulative ms)
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative[name.strip()] = (depth, int(cumulative_us) / 1000)
+    return startup_ms, loaded, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        runs = [run_once(env) for _ in range(args.repeat)]
+    startup_ms, loaded, cumulative = min(runs, key=lambda run: run[0])
+
+    print(f"import app + create_app(): {startup_ms:.1f} ms (best of {args.repeat})")
+    print(f"{'module':<45}{'cumulative ms':>14}")
+    # Modules `app` imports directly; anything deeper is counted in its importer
+    top_level = [(name, ms) for name, (depth, ms) in cumulative.items() if depth == 1 or name == 'app']
+    for name, ms in sorted(top_level, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<45}{ms:>14.1f}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported at startup but meant to load lazily: {', '.join(sorted(loaded))}")
+        failed = True
+    if args.max_ms is not None and startup_ms > args.max_ms:
+        print(f"FAIL: startup took {startup_ms:.1f} ms, budget is {args.max_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Reading a group settlement from the running ledger vs rescanning every split
+
+    python -m benchmarks.bench_ledger [--splits 2000] [--people 8] [--repeat 5]
+
+Runs against a throwaway SQLite database. "rescan" is what answering the
+question without the ledger costs: loading every BillSplit in the group
+and re-deriving the balances from the JSON results.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from app import app  # noqa: E402
+from bill_splitting_logic import split_receipt_items  # noqa: E402
+from extensions import db  # noqa: E402
+from ledger import group_balances, rebuild_group, settle  # noqa: E402
+from models import User  # noqa: E402
+from split_batch import split_batch  # noqa: E402
+
+GROUP = 'bench-trip'
+
+
+def seed(user_id, split_count, people, rng):
+    names = [f"Person {i}" for i in range(people)]
+    rows = []
+    for _ in range(split_count):
+        diners = rng.sample(names, rng.randint(2, people))
+        receipt = {'items': [{'name': 'Item', 'price': f"{rng.uniform(5, 120):.2f}"}]}
+        rows.append({
+            'receipt_data': receipt, 'participants': diners, 'split_method': 'itemized',
+            'tax_rate': 8.875, 'tip_percentage': 18, 'group_id': GROUP, 'paid_by': rng.choice(diners),
+            'split_result': split_receipt_items(receipt, diners, 8.875, 18),
+        })
+    split_batch.save(user_id, rows)
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(split_count, people, repeat):
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        seed(user.id, split_count, people, random.Random(0))
+
+        def from_ledger():
+            settle(group_balances(user.id, GROUP))
+
+        def rescan():
+            rebuild_group(user.id, GROUP)
+            settle(group_balances(user.id, GROUP))
+            db.session.rollback()
+
+        print(f"{split_count} splits, {people} people")
+        print(f"  running ledger: {best_of(repeat, from_ledger):9.2f} ms")
+        print(f"  rescan splits:  {best_of(repeat, rescan):9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--splits', type=int, default=2000)
+    parser.add_argument('--people', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.splits, args.people, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
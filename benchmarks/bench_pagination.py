@@ -0,0 +1,87 @@
+"""
+Keyset pages vs OFFSET pages over a long receipt history
+
+    python -m benchmarks.bench_pagination [--rows 100000] [--limit 20] [--repeat 5]
+
+Seeds a throwaway SQLite database with one user's receipts (raw_data
+included), then times GET /api/receipts at the first page and at pages
+deep in the history reached by cursor, next to the same depth fetched
+with LIMIT/OFFSET.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Receipt, User  # noqa: E402
+from pagination import encode_cursor  # noqa: E402
+
+RAW = {'items': [{'name': f"Item {i}", 'price': '3.99'} for i in range(30)], 'store_name': 'Bench Mart'}
+
+
+def seed(user_id, row_count):
+    start = datetime(2020, 1, 1)
+    rows = [{'user_id': user_id, 'store_name': 'Bench Mart', 'total_amount': 42.0, 'raw_data': RAW,
+             'created_at': start + timedelta(minutes=i)} for i in range(row_count)]
+    for offset in range(0, row_count, 10000):
+        db.session.execute(insert(Receipt), rows[offset:offset + 10000])
+    db.session.commit()
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(row_count, limit, repeat):
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        seed(user.id, row_count)
+        headers = {'Authorization': f"Bearer {create_access_token(identity=user.id)}"}
+        newest = datetime(2020, 1, 1) + timedelta(minutes=row_count)
+    client = app.test_client()
+
+    print(f"{row_count} receipts, pages of {limit}")
+    print(f"{'depth':>8}{'keyset ms':>12}{'offset ms':>12}")
+    for depth in (0, row_count // 10, row_count // 2, row_count - limit):
+        # Cursor for the row just above `depth` (ids are 1..row_count, newest last)
+        cursor = encode_cursor([newest - timedelta(minutes=depth), row_count - depth + 1]) if depth else None
+        url = f"/api/receipts?limit={limit}" + (f"&cursor={cursor}" if cursor else '')
+        keyset_ms = best_of(repeat, lambda: client.get(url, headers=headers))
+
+        def offset_page():
+            with app.app_context():
+                db.session.scalars(db.select(Receipt).where(Receipt.user_id == user.id)
+                                   .order_by(Receipt.created_at.desc(), Receipt.id.desc())
+                                   .offset(depth).limit(limit)).all()
+
+        print(f"{depth:>8}{keyset_ms:>12.2f}{best_of(repeat, offset_page):>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.limit, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Single-pass parse_receipt_text vs the old multi-scan parser
+
+    python -m benchmarks.bench_parser [--lines 50,200,500,1000] [--repeat 20]
+
+Receipts are generated with hundreds of item lines plus the header/footer
+noise a wholesale club receipt carries. Both parsers must agree on every
+input before timings are reported.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.legacy_parser import parse_receipt_text as legacy_parse
+from benchmarks.synthetic_receipts import receipt_lines
+from parse_model import parse_receipt_text
+
+FOOTER_NOISE = ['MEMBER #111222333444', 'ITEMS SOLD 42', 'CASH 500.00', 'CHANGE 3.21',
+                'T# 0042 OP 7 TR 1234', 'INSTANT SAVINGS 2.00', 'Thank you for shopping!']
+
+
+def long_receipt(line_count, seed=0):
+    rng = random.Random(seed)
+    lines = receipt_lines(seed, item_count=line_count)
+    for _ in range(line_count // 10):
+        lines.insert(rng.randint(3, len(lines)), rng.choice(FOOTER_NOISE))
+    return '\n'.join(lines)
+
+
+def best_of(fn, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(line_counts, repeat):
+    header = f"{'lines':>7}{'legacy ms':>12}{'single-pass ms':>16}{'speedup':>10}"
+    print(header)
+    print('-' * len(header))
+    for count in line_counts:
+        text = long_receipt(count)
+        assert parse_receipt_text(text) == legacy_parse(text), "parsers disagree"
+        legacy_ms = best_of(legacy_parse, text, repeat)
+        new_ms = best_of(parse_receipt_text, text, repeat)
+        print(f"{count:>7}{legacy_ms:>12.3f}{new_ms:>16.3f}{legacy_ms / new_ms:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', default='50,200,500,1000', help='comma separated item line counts')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run([int(n) for n in args.lines.split(',')], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
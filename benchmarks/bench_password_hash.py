@@ -0,0 +1,63 @@
+"""
+Password verification cost per PASSWORD_HASH_METHOD setting
+
+    python -m benchmarks.bench_password_hash [--seconds 2] [--threads N]
+                                             [--methods scrypt:32768:8:1,pbkdf2:sha256:600000]
+
+For each method: verifications per second on one thread (= logins per
+second per core, since verify dominates /api/auth/login) and the total
+with PASSWORD_HASH_WORKERS threads verifying at once, which scales with
+cores because hashlib releases the GIL while hashing.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METHODS = [
+    'scrypt:32768:8:1',       # werkzeug default
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000',  # werkzeug pbkdf2 default
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:210000',
+]
+
+
+def rate(seconds, threads, password_hash):
+    def worker():
+        count, deadline = 0, time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            check_password_hash(password_hash, 'correct horse battery staple')
+            count += 1
+        return count
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+        return total / (time.perf_counter() - start)
+
+
+def run(methods, seconds, threads):
+    header = f"{'method':<24}{'ms/verify':>11}{'logins/s/core':>15}{f'{threads} threads/s':>14}"
+    print(header)
+    print('-' * len(header))
+    for method in methods:
+        password_hash = generate_password_hash('correct horse battery staple', method)
+        single = rate(seconds, 1, password_hash)
+        pooled = rate(seconds, threads, password_hash)
+        print(f"{method:<24}{1000 / single:>11.1f}{single:>15.1f}{pooled:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', default=','.join(METHODS))
+    parser.add_argument('--seconds', type=float, default=2)
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.methods.split(','), args.seconds, args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Latency / accuracy trade-off of the OCR preprocessing stage
+
+    python -m benchmarks.bench_preprocessing [--count 4] [--sizes small,medium,12mp]
+
+Preprocessing time is always measured. OCR time and accuracy (character
+similarity to the ground truth, plus whether TOTAL parsed correctly) are
+only reported when the tesseract binary is installed.
+"""
+import argparse
+import difflib
+import shutil
+import time
+
+import pytesseract
+
+from benchmarks.synthetic_receipts import SIZES, receipt_set
+from image_preprocessing import PreprocessOptions, RAW_OPTIONS, preprocess_for_ocr
+from parse_model import parse_receipt_text
+
+PROFILES = {
+    'raw': RAW_OPTIONS,
+    'downscale': PreprocessOptions(crop=False, deskew=False, threshold=False),
+    'downscale+threshold': PreprocessOptions(crop=False, deskew=False),
+    'full': PreprocessOptions(),
+    'full@1400': PreprocessOptions(max_long_side=1400),
+}
+
+
+def score(text, truth):
+    return difflib.SequenceMatcher(None, text.split(), truth.split()).ratio()
+
+
+def run(sizes, count):
+    have_tesseract = shutil.which('tesseract') is not None
+    header = f"{'size':<8}{'profile':<22}{'prep ms':>9}{'ocr ms':>9}{'accuracy':>10}{'total ok':>10}"
+    print(header)
+    print('-' * len(header))
+
+    for size in sizes:
+        receipts = receipt_set(size, count)
+        for name, options in PROFILES.items():
+            prep_ms = ocr_ms = 0.0
+            accuracy = total_ok = 0.0
+            for image, truth in receipts:
+                start = time.perf_counter()
+                prepared = preprocess_for_ocr(image, options)
+                prep_ms += (time.perf_counter() - start) * 1000
+
+                if have_tesseract:
+                    start = time.perf_counter()
+                    text = pytesseract.image_to_string(prepared)
+                    ocr_ms += (time.perf_counter() - start) * 1000
+                    accuracy += score(text, truth)
+                    expected_total = parse_receipt_text(truth)['total']
+                    total_ok += parse_receipt_text(text)['total'] == expected_total
+
+            n = len(receipts)
+            if have_tesseract:
+                print(f"{size:<8}{name:<22}{prep_ms / n:>9.1f}{ocr_ms / n:>9.1f}"
+                      f"{accuracy / n:>10.3f}{total_ok / n:>10.2f}")
+            else:
+                print(f"{size:<8}{name:<22}{prep_ms / n:>9.1f}{'-':>9}{'-':>10}{'-':>10}")
+
+    if not have_tesseract:
+        print("\ntesseract not found: OCR latency and accuracy columns skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=4, help='receipts per size')
+    parser.add_argument('--sizes', default=','.join(SIZES), help='comma separated: ' + ', '.join(SIZES))
+    args = parser.parse_args()
+    run(args.sizes.split(','), args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+BillSplitter engines on large bills
+
+    python -m benchmarks.bench_split [--items 500] [--participants 50] [--repeat 5]
+
+Each item is shared by 1-10 random participants, a fifth of them with
+custom shares. Reports the best wall time to build the bill and run
+calculate_split per engine, the memory that leaves allocated, and the
+time to apply one assignment change and recalculate (the drag-and-drop path).
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from bill_splitting_logic import BillSplitter
+
+
+def build_splitter(item_count, participant_count, engine, seed=0):
+    rng = random.Random(seed)
+    splitter = BillSplitter(engine=engine)
+    ids = [splitter.add_participant(f"Person {i}") for i in range(participant_count)]
+    for i in range(item_count):
+        owners = rng.sample(ids, rng.randint(1, min(10, participant_count)))
+        custom_shares = None
+        if len(owners) > 1 and rng.random() < 0.2:
+            weights = [rng.randint(1, 5) for _ in owners]
+            custom_shares = {pid: w / sum(weights) for pid, w in zip(owners, weights)}
+        splitter.add_item(f"Item {i}", round(rng.uniform(0.5, 80), 2), participants=owners,
+                          custom_shares=custom_shares)
+    splitter.set_tax_and_tip(8.875, 18)
+    return splitter
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(item_count, participant_count, repeat):
+    print(f"{item_count} items x {participant_count} participants")
+    for engine in ('float', 'cents'):
+        ms = best_of(repeat, lambda: build_splitter(item_count, participant_count, engine).calculate_split())
+        print(f"  {engine:<5} build + split:     {ms:9.2f} ms")
+
+    for engine in ('float', 'cents'):
+        tracemalloc.start()
+        build_splitter(item_count, participant_count, engine).calculate_split()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {engine:<5} peak memory:       {peak / 1024:9.0f} KiB")
+
+    rng = random.Random(1)
+    for engine in ('float', 'cents'):
+        splitter = build_splitter(item_count, participant_count, engine)
+        splitter.calculate_split()
+
+        def change_one():
+            splitter.assign_item_to_participant(rng.randint(1, item_count), rng.randint(1, participant_count))
+            splitter.calculate_split()
+
+        print(f"  {engine:<5} one change + split: {best_of(repeat * 20, change_one):9.3f} ms")
+
+    result = build_splitter(item_count, participant_count, 'cents').calculate_split()
+    allocated = round(sum(p['total'] for p in result['participants']), 2)
+    print(f"  grand total {result['summary']['grand_total']:.2f}, allocated {allocated:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--participants', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.items, args.participants, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
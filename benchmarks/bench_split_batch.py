@@ -0,0 +1,84 @@
+"""
+/api/split-bill called once per job vs one /api/split-bill/batch request
+
+    python -m benchmarks.bench_split_batch [--jobs 500] [--items 25] [--participants 4]
+
+Runs against a throwaway SQLite database (DATABASE_URL is pointed at a
+temp dir before the app is imported). The batch is timed twice: computed
+inline, and with the threshold lowered so it goes through the process pool
+(forced to at least two workers; on a single-core host that shows the cost
+the default configuration avoids).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+from split_batch import split_batch  # noqa: E402
+
+
+def make_jobs(job_count, item_count, participant_count, seed=0):
+    rng = random.Random(seed)
+    names = [f"Person {i}" for i in range(participant_count)]
+    return [{
+        'receipt_data': {'items': [{'name': f"Item {i}", 'price': f"{rng.uniform(1, 40):.2f}"}
+                                   for i in range(item_count)]},
+        'participants': names,
+        'tax_rate': 8.875,
+        'tip_percentage': 18
+    } for _ in range(job_count)]
+
+
+def run(job_count, item_count, participant_count):
+    app.config['UPLOAD_FOLDER'] = _tmp.name
+    app.config['SPLIT_BATCH_MAX_JOBS'] = job_count
+    app.config['SPLIT_BATCH_WORKERS'] = max(2, app.config['SPLIT_BATCH_WORKERS'])
+    jobs = make_jobs(job_count, item_count, participant_count)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': f"Bearer {create_access_token(identity=user.id)}"}
+    client = app.test_client()
+
+    start = time.perf_counter()
+    for job in jobs:
+        client.post('/api/split-bill', json=job, headers=headers)
+    sequential = time.perf_counter() - start
+    print(f"{job_count} jobs, {item_count} items x {participant_count} participants")
+    print(f"  one request per job: {sequential * 1000:9.1f} ms")
+
+    for label, threshold in (('batch, inline', job_count + 1), ('batch, process pool', 1)):
+        app.config['SPLIT_BATCH_PARALLEL_THRESHOLD'] = threshold
+        client.post('/api/split-bill/batch', json={'jobs': jobs[:1]}, headers=headers)  # warm up
+        start = time.perf_counter()
+        res = client.post('/api/split-bill/batch', json={'jobs': jobs}, headers=headers)
+        elapsed = time.perf_counter() - start
+        timings = res.get_json()['timings']
+        print(f"  {label + ':':<20} {elapsed * 1000:9.1f} ms "
+              f"(compute {timings['compute_ms']:.1f}, insert {timings['insert_ms']:.1f})")
+    with app.app_context():
+        split_batch.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--items', type=int, default=25)
+    parser.add_argument('--participants', type=int, default=4)
+    args = parser.parse_args()
+    run(args.jobs, args.items, args.participants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Benchmark suite for the OCR, parsing, splitting and auth hot paths
+
+    python -m benchmarks.bench_suite [--save results.json] [--compare baseline.json]
+                                     [--threshold 10] [--min-time 0.5] [-k split]
+
+Cases are pytest tests over generated fixtures:
+- synthetic receipt photos at each size in SIZES, decoded from JPEG and
+  preprocessed (and OCR'd when the tesseract binary is installed);
+- OCR text of 20 to 2000 lines for parse_receipt_text;
+- BillSplitter bills of up to 5000 items and 500 participants;
+- login and split-bill requests through the Flask test client, against a
+  throwaway SQLite database.
+
+Each case runs until --min-time seconds have passed (at least 3 rounds after
+a warm-up) and the best round is reported, like the other bench_* scripts.
+--save writes every case's timings as a JSON baseline. --compare prints each
+case's change against a saved baseline and exits with status 1 if any case
+got more than --threshold percent slower.
+Any other arguments (-k, -x, ...) are passed on to pytest.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+from benchmarks.bench_parser import long_receipt
+from benchmarks.bench_split import build_splitter
+from benchmarks.synthetic_receipts import SIZES, render_receipt
+
+PARSER_LINES = (20, 200, 2000)
+# (items, participants)
+SPLIT_WORKLOADS = ((100, 10), (1000, 100), (5000, 500))
+SPLIT = {
+    'receipt_data': {'items': [{'name': f"Item {i}", 'price': '4.25'} for i in range(10)]},
+    'participants': ['Ana', 'Ben', 'Cy'],
+    'tax_rate': 8.875,
+    'tip_percentage': 18
+}
+
+
+class BenchmarkRecorder:
+    """pytest plugin providing the `benchmark` fixture and keeping its timings"""
+
+    def __init__(self, min_time=0.5, max_rounds=1000):
+        self.min_time = min_time
+        self.max_rounds = max_rounds
+        self.results = {}
+
+    @pytest.fixture
+    def benchmark(self, request):
+        def run(fn, *args, **kwargs):
+            result = fn(*args, **kwargs)  # warm-up
+            timings = []
+            deadline = time.perf_counter() + self.min_time
+            while len(timings) < 3 or (time.perf_counter() < deadline and len(timings) < self.max_rounds):
+                start = time.perf_counter()
+                fn(*args, **kwargs)
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings)
+            self.results[request.node.name] = {
+                'rounds': len(timings),
+                'min_ms': min(timings) * 1000,
+                'median_ms': median * 1000,
+                'mean_ms': statistics.mean(timings) * 1000,
+                'stddev_ms': statistics.stdev(timings) * 1000,
+                'ops_per_sec': 1 / median if median else None,
+            }
+            return result
+        return run
+
+
+# -------------------------
+# Generated fixtures
+# -------------------------
+@pytest.fixture(scope='module', params=list(SIZES))
+def receipt_jpeg(request):
+    image, _ = render_receipt(0, request.param)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90, dpi=(72, 72))
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope='module', params=PARSER_LINES, ids=lambda n: f"{n}lines")
+def ocr_text(request):
+    return long_receipt(request.param)
+
+
+@pytest.fixture(scope='module', params=SPLIT_WORKLOADS, ids=lambda w: f"{w[0]}x{w[1]}")
+def split_workload(request):
+    return request.param
+
+
+@pytest.fixture(scope='module')
+def client():
+    # main() points DATABASE_URL at a throwaway file before the app is imported
+    from app import app
+    from audit_log import audit_log
+    from extensions import db
+    from models import User
+
+    app.config['LOGIN_RATE_LIMIT_ENABLED'] = False
+    app.config['UPLOAD_FOLDER'] = os.path.dirname(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):])
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench-password')
+        db.session.add(user)
+        db.session.commit()
+    yield app.test_client()
+    # Login attempts are written in the background; finish before the file goes
+    with app.app_context():
+        audit_log.flush()
+
+
+@pytest.fixture
+def auth_headers(client):
+    res = client.post('/api/auth/login', json={'username': 'bench', 'password': 'bench-password'})
+    return {'Authorization': f"Bearer {res.get_json()['access_token']}"}
+
+
+# -------------------------
+# Cases
+# -------------------------
+def test_decode_and_preprocess(benchmark, receipt_jpeg):
+    from image_preprocessing import preprocess_for_ocr
+    from uploads import decode_image
+
+    def prepare():
+        return preprocess_for_ocr(decode_image(receipt_jpeg, 50_000_000, 2000))
+
+    benchmark(prepare)
+
+
+@pytest.mark.skipif(shutil.which('tesseract') is None, reason='tesseract is not installed')
+def test_ocr(benchmark, receipt_jpeg):
+    from parse_model import extract_receipt_data
+    result = benchmark(extract_receipt_data, receipt_jpeg)
+    assert result['total'] is not None
+
+
+def test_parse_receipt_text(benchmark, ocr_text):
+    from parse_model import parse_receipt_text
+    result = benchmark(parse_receipt_text, ocr_text)
+    assert result['items']
+
+
+@pytest.mark.parametrize('engine', ['cents', 'float'])
+def test_split_build_and_calculate(benchmark, split_workload, engine):
+    items, participants = split_workload
+    result = benchmark(lambda: build_splitter(items, participants, engine).calculate_split())
+    assert len(result['participants']) == participants
+
+
+def test_split_one_change(benchmark, split_workload):
+    # The drag-and-drop path: move one item, then recalculate
+    items, participants = split_workload
+    splitter = build_splitter(items, participants, 'cents')
+    moves = itertools.cycle((item, item % participants + 1) for item in range(1, items + 1))
+
+    def change_one():
+        splitter.assign_item_to_participant(*next(moves))
+        return splitter.calculate_split()
+
+    benchmark(change_one)
+
+
+def test_login_request(benchmark, client):
+    def login():
+        res = client.post('/api/auth/login', json={'username': 'bench', 'password': 'bench-password'})
+        assert res.status_code == 200
+
+    benchmark(login)
+
+
+def test_split_bill_request(benchmark, client, auth_headers):
+    def split_bill():
+        res = client.post('/api/split-bill', json=SPLIT, headers=auth_headers)
+        assert res.status_code == 200
+
+    benchmark(split_bill)
+
+
+# -------------------------
+# Baselines
+# -------------------------
+def save(path, results):
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': datetime.utcnow().isoformat(),
+            'machine': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+            },
+            'benchmarks': results,
+        }, f, indent=2, sort_keys=True)
+
+
+def compare(path, results, threshold):
+    """Print the change per case; returns the names that regressed"""
+    with open(path) as f:
+        baseline = json.load(f)['benchmarks']
+    header = f"{'case':<50}{'baseline ms':>13}{'now ms':>11}{'change':>9}"
+    print(header)
+    print('-' * len(header))
+    regressed = []
+    for name, current in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<50}{'-':>13}{current['min_ms']:>11.3f}{'new':>9}")
+            continue
+        change = (current['min_ms'] / before['min_ms'] - 1) * 100
+        flag = ''
+        if change > threshold:
+            regressed.append(name)
+            flag = '  SLOWER'
+        print(f"{name:<50}{before['min_ms']:>13.3f}{current['min_ms']:>11.3f}{change:>+8.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='percent slowdown that fails --compare')
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds to spend on each case')
+    args, pytest_args = parser.parse_known_args()
+
+    recorder = BenchmarkRecorder(min_time=args.min_time)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        status = pytest.main([__file__, '-q', '-p', 'no:cacheprovider', *pytest_args], plugins=[recorder])
+    if status not in (pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED):
+        sys.exit(status)
+
+    header = f"{'case':<50}{'best ms':>11}{'median ms':>11}{'ops/s':>11}{'rounds':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, result in sorted(recorder.results.items()):
+        print(f"{name:<50}{result['min_ms']:>11.3f}{result['median_ms']:>11.3f}"
+              f"{result['ops_per_sec']:>11.1f}{result['rounds']:>8}")
+
+    if args.save:
+        save(args.save, recorder.results)
+        print(f"saved {len(recorder.results)} results to {args.save}")
+    if args.compare:
+        regressed = compare(args.compare, recorder.results, args.threshold)
+        if regressed:
+            print(f"FAIL: {len(regressed)} case(s) more than {args.threshold:.0f}% slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
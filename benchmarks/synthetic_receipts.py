@@ -0,0 +1,74 @@
+"""
+Deterministic synthetic receipts for benchmarks
+
+Each receipt is rendered with PIL text onto a white "paper" strip, placed on
+a darker table-coloured background, slightly rotated and scaled up to a phone
+camera resolution. The ground-truth text is returned alongside so OCR
+accuracy can be scored.
+"""
+import random
+from PIL import Image, ImageDraw, ImageFont
+
+STORES = ['FRESH MARKET', 'CORNER GROCERY', 'SUPER SAVE MART', 'GREEN FOOD SHOP']
+PRODUCTS = [
+    'Bananas', 'Whole Milk', 'Bread Loaf', 'Eggs Dozen', 'Cheddar Cheese', 'Apples',
+    'Orange Juice', 'Coffee Beans', 'Pasta', 'Tomato Sauce', 'Chicken Breast', 'Rice',
+    'Yogurt', 'Butter', 'Spinach', 'Avocado', 'Cereal', 'Peanut Butter'
+]
+
+# name -> (width, height) of the full camera frame
+SIZES = {
+    'small': (1200, 1600),
+    'medium': (2250, 3000),
+    '12mp': (3000, 4000),
+}
+
+
+def receipt_lines(seed, item_count=12):
+    """Ground-truth receipt text for a seed"""
+    rng = random.Random(seed)
+    lines = [rng.choice(STORES), '123 MAIN ST', '']
+    subtotal = 0.0
+    for _ in range(item_count):
+        price = round(rng.uniform(0.5, 25.0), 2)
+        subtotal += price
+        lines.append(f"{rng.choice(PRODUCTS):<22}{price:>7.2f}")
+    tax = round(subtotal * 0.08, 2)
+    lines += [
+        '',
+        f"{'SUBTOTAL':<22}{subtotal:>7.2f}",
+        f"{'TAX':<22}{tax:>7.2f}",
+        f"{'TOTAL':<22}{subtotal + tax:>7.2f}",
+    ]
+    return lines
+
+
+def render_receipt(seed, size='medium', skew=None, item_count=12):
+    """Return (PIL image, ground-truth text) for one synthetic receipt photo"""
+    rng = random.Random(seed)
+    lines = receipt_lines(seed, item_count)
+
+    font = ImageFont.load_default(28)
+    line_height = 38
+    paper = Image.new('L', (620, 80 + line_height * len(lines)), 250)
+    draw = ImageDraw.Draw(paper)
+    for i, line in enumerate(lines):
+        draw.text((30, 40 + i * line_height), line, fill=20, font=font)
+
+    if skew is None:
+        skew = rng.uniform(-4.0, 4.0)
+    paper = paper.rotate(skew, expand=True, fillcolor=0, resample=Image.Resampling.BICUBIC)
+
+    # Paper covers roughly the middle half of the frame, like a hand-held photo
+    width, height = SIZES[size]
+    scale = (height * 0.75) / paper.height
+    paper = paper.resize((int(paper.width * scale), int(paper.height * scale)), Image.Resampling.BICUBIC)
+    mask = paper.point(lambda v: 255 if v > 0 else 0)
+
+    frame = Image.new('L', (width, height), 90)
+    frame.paste(paper, ((width - paper.width) // 2, (height - paper.height) // 2), mask)
+    return frame.convert('RGB'), '\n'.join(lines)
+
+
+def receipt_set(size='medium', count=4):
+    return [render_receipt(seed, size) for seed in range(count)]
@@ -1,27 +1,174 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 from decimal import Decimal, ROUND_HALF_UP
+import math
 
-class BillSplitter:
-    def __init__(self):
-        self.participants = []
+# Custom shares are turned into integer weights with this resolution
+SHARE_SCALE = 1_000_000
+
+
+def to_cents(amount: float) -> int:
+    """Convert a currency amount to integer cents, rounding half up"""
+    if amount is None:
+        return 0
+    scaled = amount * 100
+    cents = math.floor(scaled + 0.5)
+    if abs(scaled - cents) < 0.499:
+        return cents
+    # Too close to half a cent for float math to be trusted
+    return int(Decimal(str(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def percent_of_cents(cents: int, percentage: float) -> int:
+    """`percentage` percent of an amount in cents, rounded half up to a whole cent"""
+    exact = Decimal(cents) * Decimal(str(percentage)) / Decimal(100)
+    return int(exact.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def allocate_cents(total: int, weights: List[int]) -> List[int]:
+    """
+    Split `total` cents in proportion to integer `weights` with the
+    largest-remainder method: everyone gets the floor of their exact
+    quota and the leftover cents go to the largest remainders (earlier index
+    wins ties). The result always sums to `total`, and nobody is more than
+    a cent away from their exact quota.
+    """
+    weight_sum = sum(weights)
+    if not weights or weight_sum == 0:
+        return [0] * len(weights)
+    if weights[0] == 1 and weight_sum == len(weights) and all(weight == 1 for weight in weights):
+        # Equal split: same result as below without the sort
+        quota, extra = divmod(total, len(weights))
+        return [quota + 1] * extra + [quota] * (len(weights) - extra)
+    shares = []
+    remainders = []
+    for index, weight in enumerate(weights):
+        quota, remainder = divmod(total * weight, weight_sum)
+        shares.append(quota)
+        remainders.append((-remainder, index))
+    for _, index in sorted(remainders)[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+
+class _Participant:
+    """One person on the bill; calculate_split fills in the money fields"""
+    __slots__ = ('id', 'name', 'email', 'items', 'subtotal', 'tax_share', 'tip_share', 'total')
+
+    def __init__(self, participant_id: int, name: str, email: str = None):
+        self.id = participant_id
+        self.name = name
+        self.email = email
         self.items = []
+        self.subtotal = 0.0
+        self.tax_share = 0.0
+        self.tip_share = 0.0
+        self.total = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_Participant':
+        return cls(int(data['id']), data.get('name'), data.get('email'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'items': self.items,
+            'subtotal': self.subtotal,
+            'tax_share': self.tax_share,
+            'tip_share': self.tip_share,
+            'total': self.total
+        }
+
+
+class _Item:
+    """
+    One line of the bill. `participants` is a dict used as an insertion-ordered
+    set, so membership checks and removals are O(1) while the order people were
+    added in is kept.
+    """
+    __slots__ = ('id', 'name', 'price', 'cents', 'participants', 'custom_shares', 'price_per_person')
+
+    def __init__(self, item_id: int, name: str, price: float, participants: List[int] = None,
+                 custom_shares: Dict[int, float] = None):
+        self.id = item_id
+        self.name = name
+        self.price = price
+        self.cents = to_cents(price)
+        self.participants = dict.fromkeys(participants or ())
+        self.custom_shares = dict(custom_shares or {})
+        self.price_per_person = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> '_Item':
+        # JSON turns the custom share keys into strings
+        item = cls(int(data['id']), data.get('name'), float(data.get('price') or 0.0),
+                   [int(pid) for pid in data.get('participants') or []],
+                   {int(pid): share for pid, share in (data.get('custom_shares') or {}).items()})
+        item.price_per_person = data.get('price_per_person', 0.0)
+        return item
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'price': self.price,
+            'participants': list(self.participants),
+            'custom_shares': self.custom_shares,
+            'price_per_person': self.price_per_person
+        }
+
+
+class BillSplitter:
+    def __init__(self, engine: str = 'cents'):
+        """
+        engine: 'cents' computes in integer cents so every total adds up exactly;
+        'float' is the original float implementation.
+        """
+        # Records are indexed by id and only turned into dicts for output
+        self._participants = {}     # participant id -> _Participant
+        self._items = {}            # item id -> _Item
         self.tax_rate = 0.0
         self.tip_percentage = 0.0
+        self.engine = engine
+
+        # Running state for the cents engine, kept up to date by the mutators
+        # so calculate_split only has to round. Each participant's exact
+        # subtotal is whole cents plus fractions of a cent, kept as
+        # numerators per denominator so nothing is rounded per item.
+        self._subtotals = {}        # participant id -> whole cents
+        self._fractions = {}        # participant id -> {denominator: numerator}
+        self._allocations = {}      # item id -> {participant id: (cents, numerator, denominator)}
+        self._item_rows = {}        # participant id -> {item id: output row}
+        self._item_dicts = {}       # item id -> serialized item, dropped when the item changes
+        self._total_subtotal = 0
+        self._stale = False         # running state must be rebuilt from the records
+        self._result = None         # cached calculate_split() output, None when dirty
+
+    @property
+    def participants(self) -> List[Dict[str, Any]]:
+        """Participants in the dict shape the API returns"""
+        return [participant.to_dict() for participant in self._participants.values()]
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """Items in the dict shape the API returns"""
+        cache = self._item_dicts
+        return [cache.get(item_id) or cache.setdefault(item_id, item.to_dict())
+                for item_id, item in self._items.items()]
         
     def add_participant(self, name: str, email: str = None):
         """Add a participant to the bill split"""
-        participant = {
-            'id': len(self.participants) + 1,
-            'name': name,
-            'email': email,
-            'items': [],
-            'subtotal': 0.0,
-            'tax_share': 0.0,
-            'tip_share': 0.0,
-            'total': 0.0
-        }
-        self.participants.append(participant)
-        return participant['id']
+        participant = _Participant(len(self._participants) + 1, name, email)
+        self._participants[participant.id] = participant
+        self._subtotals[participant.id] = 0
+        self._fractions[participant.id] = {}
+        self._item_rows[participant.id] = {}
+        if self._items:
+            # Existing items may already reference this id
+            self._stale = True
+        self._result = None
+        return participant.id
     
     def add_item(self, name: str, price: float, participants: List[int] = None, custom_shares: Dict[int, float] = None):
     
@@ -29,14 +176,7 @@ class BillSplitter:
         if price is None:
             price = 0.0
             
-        item = {
-            'id': len(self.items) + 1,
-            'name': name,
-            'price': float(price),
-            'participants': participants or [],
-            'custom_shares': custom_shares or {},
-            'price_per_person': 0.0
-        }
+        item = _Item(len(self._items) + 1, name, float(price), participants, custom_shares)
         
         # Calculate price per person if participants are specified
         if participants:
@@ -45,87 +185,259 @@ class BillSplitter:
                 total_custom_share = sum(custom_shares.values())
                 if abs(total_custom_share - 1.0) > 0.01:  # Allow small floating point errors
                     raise ValueError("Custom shares must sum to 1.0")
-                item['price_per_person'] = item['price']
+                item.price_per_person = item.price
             else:
                 # Equal splitting among participants
-                item['price_per_person'] = item['price'] / len(participants)
+                item.price_per_person = item.price / len(participants)
         
-        self.items.append(item)
-        return item['id']
+        self._items[item.id] = item
+        self._total_subtotal += item.cents
+        self._apply_item(item)
+        return item.id
+
+    def _get_item(self, item_id: int) -> _Item:
+        item = self._items.get(item_id)
+        if item is None:
+            raise ValueError(f"Item {item_id} not found")
+        return item
     
     def assign_item_to_participant(self, item_id: int, participant_id: int, share: float = 1.0):
         """Assign an item to a participant with optional custom share"""
-        item = next((i for i in self.items if i['id'] == item_id), None)
-        participant = next((p for p in self.participants if p['id'] == participant_id), None)
-        
-        if not item:
-            raise ValueError(f"Item {item_id} not found")
-        if not participant:
+        item = self._get_item(item_id)
+        if participant_id not in self._participants:
             raise ValueError(f"Participant {participant_id} not found")
         
         # Remove from current participants if already assigned
-        if participant_id in item['participants']:
-            item['participants'].remove(participant_id)
-            if participant_id in item['custom_shares']:
-                del item['custom_shares'][participant_id]
+        if participant_id in item.participants:
+            del item.participants[participant_id]
+            item.custom_shares.pop(participant_id, None)
         
         # Add to participants
-        item['participants'].append(participant_id)
+        item.participants[participant_id] = None
         if share != 1.0:
-            item['custom_shares'][participant_id] = share
+            item.custom_shares[participant_id] = share
+        self._apply_item(item)
+
+    def unassign_item_from_participant(self, item_id: int, participant_id: int):
+        """Take a participant off an item"""
+        item = self._get_item(item_id)
+        item.participants.pop(participant_id, None)
+        item.custom_shares.pop(participant_id, None)
+        self._apply_item(item)
     
     def set_tax_and_tip(self, tax_rate: float = 0.0, tip_percentage: float = 0.0):
         """Set tax rate and tip percentage"""
         # Handle null/empty values
         self.tax_rate = float(tax_rate) if tax_rate is not None else 0.0
         self.tip_percentage = float(tip_percentage) if tip_percentage is not None else 0.0
+        self._result = None
+
+    # -------------------------
+    # Incremental cents state
+    # -------------------------
+    def _allocate_item(self, item: _Item) -> List[tuple]:
+        """
+        One sparse row of the share matrix: (participant id, share, exact
+        cents) per owner, the exact amount being cents + numerator / denominator
+        """
+        if not item.participants:
+            # Item not assigned to anyone, skip
+            return []
+        known = self._participants
+
+        if item.custom_shares:
+            owners = [(pid, share) for pid, share in item.custom_shares.items() if pid in known]
+            shares = [share for _, share in owners]
+            # Shares may sum to slightly less/more than 1.0
+            share_total = sum(shares)
+            target = item.cents if abs(share_total - 1.0) < 1e-9 else round(item.cents * share_total)
+            weights = [round(share * SHARE_SCALE) for share in shares]
+            weight_sum = sum(weights)
+            if not weight_sum:
+                return []
+            return [(pid, share, (*divmod(target * weight, weight_sum), weight_sum))
+                    for (pid, share), weight in zip(owners, weights)]
+
+        count_owners = len(item.participants)
+        exact = (*divmod(item.cents, count_owners), count_owners)
+        return [(pid, 1.0 / count_owners, exact) for pid in item.participants if pid in known]
+
+    def _apply_item(self, item: _Item):
+        """Swap an item's old allocation for a fresh one in the running subtotals"""
+        self._result = None
+        self._item_dicts.pop(item.id, None)
+        if self._stale or self.engine != 'cents':
+            # The next cents calculate_split rebuilds everything anyway
+            self._stale = True
+            return
+        self._allocate_into_subtotals(item)
+
+    def _allocate_into_subtotals(self, item: _Item):
+        """Replace the item's allocation in the running state, whatever the default engine"""
+        item_id = item.id
+        for pid, (cents, numerator, denominator) in self._allocations.pop(item_id, {}).items():
+            self._subtotals[pid] -= cents
+            if numerator:
+                fractions = self._fractions[pid]
+                fractions[denominator] -= numerator
+                if not fractions[denominator]:
+                    del fractions[denominator]
+            del self._item_rows[pid][item_id]
+
+        allocation = {}
+        for pid, share, exact in self._allocate_item(item):
+            cents, numerator, denominator = exact
+            allocation[pid] = exact
+            self._subtotals[pid] += cents
+            if numerator:
+                fractions = self._fractions[pid]
+                fractions[denominator] = fractions.get(denominator, 0) + numerator
+            # The row shows the item's exact share rounded half up; only the
+            # participant's subtotal is rounded against everyone else's
+            shown = cents + (2 * numerator >= denominator)
+            self._item_rows[pid][item_id] = {'item_id': item_id, 'name': item.name, 'price': shown / 100, 'share': share}
+        if allocation:
+            self._allocations[item_id] = allocation
+
+    def _rebuild(self):
+        self._subtotals = dict.fromkeys(self._participants, 0)
+        self._fractions = {pid: {} for pid in self._participants}
+        self._item_rows = {pid: {} for pid in self._participants}
+        self._allocations = {}
+        self._total_subtotal = sum(item.cents for item in self._items.values())
+        self._stale = False
+        for item in self._items.values():
+            self._allocate_into_subtotals(item)
     
-    def calculate_split(self) -> Dict[str, Any]:
+    def _exact_subtotals(self, pids: List[int]) -> tuple:
+        """Unrounded subtotals in cents, as integers over one common denominator"""
+        fractions = self._fractions
+        common = math.lcm(*{denominator for pid in pids for denominator in fractions[pid]})
+        exact = [self._subtotals[pid] * common
+                 + sum(numerator * (common // denominator) for denominator, numerator in fractions[pid].items())
+                 for pid in pids]
+        return exact, common
+
+    def calculate_split(self, engine: str = None) -> Dict[str, Any]:
         """Calculate the final bill split"""
+        if (engine or self.engine) == 'cents':
+            return self._calculate_split_cents()
+        return self._calculate_split_float()
+
+    def _calculate_split_cents(self) -> Dict[str, Any]:
+        """
+        Integer-cent engine.
+
+        Each item is one sparse row of the items x participants share
+        matrix; the mutators keep its product with the price vector (the
+        exact per-participant subtotals) up to date, so this only has to
+        round. Rounding happens once per bill, not per item: the subtotals,
+        subtotals + tax and subtotals + tax + tip are each allocated with
+        allocate_cents against the exact amounts, and the tax and tip shares
+        are the differences. Every subtotal, tax share, tip share and total
+        is within a cent of its exact value and each column adds up exactly.
+        """
+        if self._stale:
+            self._rebuild()
+        if self._result is not None:
+            return self._result
+
+        participants = list(self._participants.values())
+        total_subtotal = self._total_subtotal
+        exact, common = self._exact_subtotals(list(self._participants))
+
+        tax_rate = self.tax_rate if self.tax_rate is not None else 0.0
+        tip_percentage = self.tip_percentage if self.tip_percentage is not None else 0.0
+        total_tax = percent_of_cents(total_subtotal, tax_rate)
+        total_tip = percent_of_cents(total_subtotal, tip_percentage)
+
+        # Unassigned items keep their part of tax/tip unallocated, like the float engine
+        assigned = sum(exact) // common
+
+        def assigned_part(amount):
+            if assigned == total_subtotal:
+                return amount
+            return amount * assigned // total_subtotal if total_subtotal else 0
+
+        assigned_tax = assigned_part(total_tax)
+        # Tax and tip are proportional to the subtotals, so each running sum
+        # is rounded against the same exact weights
+        subtotals = allocate_cents(assigned, exact)
+        with_tax = allocate_cents(assigned + assigned_tax, exact)
+        totals = allocate_cents(assigned + assigned_tax + assigned_part(total_tip), exact)
+        tax_shares = [b - a for a, b in zip(subtotals, with_tax)]
+        tip_shares = [b - a for a, b in zip(with_tax, totals)]
+
+        for position, participant in enumerate(participants):
+            rows = self._item_rows[participant.id]
+            participant.items = [rows[item_id] for item_id in sorted(rows)]
+            participant.subtotal = subtotals[position] / 100
+            participant.tax_share = tax_shares[position] / 100
+            participant.tip_share = tip_shares[position] / 100
+            participant.total = totals[position] / 100
+
+        self._result = {
+            'summary': {
+                'total_subtotal': total_subtotal / 100,
+                'total_tax': total_tax / 100,
+                'total_tip': total_tip / 100,
+                'grand_total': (total_subtotal + total_tax + total_tip) / 100,
+                'tax_rate': tax_rate,
+                'tip_percentage': tip_percentage
+            },
+            'participants': [participant.to_dict() for participant in participants],
+            'items': self.items
+        }
+        return self._result
+
+    def _calculate_split_float(self) -> Dict[str, Any]:
+        self._result = None
+        participants = self._participants
+
         # Reset participant totals
-        for participant in self.participants:
-            participant['items'] = []
-            participant['subtotal'] = 0.0
-            participant['tax_share'] = 0.0
-            participant['tip_share'] = 0.0
-            participant['total'] = 0.0
+        for participant in participants.values():
+            participant.items = []
+            participant.subtotal = 0.0
+            participant.tax_share = 0.0
+            participant.tip_share = 0.0
+            participant.total = 0.0
         
         # Calculate item subtotals per participant
         total_subtotal = 0.0
         
-        for item in self.items:
-            item_price = item['price']
+        for item in self._items.values():
+            item_price = item.price
             total_subtotal += item_price
             
-            if not item['participants']:
+            if not item.participants:
                 # Item not assigned to anyone, skip
                 continue
             
-            if item['custom_shares']:
+            if item.custom_shares:
                 # Custom shares
-                for participant_id, share in item['custom_shares'].items():
-                    participant = next((p for p in self.participants if p['id'] == participant_id), None)
+                for participant_id, share in item.custom_shares.items():
+                    participant = participants.get(participant_id)
                     if participant:
                         participant_share = item_price * share
-                        participant['subtotal'] += participant_share
-                        participant['items'].append({
-                            'item_id': item['id'],
-                            'name': item['name'],
+                        participant.subtotal += participant_share
+                        participant.items.append({
+                            'item_id': item.id,
+                            'name': item.name,
                             'price': participant_share,
                             'share': share
                         })
             else:
                 # Equal split among participants
-                share_per_person = item_price / len(item['participants'])
-                for participant_id in item['participants']:
-                    participant = next((p for p in self.participants if p['id'] == participant_id), None)
+                share_per_person = item_price / len(item.participants)
+                for participant_id in item.participants:
+                    participant = participants.get(participant_id)
                     if participant:
-                        participant['subtotal'] += share_per_person
-                        participant['items'].append({
-                            'item_id': item['id'],
-                            'name': item['name'],
+                        participant.subtotal += share_per_person
+                        participant.items.append({
+                            'item_id': item.id,
+                            'name': item.name,
                             'price': share_per_person,
-                            'share': 1.0 / len(item['participants'])
+                            'share': 1.0 / len(item.participants)
                         })
         
         # Calculate tax and tip shares based on subtotal proportions
@@ -136,21 +448,21 @@ class BillSplitter:
         total_tip = total_subtotal * (tip_percentage / 100)
         grand_total = total_subtotal + total_tax + total_tip
         
-        for participant in self.participants:
+        for participant in participants.values():
             if total_subtotal > 0:
-                proportion = participant['subtotal'] / total_subtotal
+                proportion = participant.subtotal / total_subtotal
             else:
                 proportion = 0
             
-            participant['tax_share'] = total_tax * proportion
-            participant['tip_share'] = total_tip * proportion
-            participant['total'] = participant['subtotal'] + participant['tax_share'] + participant['tip_share']
+            participant.tax_share = total_tax * proportion
+            participant.tip_share = total_tip * proportion
+            participant.total = participant.subtotal + participant.tax_share + participant.tip_share
             
             # Round to 2 decimal places for currency
-            participant['subtotal'] = self._round_currency(participant['subtotal'])
-            participant['tax_share'] = self._round_currency(participant['tax_share'])
-            participant['tip_share'] = self._round_currency(participant['tip_share'])
-            participant['total'] = self._round_currency(participant['total'])
+            participant.subtotal = self._round_currency(participant.subtotal)
+            participant.tax_share = self._round_currency(participant.tax_share)
+            participant.tip_share = self._round_currency(participant.tip_share)
+            participant.total = self._round_currency(participant.total)
         
         return {
             'summary': {
@@ -173,25 +485,25 @@ class BillSplitter:
     
     def split_evenly(self, total_amount: float) -> Dict[int, float]:
         """Split total amount evenly among all participants"""
-        if not self.participants:
+        if not self._participants:
             return {}
         
         # Handle null total amount
         if total_amount is None:
             total_amount = 0.0
             
-        share = total_amount / len(self.participants)
+        share = total_amount / len(self._participants)
         rounded_share = self._round_currency(share)
         
         # Handle rounding differences
-        result = {p['id']: rounded_share for p in self.participants}
+        result = {participant_id: rounded_share for participant_id in self._participants}
         total_allocated = sum(result.values())
         
         # Adjust for rounding differences
         difference = total_amount - total_allocated
         if abs(difference) > 0.01:
             # Add difference to first participant
-            first_participant_id = self.participants[0]['id']
+            first_participant_id = next(iter(self._participants))
             result[first_participant_id] = self._round_currency(result[first_participant_id] + difference)
         
         return result
@@ -200,8 +512,8 @@ class BillSplitter:
         """Export the current bill split state to JSON"""
         calculation = self.calculate_split()
         return {
-            'participants': self.participants,
-            'items': self.items,
+            'participants': calculation['participants'],
+            'items': calculation['items'],
             'tax_rate': self.tax_rate,
             'tip_percentage': self.tip_percentage,
             'calculation': calculation
@@ -209,10 +521,15 @@ class BillSplitter:
     
     def import_from_json(self, data: Dict[str, Any]):
         """Import bill split state from JSON"""
-        self.participants = data.get('participants', [])
-        self.items = data.get('items', [])
+        participants = map(_Participant.from_dict, data.get('participants', []))
+        items = map(_Item.from_dict, data.get('items', []))
+        self._participants = {participant.id: participant for participant in participants}
+        self._items = {item.id: item for item in items}
+        self._item_dicts = {}
         self.tax_rate = data.get('tax_rate', 0.0)
         self.tip_percentage = data.get('tip_percentage', 0.0)
+        self._stale = True
+        self._result = None
 
 
 # Utility functions for common use cases
@@ -223,6 +540,25 @@ def split_receipt_items(receipt_data: Dict, participants: List[str], tax_rate: f
     Returns:
         Dictionary with split calculation
     """
+    return build_receipt_splitter(receipt_data, participants, tax_rate, tip_percentage).calculate_split()
+
+
+def compute_split(receipt_data: Dict, participants: List[str], split_method: str = 'itemized',
+                  tax_rate: float = 0.0, tip_percentage: float = 0.0) -> Dict[str, Any]:
+    """
+    The calculation behind /api/split-bill: an even split of the receipt
+    total, or an itemized split via split_receipt_items
+    """
+    if split_method == 'even':
+        return calculate_even_split(float(receipt_data.get('total', 0)), len(participants))
+    return split_receipt_items(receipt_data, participants, tax_rate, tip_percentage)
+
+
+def build_receipt_splitter(receipt_data: Dict, participants: List[str], tax_rate: float = 0.0, tip_percentage: float = 0.0) -> BillSplitter:
+    """
+    Set up a BillSplitter for a parsed receipt, with every item assigned
+    to the first participant; split_receipt_items and split sessions start here
+    """
     splitter = BillSplitter()
     
     # Add participants
@@ -249,12 +585,12 @@ def split_receipt_items(receipt_data: Dict, participants: List[str], tax_rate: f
     splitter.set_tax_and_tip(safe_tax_rate, safe_tip_percentage)
     
     # Auto-assign items (simple strategy: assign to all participants)
-    for item in splitter.items:
-        all_participant_ids = [p['id'] for p in splitter.participants]
-        if all_participant_ids:  # Only assign if there are participants
-            splitter.assign_item_to_participant(item['id'], all_participant_ids[0])  # Assign to first participant as default
+    first_participant_id = next(iter(splitter._participants), None)
+    if first_participant_id is not None:  # Only assign if there are participants
+        for item_id in splitter._items:
+            splitter.assign_item_to_participant(item_id, first_participant_id)  # Assign to first participant as default
     
-    return splitter.calculate_split()
+    return splitter
 
 
 def calculate_even_split(total_amount: float, num_people: int) -> Dict[str, float]:
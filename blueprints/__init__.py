@@ -0,0 +1 @@
+# Route groups registered by app.create_app
@@ -0,0 +1,82 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import load_only, selectinload
+
+from audit_log import audit_log
+from auth.decorator import role_required
+from extensions import db
+from models import User, Role
+from ocr_cache import ocr_cache
+from pagination import CursorError, keyset_page, page_size
+
+bp = Blueprint('admin', __name__)
+
+# ---------------- Admin Endpoints----------------
+@bp.route("/api/admin/users", methods=["GET"])
+@role_required("admin")
+def admin_get_users():
+    # Roles for the whole page come from one extra SELECT ... IN instead of one per user
+    statement = db.select(User).options(
+        load_only(User.id, User.username, User.email, User.is_active),
+        selectinload(User.roles).load_only(Role.name)
+    )
+    try:
+        users, next_cursor = keyset_page(db.session, statement, [User.username],
+                                         page_size(request.args.get("limit")), request.args.get("cursor"),
+                                         descending=False)
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "items": [
+            {
+                "id": u.id,
+                "username": u.username,
+                "email": u.email,
+                "is_active": u.is_active,
+                "roles": [r.name for r in u.roles]
+            } for u in users
+        ],
+        "next_cursor": next_cursor
+    })
+
+
+@bp.route("/api/admin/users/<user_id>/status", methods=["PATCH"])
+@role_required("admin")
+def admin_toggle_user(user_id):
+    data = request.get_json()
+    user = User.query.get_or_404(user_id)
+
+    user.is_active = data.get("is_active", user.is_active)
+    db.session.commit()
+
+    return jsonify({"msg": "User status updated"})
+
+
+@bp.route("/api/admin/users/<user_id>/roles", methods=["POST"])
+@role_required("admin")
+def admin_assign_role(user_id):
+    data = request.get_json()
+    role_name = data.get("role")
+
+    user = User.query.get_or_404(user_id)
+    role = Role.query.filter_by(name=role_name).first()
+
+    if not role:
+        return jsonify({"msg": "Role not found"}), 404
+
+    if role not in user.roles:
+        user.roles.append(role)
+        db.session.commit()
+
+    return jsonify({"msg": f"Role '{role_name}' assigned"})
+
+
+@bp.route("/api/admin/ocr-cache", methods=["GET"])
+@role_required("admin")
+def admin_ocr_cache_stats():
+    return jsonify(ocr_cache.stats())
+
+
+@bp.route("/api/admin/audit-log", methods=["GET"])
+@role_required("admin")
+def admin_audit_log_stats():
+    return jsonify(audit_log.stats())
@@ -0,0 +1,203 @@
+from flask import Blueprint, current_app, request, jsonify, url_for, redirect
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from datetime import datetime
+import uuid
+
+from audit_log import audit_log
+from auth.rate_limit import login_rate_limiter
+from auth.tokens import refresh_tokens
+from auth.user_context import access_denylist
+from extensions import db
+from models import User, LoginAttempt
+
+bp = Blueprint('auth', __name__)
+
+
+class LazyOAuthClient:
+    """
+    The Google OAuth client, registered on first use. Importing authlib pulls
+    in requests and friends, which nothing but these two routes needs.
+    """
+
+    def _client(self):
+        app = current_app._get_current_object()
+        client = app.extensions.get('google_oauth')
+        if client is None:
+            from authlib.integrations.flask_client import OAuth
+            client = OAuth(app).register(
+                name='google',
+                client_id='GOOGLE_CLIENT_ID',
+                client_secret='GOOGLE_CLIENT_SECRET',
+                access_token_url='https://oauth2.googleapis.com/token',
+                authorize_url='https://accounts.google.com/o/oauth2/auth',
+                api_base_url='https://www.googleapis.com/oauth2/v1/',
+                userinfo_endpoint='https://openidconnect.googleapis.com/v1/userinfo',
+                client_kwargs={'scope': 'openid email profile'}
+            )
+            app.extensions['google_oauth'] = client
+        return client
+
+    def __getattr__(self, name):
+        return getattr(self._client(), name)
+
+
+google = LazyOAuthClient()
+
+# ---------------- Helper Functions ----------------
+
+def log_login_attempt(user_id, email, success, failure_reason=None):
+    """Record a login attempt (written in the background, see audit_log)"""
+    audit_log.record(
+        LoginAttempt,
+        attempt_id=str(uuid.uuid4()),
+        user_id=user_id,
+        email=email,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent'),
+        success=success,
+        failure_reason=failure_reason
+    )
+# ---------------- Auth Endpoints ----------------
+@bp.route("/api/auth/register", methods=["POST"])
+def register():
+    data = request.get_json()
+    if User.query.filter_by(username=data["username"]).first():
+        return jsonify({"msg": "Username already exists"}), 400
+    if User.query.filter_by(email=data["email"]).first():
+        return jsonify({"msg": "Email already exists"}), 400
+
+    birthdate_obj = None
+    if data.get("birthdate"):
+        try:
+            birthdate_obj = datetime.strptime(data["birthdate"], "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"msg": "Invalid birthdate format. Use YYYY-MM-DD"}), 400
+
+    user = User(
+        id=str(uuid.uuid4()),
+        username=data["username"],
+        email=data["email"],
+        name=data.get("name"),
+        phone_number=data.get("phone_number"),
+        birthdate=birthdate_obj,
+        is_oauth=False
+    )
+
+    password = data.get("password")
+    if not password:
+        return jsonify({"msg": "Password is required"}), 400
+    user.set_password(password)
+
+    db.session.add(user)
+    db.session.commit()
+    return jsonify({"msg": "User created successfully", "user_id": user.id}), 201
+
+@bp.route("/api/auth/login", methods=["POST"])
+def login():
+    data = request.get_json()
+    email_or_username = data.get("username") or data.get("email")
+    user = User.query.filter(
+        (User.username == email_or_username) | (User.email == email_or_username)
+    ).first()
+
+    # Counted per account, not per spelling of its name
+    account = login_rate_limiter.account_key(user.id if user else None, email_or_username)
+    retry_after = login_rate_limiter.check(request.remote_addr, account)
+    if retry_after:
+        log_login_attempt(user.id if user else None, email_or_username, False, "Rate limited")
+        return jsonify({"msg": "Too many failed login attempts, try again later"}), 429, {"Retry-After": str(retry_after)}
+
+    if not user or not user.check_password(data.get("password")):
+        login_rate_limiter.record_failure(request.remote_addr, account)
+        log_login_attempt(user.id if user else None, email_or_username, False, "Invalid credentials")
+        return jsonify({"msg": "Bad credentials"}), 401
+
+    if user.is_oauth and not user.password_hash:
+        return jsonify({"msg": "Please login using Google"}), 401
+
+    if user.is_active is False:
+        return jsonify({"msg": "Account is disabled"}), 403
+
+    access_token = create_access_token(identity=user.id)
+    refresh_token_str = refresh_tokens.issue(user.id, request.remote_addr, request.headers.get('User-Agent'))
+
+    login_rate_limiter.record_success(account)
+    log_login_attempt(user.id, email_or_username, True)
+    return jsonify({"access_token": access_token, "refresh_token": refresh_token_str}), 200
+
+@bp.route("/api/auth/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    current_user = get_jwt_identity()
+    data = request.get_json() or {}
+    refresh_token_str = data.get("refresh_token")
+
+    if not refresh_token_str:
+        return jsonify({"msg": "Refresh token required"}), 400
+
+    # The access token used for this request stops working right away
+    claims = get_jwt()
+    access_denylist.add(claims["jti"], claims["exp"])
+
+    if refresh_tokens.revoke(current_user, refresh_token_str):
+        return jsonify({"msg": "Logged out successfully"}), 200
+
+    return jsonify({"msg": "Token not found or already revoked"}), 404
+
+
+@bp.route("/api/auth/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    current_user = get_jwt_identity()
+    # The refresh token used for this request is swapped for a new one
+    presented = request.headers.get(current_app.config['JWT_HEADER_NAME'], '').split()[-1]
+    new_refresh_token = refresh_tokens.rotate(current_user, presented, request.remote_addr,
+                                              request.headers.get('User-Agent'))
+    if new_refresh_token is None:
+        return jsonify({"msg": "Refresh token has been revoked"}), 401
+    access_token = create_access_token(identity=current_user)
+    return jsonify({"access_token": access_token, "refresh_token": new_refresh_token}), 200
+
+@bp.route("/api/auth/me", methods=["GET"])
+@jwt_required()
+def me():
+    user = db.session.get(User, get_jwt_identity())
+    return jsonify({
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "phone_number": user.phone_number
+    })
+
+# ---------------- Google OAuth ----------------
+@bp.route("/api/auth/google/login")
+def google_login():
+    redirect_uri = url_for("auth.google_auth", _external=True)
+    return google.authorize_redirect(redirect_uri)
+
+@bp.route("/api/auth/google/auth")
+def google_auth():
+    try:
+        token = google.authorize_access_token()
+        userinfo = google.parse_id_token(token)
+    except Exception as e:
+        print(f"OAuth error: {e}")
+        return redirect("/login")
+
+    email = userinfo.get("email")
+    user = User.query.filter_by(email=email).first()
+
+    if user is None:
+        user = User(
+            id=str(uuid.uuid4()),
+            username=userinfo.get("name") or email.split("@")[0],
+            email=email,
+            name=userinfo.get("name"),
+            google_id=userinfo.get("sub"),
+            is_oauth=True
+        )
+        db.session.add(user)
+        db.session.commit()
+
+    access_token = create_access_token(identity=user.id)
+    return jsonify({"msg": "Google login successful", "access_token": access_token}), 200
@@ -0,0 +1,200 @@
+from flask import Blueprint, current_app, request, jsonify, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
+from sqlalchemy.orm import defer
+from datetime import datetime
+
+from extensions import db
+from metrics import metrics
+from models import Receipt, BillSplit, ReceiptJob
+from ocr_cache import ocr_cache
+from pagination import CursorError, keyset_page, page_size
+from parse_model import extract_receipt_data
+from receipt_jobs import job_queue, QueueFullError
+from spending import record_receipts, user_stats
+from upload_archive import upload_archive
+from uploads import UploadError, read_upload_stream, decode_image
+
+bp = Blueprint('receipts', __name__)
+
+ALLOWED_MIMETYPES = ['image/jpeg', 'image/png', 'image/webp']
+
+# ---------------- Receipt & Bill Split Endpoints ----------------
+def queue_full_response(retry_after):
+    response = jsonify({'error': 'Receipt queue is full, try again later'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def load_upload(file):
+    """Stream, sniff and decode one uploaded image; raises UploadError"""
+    if file.filename == '':
+        raise UploadError('No file selected', 400)
+    image_bytes, _ = read_upload_stream(file.stream, current_app.config['MAX_IMAGE_BYTES'], ALLOWED_MIMETYPES)
+    image = decode_image(image_bytes, current_app.config['MAX_IMAGE_PIXELS'], current_app.config['IMAGE_DRAFT_LONG_SIDE'])
+    return image_bytes, image
+
+def archive_upload(user_id, image_bytes, image):
+    # OCR runs on the decoded image; keeping the original is a background write
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')
+    return upload_archive.archive(image_bytes, f"receipt_{user_id}_{timestamp}", image.format)
+
+@bp.route('/api/process-receipt', methods=['POST'])
+@jwt_required()
+def process_receipt():
+    user = get_current_user()  # cached UserContext, not a User row
+    async_mode = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+    if async_mode and job_queue.is_full():
+        return queue_full_response(job_queue.retry_after)
+
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image file provided'}), 400
+
+    try:
+        with metrics.stage('decode'):
+            image_bytes, image = load_upload(request.files['image'])
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status
+
+    try:
+        cache_key = ocr_cache.key_for(image)
+        with metrics.stage('archive'):
+            filepath = archive_upload(user.id, image_bytes, image)
+
+        if async_mode:
+            try:
+                job = job_queue.submit(user.id, image, filepath, cache_key=cache_key)
+            except QueueFullError as e:
+                return queue_full_response(e.retry_after)
+            return jsonify({
+                "success": True,
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": url_for('receipts.get_receipt_job', job_id=job.id)
+            }), 202
+
+        cached = ocr_cache.get(cache_key)
+        if cached is not None:
+            result = cached['data']
+        else:
+            with metrics.stage('ocr'):
+                result, text = extract_receipt_data(image, return_text=True)
+            ocr_cache.put(cache_key, result, text)
+
+        receipt = Receipt.from_parsed(user.id, result, filepath, ocr_hash=cache_key)
+        db.session.add(receipt)
+        record_receipts(user.id, [receipt])
+        with metrics.stage('commit'):
+            db.session.commit()
+
+        return jsonify({"success": True, "receipt_id": receipt.id, "data": result, "cached": cached is not None}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bp.route('/api/receipts/batch', methods=['POST'])
+@jwt_required()
+def process_receipt_batch():
+    user = get_current_user()  # cached UserContext, not a User row
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'error': 'No image files provided'}), 400
+    if len(files) > current_app.config['RECEIPT_BATCH_MAX_FILES']:
+        return jsonify({'error': f"At most {current_app.config['RECEIPT_BATCH_MAX_FILES']} images per batch"}), 413
+
+    results = []
+    entries = []  # (result index, decoded image, image path, cache key, cached entry)
+    for index, file in enumerate(files):
+        results.append({'index': index, 'filename': file.filename, 'success': False})
+        try:
+            image_bytes, image = load_upload(file)
+        except UploadError as e:
+            results[index]['error'] = e.message
+            continue
+        cache_key = ocr_cache.key_for(image)
+        filepath = archive_upload(user.id, image_bytes, image)
+        entries.append((index, image, filepath, cache_key, ocr_cache.get(cache_key)))
+
+    # Only cache misses go to the OCR pool, as the decoded images the keys were computed from
+    misses = [entry for entry in entries if entry[4] is None]
+    with metrics.stage('ocr'):
+        outcomes = dict(zip((entry[0] for entry in misses),
+                            job_queue.ocr_many([entry[1] for entry in misses])))
+
+    receipts = []
+    for index, _, filepath, cache_key, cached in entries:
+        if cached is not None:
+            parsed = cached['data']
+        else:
+            outcome = outcomes[index]
+            if isinstance(outcome, Exception):
+                results[index]['error'] = str(outcome)
+                continue
+            parsed, text = outcome
+            ocr_cache.put(cache_key, parsed, text)
+        receipt = Receipt.from_parsed(user.id, parsed, filepath, ocr_hash=cache_key)
+        receipts.append((index, receipt, cached is not None))
+
+    try:
+        db.session.add_all([receipt for _, receipt, _ in receipts])
+        record_receipts(user.id, [receipt for _, receipt, _ in receipts])
+        with metrics.stage('commit'):
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e), "results": results}), 500
+
+    for index, receipt, was_cached in receipts:
+        results[index].update(success=True, receipt_id=receipt.id, cached=was_cached, data=receipt.raw_data)
+
+    succeeded = sum(1 for r in results if r['success'])
+    return jsonify({
+        "success": succeeded > 0,
+        "processed": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }), 200
+
+@bp.route('/api/receipts/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_receipt_job(job_id):
+    job = db.session.get(ReceiptJob, job_id)
+    if not job or job.user_id != get_jwt_identity():
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict(status=job_queue.live_status(job))), 200
+
+# ---------------- History Endpoints ----------------
+def history_page(model):
+    """
+    Newest-first keyset page of the current user's rows of `model`.
+    Its HEAVY_FIELDS are left out (and not even loaded) unless named in
+    ?include=a,b.
+    """
+    include = set(request.args.get('include', '').split(','))
+    exclude = [field for field in model.HEAVY_FIELDS if field not in include]
+    statement = db.select(model).where(model.user_id == get_jwt_identity()).options(
+        *[defer(getattr(model, field)) for field in exclude]
+    )
+    try:
+        rows, next_cursor = keyset_page(db.session, statement, [model.created_at, model.id],
+                                        page_size(request.args.get('limit')), request.args.get('cursor'))
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"items": [row.to_dict(exclude=exclude) for row in rows], "next_cursor": next_cursor}), 200
+
+@bp.route('/api/receipts', methods=['GET'])
+@jwt_required()
+def list_receipts():
+    return history_page(Receipt)
+
+@bp.route('/api/bill-splits', methods=['GET'])
+@jwt_required()
+def list_bill_splits():
+    return history_page(BillSplit)
+
+@bp.route('/api/users/me/stats', methods=['GET'])
+@jwt_required()
+def get_my_stats():
+    months = request.args.get('months', 12, type=int)
+    if not 1 <= months <= 120:
+        return jsonify({"error": "months must be between 1 and 120"}), 400
+    return jsonify(user_stats(get_jwt_identity(), months)), 200
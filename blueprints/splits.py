@@ -0,0 +1,212 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
+import time
+
+from extensions import db
+from metrics import metrics
+from ledger import record_splits, group_balances, settle
+from models import BillSplit
+from split_batch import split_batch, normalize_split_job, SplitJobError
+from split_sessions import split_sessions, apply_split_ops
+
+bp = Blueprint('splits', __name__)
+
+# ---------------- Bill Split Endpoints ----------------
+@bp.route('/api/split-bill', methods=['POST'])
+@jwt_required()
+def split_bill():
+    data = request.get_json()
+    receipt_data = data.get('receipt_data')
+    participants = data.get('participants', [])
+    split_method = data.get('split_method', 'itemized')
+    tax_rate = data.get('tax_rate', 0)
+    tip_percentage = data.get('tip_percentage', 0)
+    group_id = data.get('group_id')
+    paid_by = data.get('paid_by')
+
+    if not receipt_data or not participants:
+        return jsonify({"error": "Missing data"}), 400
+
+    user = get_current_user()  # cached UserContext, not a User row
+    try:
+        from bill_splitting_logic import compute_split
+        with metrics.stage('compute'):
+            result = compute_split(receipt_data, participants, split_method, tax_rate, tip_percentage)
+
+        bill_split = BillSplit(
+            user_id=user.id,
+            receipt_data=receipt_data,
+            participants=participants,
+            split_result=result,
+            split_method=split_method,
+            tax_rate=tax_rate,
+            tip_percentage=tip_percentage,
+            group_id=group_id,
+            paid_by=paid_by
+        )
+        db.session.add(bill_split)
+        record_splits(user.id, [bill_split])
+        with metrics.stage('commit'):
+            db.session.commit()
+
+        return jsonify({"success": True, "split_result": result, "bill_split_id": bill_split.id}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bp.route('/api/split-bill/batch', methods=['POST'])
+@jwt_required()
+def split_bill_batch():
+    data = request.get_json(silent=True) or {}
+    jobs = data.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({"error": "Provide a non-empty 'jobs' array"}), 400
+    if len(jobs) > current_app.config['SPLIT_BATCH_MAX_JOBS']:
+        return jsonify({"error": f"At most {current_app.config['SPLIT_BATCH_MAX_JOBS']} jobs per batch"}), 413
+
+    started = time.perf_counter()
+    user_id = get_jwt_identity()
+    results = [{"index": index, "success": False} for index in range(len(jobs))]
+    valid = []  # (result index, normalized job)
+    for index, job in enumerate(jobs):
+        try:
+            valid.append((index, normalize_split_job(job)))
+        except SplitJobError as e:
+            results[index]["error"] = str(e)
+
+    outcomes = split_batch.compute([job for _, job in valid])
+    computed_at = time.perf_counter()
+
+    saved = []  # (result index, row, split_result, elapsed ms)
+    for (index, job), outcome in zip(valid, outcomes):
+        if isinstance(outcome, Exception):
+            results[index]["error"] = str(outcome)
+            continue
+        result, elapsed_ms = outcome
+        saved.append((index, dict(job, split_result=result), result, elapsed_ms))
+
+    try:
+        ids = split_batch.save(user_id, [row for _, row, _, _ in saved])
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e), "results": results}), 500
+    finished = time.perf_counter()
+
+    for (index, _, result, elapsed_ms), bill_split_id in zip(saved, ids):
+        results[index].update(success=True, bill_split_id=bill_split_id, split_result=result,
+                              elapsed_ms=round(elapsed_ms, 3))
+
+    return jsonify({
+        "success": bool(saved),
+        "processed": len(saved),
+        "failed": len(jobs) - len(saved),
+        "results": results,
+        "timings": {
+            "compute_ms": round((computed_at - started) * 1000, 3),
+            "insert_ms": round((finished - computed_at) * 1000, 3),
+            "total_ms": round((finished - started) * 1000, 3)
+        }
+    }), 200
+
+# ---------------- Group Ledger Endpoints ----------------
+@bp.route('/api/groups/<group_id>/ledger', methods=['GET'])
+@jwt_required()
+def get_group_ledger(group_id):
+    balances = group_balances(get_jwt_identity(), group_id)
+    try:
+        transfers = settle(balances, request.args.get('method', 'auto'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "group_id": group_id,
+        "balances": {name: cents / 100 for name, cents in balances.items()},
+        "transfers": [{"from": debtor, "to": creditor, "amount": cents / 100}
+                      for debtor, creditor, cents in transfers]
+    }), 200
+
+# ---------------- Split Session Endpoints ----------------
+# The client creates a session once, then sends only deltas as the user
+# drags items to people; BillSplitter updates its running totals in place.
+def split_session_response(session, status=200):
+    return jsonify({
+        "success": True,
+        "session_id": session.id,
+        "split_result": session.splitter.calculate_split()
+    }), status
+
+@bp.route('/api/split-sessions', methods=['POST'])
+@jwt_required()
+def create_split_session():
+    from bill_splitting_logic import build_receipt_splitter
+    data = request.get_json() or {}
+    receipt_data = data.get('receipt_data')
+    participants = data.get('participants', [])
+    if not receipt_data or not participants:
+        return jsonify({"error": "Missing data"}), 400
+
+    splitter = build_receipt_splitter(receipt_data, participants,
+                                      data.get('tax_rate', 0), data.get('tip_percentage', 0))
+    session = split_sessions.create(get_jwt_identity(), splitter, receipt_data, participants)
+    with session.lock:
+        return split_session_response(session, 201)
+
+@bp.route('/api/split-sessions/<session_id>', methods=['GET'])
+@jwt_required()
+def get_split_session(session_id):
+    session = split_sessions.get(session_id, get_jwt_identity())
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    with session.lock:
+        return split_session_response(session)
+
+@bp.route('/api/split-sessions/<session_id>', methods=['PATCH'])
+@jwt_required()
+def update_split_session(session_id):
+    session = split_sessions.get(session_id, get_jwt_identity())
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    ops = (request.get_json() or {}).get('ops', [])
+    with session.lock:
+        try:
+            apply_split_ops(session.splitter, ops)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return split_session_response(session)
+
+@bp.route('/api/split-sessions/<session_id>/save', methods=['POST'])
+@jwt_required()
+def save_split_session(session_id):
+    session = split_sessions.get(session_id, get_jwt_identity())
+    if not session:
+        return jsonify({"error": "Session not found"}), 404
+    data = request.get_json(silent=True) or {}
+    with session.lock:
+        splitter = session.splitter
+        try:
+            result = splitter.calculate_split()
+            bill_split = BillSplit(
+                user_id=session.user_id,
+                receipt_data=session.receipt_data,
+                participants=session.participants,
+                split_result=result,
+                split_method='itemized',
+                tax_rate=splitter.tax_rate,
+                tip_percentage=splitter.tip_percentage,
+                group_id=data.get('group_id'),
+                paid_by=data.get('paid_by')
+            )
+            db.session.add(bill_split)
+            record_splits(session.user_id, [bill_split])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 500
+    split_sessions.discard(session_id, session.user_id)
+    return jsonify({"success": True, "split_result": result, "bill_split_id": bill_split.id}), 200
+
+@bp.route('/api/split-sessions/<session_id>', methods=['DELETE'])
+@jwt_required()
+def delete_split_session(session_id):
+    if not split_sessions.discard(session_id, get_jwt_identity()):
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"success": True}), 200
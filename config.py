@@ -1,7 +1,90 @@
 import os
 
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+
+# Applied to every new SQLite connection (see database.py). WAL lets readers
+# run alongside the single writer, busy_timeout makes a writer wait for the
+# lock instead of failing with "database is locked", and synchronous=NORMAL
+# only fsyncs at checkpoints: an app crash loses nothing, a power cut can lose
+# the last few commits.
+SQLITE_TUNED_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # KiB
+}
+
+
+def server_engine_options(database_url):
+    """Pool settings for a networked database; SQLite keeps SQLAlchemy's own pool"""
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": 30,
+        "pool_pre_ping": True,  # drop connections the server closed while idle
+        "pool_recycle": 1800,
+    }
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key")
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt-secret-key")
+
+    # Database tuning: engine options are passed to create_engine, pragmas are
+    # run on each SQLite connection. The base profile uses the defaults.
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLITE_PRAGMAS = {}
+
+    # Uploads: the request body cap is enforced by Flask before parsing,
+    # per-image caps while streaming and decoding each file
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", 64 * 1024 * 1024))
+    MAX_IMAGE_BYTES = int(os.environ.get("MAX_IMAGE_BYTES", 15 * 1024 * 1024))
+    MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", 50_000_000))
+    IMAGE_DRAFT_LONG_SIDE = 2000  # decode large JPEGs at a reduced scale, matches OCR preprocessing
+
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted.
+    # With 0, request.remote_addr is the proxy's address, which would make
+    # every client look local to /metrics and share one login IP limit.
+    PROXY_FIX_X_FOR = int(os.environ.get("PROXY_FIX_X_FOR", 0))
+    # When set, /metrics requires "Authorization: Bearer <token>" instead
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+
+class DevelopmentConfig(Config):
+    SQLITE_PRAGMAS = SQLITE_TUNED_PRAGMAS
+
+
+class ProductionConfig(Config):
+    SQLALCHEMY_ENGINE_OPTIONS = server_engine_options(DATABASE_URL)
+    SQLITE_PRAGMAS = SQLITE_TUNED_PRAGMAS
+
+
+class TestingConfig(Config):
+    TESTING = True
+    # Never the DATABASE_URL database: the test suite drops every table
+    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL", "sqlite://")
+    # Deterministic writes and no lockouts between tests
+    AUDIT_LOG_MODE = "sync"
+    LOGIN_RATE_LIMIT_ENABLED = False
+
+
+PROFILES = {
+    "default": Config,
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+}
+
+
+def get_config(name=None):
+    """Config class for a profile name, by default from the APP_CONFIG environment variable"""
+    name = name or os.environ.get("APP_CONFIG", "default")
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown APP_CONFIG profile {name!r}; expected one of {', '.join(PROFILES)}")
@@ -0,0 +1,48 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db
+
+# Dialect INSERTs that support ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
+
+
+def init_app(app):
+    """
+    Refuse a database upsert() can't write to, then run the profile's
+    SQLITE_PRAGMAS on every new connection of the app's SQLite engine
+    """
+    pragmas = app.config.setdefault('SQLITE_PRAGMAS', {})
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name not in UPSERT_INSERTS:
+        # The ledger and spending aggregates are written with ON CONFLICT DO UPDATE
+        raise ValueError(f"Unsupported database dialect {engine.dialect.name!r}; "
+                         f"expected one of {', '.join(UPSERT_INSERTS)}")
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def upsert(model):
+    """
+    INSERT into `model` for the session's database, ready for
+    .on_conflict_do_update(); both SQLite and PostgreSQL support it
+    """
+    dialect = db.session.get_bind().dialect.name
+    try:
+        return UPSERT_INSERTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f"No upsert for the {dialect} dialect") from None
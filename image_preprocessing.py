@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+
+@dataclass
+class PreprocessOptions:
+    """Knobs for preprocess_for_ocr; every stage can be switched off"""
+    grayscale: bool = True
+    target_dpi: int = 300          # downscale images whose metadata says they are denser
+    max_long_side: int = 2000      # cap for photos without (trustworthy) DPI metadata
+    crop: bool = True
+    crop_margin: int = 8
+    min_crop_fraction: float = 0.1  # ignore "receipts" smaller than this share of the frame
+    deskew: bool = True
+    max_skew_angle: float = 6.0
+    skew_step: float = 0.5
+    threshold: bool = True
+    threshold_radius: int = 12
+    threshold_offset: int = 12
+
+
+DEFAULT_OPTIONS = PreprocessOptions()
+RAW_OPTIONS = PreprocessOptions(grayscale=False, crop=False, deskew=False, threshold=False,
+                                target_dpi=0, max_long_side=0)
+
+
+def preprocess_for_ocr(image, options=None):
+    """
+    Turn a decoded upload into a smaller, binarized image for Tesseract:
+    grayscale -> DPI-aware downscale -> crop to the paper -> deskew -> adaptive threshold
+    """
+    options = options or DEFAULT_OPTIONS
+    if options.grayscale or options.threshold or options.crop or options.deskew:
+        image = image.convert('L')
+    elif image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    image = downscale(image, options.target_dpi, options.max_long_side)
+    if options.crop:
+        image = crop_to_receipt(image, options.crop_margin, options.min_crop_fraction)
+    if options.deskew:
+        image = deskew(image, options.max_skew_angle, options.skew_step)
+    if options.threshold:
+        image = adaptive_threshold(image, options.threshold_radius, options.threshold_offset)
+    return image
+
+
+# -------------------------
+# Stages
+# -------------------------
+def downscale(image, target_dpi=300, max_long_side=2000):
+    """Shrink to target_dpi when the DPI is known, and never past max_long_side"""
+    scale = 1.0
+    dpi = image.info.get('dpi')
+    if target_dpi and dpi and dpi[0]:
+        scale = min(scale, target_dpi / float(dpi[0]))
+    long_side = max(image.size)
+    if max_long_side and long_side > max_long_side:
+        scale = min(scale, max_long_side / long_side)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def otsu_level(gray):
+    """Global threshold that best separates the histogram into two classes"""
+    histogram = gray.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_back = weight_back = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        weight_back += count
+        if weight_back == 0:
+            continue
+        weight_fore = total - weight_back
+        if weight_fore == 0:
+            break
+        sum_back += level * count
+        mean_back = sum_back / weight_back
+        mean_fore = (sum_all - sum_back) / weight_fore
+        variance = weight_back * weight_fore * (mean_back - mean_fore) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def crop_to_receipt(gray, margin=8, min_fraction=0.1):
+    """Crop to the bright paper area; leaves the image alone if nothing plausible is found"""
+    # Work on a small copy, the bounding box only needs to be approximate
+    probe = gray.copy()
+    probe.thumbnail((400, 400))
+    level = otsu_level(probe)
+    mask = probe.point(lambda v: 255 if v > level else 0)
+    # Drop small bright specks so they don't stretch the box
+    mask = mask.filter(ImageFilter.MinFilter(5))
+    bbox = mask.getbbox()
+    if not bbox:
+        return gray
+
+    fraction = ((bbox[2] - bbox[0]) * (bbox[3] - bbox[1])) / float(probe.width * probe.height)
+    if fraction < min_fraction or fraction > 0.98:
+        return gray
+
+    sx, sy = gray.width / probe.width, gray.height / probe.height
+    left = max(0, int(bbox[0] * sx) - margin)
+    top = max(0, int(bbox[1] * sy) - margin)
+    right = min(gray.width, int(bbox[2] * sx) + margin)
+    bottom = min(gray.height, int(bbox[3] * sy) + margin)
+    return gray.crop((left, top, right, bottom))
+
+
+def _row_profile_score(binary):
+    """Text lines aligned with the rows give a spiky row-mean profile"""
+    rows = binary.resize((1, binary.height), Image.Resampling.BOX).tobytes()
+    return sum((a - b) ** 2 for a, b in zip(rows, rows[1:]))
+
+
+def estimate_skew(gray, max_angle=6.0, step=0.5):
+    """Projection-profile search for the rotation that best aligns text lines"""
+    probe = gray.copy()
+    probe.thumbnail((600, 600))
+    # Ink is white here so rotating in black corners adds no fake ink
+    level = 255 - otsu_level(probe)
+    ink = ImageOps.invert(probe).point(lambda v: 255 if v > level else 0)
+
+    best_angle, best_score = 0.0, _row_profile_score(ink)
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        if angle == 0:
+            continue
+        score = _row_profile_score(ink.rotate(angle, resample=Image.Resampling.NEAREST))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def deskew(gray, max_angle=6.0, step=0.5):
+    angle = estimate_skew(gray, max_angle, step)
+    if not angle:
+        return gray
+    return gray.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+
+
+def adaptive_threshold(gray, radius=12, offset=12):
+    """Black where a pixel is darker than its neighbourhood mean by more than offset"""
+    local_mean = gray.filter(ImageFilter.BoxBlur(radius))
+    darker_by = ImageChops.subtract(local_mean, gray)
+    return darker_by.point(lambda v: 0 if v > offset else 255)
@@ -0,0 +1,193 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from bill_splitting_logic import to_cents
+from database import upsert
+from extensions import db
+from models import BillSplit, LedgerBalance
+
+# Above this many non-zero balances the exact solver's 2^n table gets too big
+EXACT_SOLVER_MAX_PARTICIPANTS = 12
+
+Transfer = Tuple[str, str, int]  # (from participant, to participant, cents)
+
+
+def split_contributions(split_result, participants, paid_by=None) -> Dict[str, int]:
+    """
+    Net effect of one BillSplit on a group ledger, in cents.
+
+    The payer (paid_by, else the first participant) fronted everything that
+    was allocated, so they are credited the sum and everyone is debited their
+    own total. The deltas always sum to zero.
+    """
+    owed = defaultdict(int)
+    if split_result and 'participants' in split_result:
+        for participant in split_result['participants']:
+            owed[participant['name']] += to_cents(participant['total'])
+    elif split_result and 'per_person' in split_result:
+        # Even split
+        per_person = to_cents(split_result['per_person'])
+        for name in participants or []:
+            owed[name] += per_person
+
+    payer = paid_by or next(iter(participants or []), None)
+    if payer is None or not owed:
+        return {}
+    deltas = {name: -cents for name, cents in owed.items()}
+    deltas[payer] = deltas.get(payer, 0) + sum(owed.values())
+    return {name: cents for name, cents in deltas.items() if cents}
+
+
+def record_splits(user_id, splits):
+    """
+    Apply new BillSplits (model instances or row dicts) to their groups'
+    running balances in the current transaction; the caller commits.
+    Splits without a group_id are ignored.
+    """
+    by_group = defaultdict(lambda: defaultdict(int))
+    for split in splits:
+        if isinstance(split, BillSplit):
+            split = {'group_id': split.group_id, 'split_result': split.split_result,
+                     'participants': split.participants, 'paid_by': split.paid_by}
+        if not split.get('group_id'):
+            continue
+        deltas = split_contributions(split['split_result'], split['participants'], split.get('paid_by'))
+        for participant, cents in deltas.items():
+            by_group[split['group_id']][participant] += cents
+    for group_id, deltas in by_group.items():
+        apply_deltas(user_id, group_id, deltas)
+
+
+def apply_deltas(user_id, group_id, deltas):
+    """
+    One INSERT ... ON CONFLICT DO UPDATE SET balance_cents = balance_cents +
+    excluded.balance_cents for all names, so concurrent writers neither lose
+    updates nor race each other to insert a group's first row for a name.
+    """
+    if not deltas:
+        return
+    statement = upsert(LedgerBalance)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'group_id', 'participant'],
+        set_={'balance_cents': LedgerBalance.balance_cents + statement.excluded.balance_cents,
+              'updated_at': datetime.utcnow()}
+    )
+    db.session.execute(statement, [
+        {'user_id': user_id, 'group_id': group_id, 'participant': participant, 'balance_cents': cents}
+        for participant, cents in deltas.items()
+    ])
+
+
+def group_balances(user_id, group_id) -> Dict[str, int]:
+    rows = db.session.execute(
+        db.select(LedgerBalance.participant, LedgerBalance.balance_cents)
+        .where(LedgerBalance.user_id == user_id, LedgerBalance.group_id == group_id)
+        .order_by(LedgerBalance.participant)
+    )
+    return {participant: cents for participant, cents in rows}
+
+
+def rebuild_group(user_id, group_id):
+    """Recompute a group's balances from its BillSplit rows, e.g. after a split was deleted"""
+    db.session.execute(db.delete(LedgerBalance).where(LedgerBalance.user_id == user_id,
+                                                      LedgerBalance.group_id == group_id))
+    totals = defaultdict(int)
+    splits = db.session.scalars(db.select(BillSplit).where(BillSplit.user_id == user_id,
+                                                          BillSplit.group_id == group_id))
+    for bill_split in splits:
+        for participant, cents in split_contributions(bill_split.split_result, bill_split.participants,
+                                                      bill_split.paid_by).items():
+            totals[participant] += cents
+    apply_deltas(user_id, group_id, totals)
+
+
+# -------------------------
+# Settlement
+# -------------------------
+def settle_greedy(balances: Dict[str, int]) -> List[Transfer]:
+    """
+    Repeatedly pay the largest creditor from the largest debtor. At most
+    n - 1 transfers; not always the minimum, but O(n log n).
+    """
+    creditors = [(-cents, name) for name, cents in balances.items() if cents > 0]
+    debtors = [(cents, name) for name, cents in balances.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return transfers
+
+
+def settle_exact(balances: Dict[str, int]) -> List[Transfer]:
+    """
+    Minimum number of transfers. A group of k people whose balances sum to
+    zero can always settle in k - 1 transfers, so the minimum is n minus the
+    largest number of disjoint zero-sum groups; a DP over subsets finds that
+    partition and each group is then settled greedily. O(2^n * n).
+    """
+    names = [name for name in sorted(balances) if balances[name]]
+    count = len(names)
+    if count > EXACT_SOLVER_MAX_PARTICIPANTS:
+        raise ValueError(f"Exact settlement supports at most {EXACT_SOLVER_MAX_PARTICIPANTS} people with a balance")
+    if count == 0:
+        return []
+
+    full = (1 << count) - 1
+    sums = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + balances[names[low.bit_length() - 1]]
+
+    # groups[mask]: most zero-sum groups the members of mask can be split into
+    # (the last group only counts once its sum reaches zero)
+    groups = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        best = 0
+        rest = mask
+        while rest:
+            low = rest & -rest
+            best = max(best, groups[mask ^ low])
+            rest ^= low
+        groups[mask] = best + (sums[mask] == 0)
+
+    # Walk back from the full set; members removed between two zero-sum masks form one group
+    transfers = []
+    mask, group = full, {}
+    while mask:
+        rest = mask
+        while rest:
+            low = rest & -rest
+            if groups[mask ^ low] + (sums[mask] == 0) == groups[mask]:
+                break
+            rest ^= low
+        index = low.bit_length() - 1
+        group[names[index]] = balances[names[index]]
+        mask ^= low
+        if sums[mask] == 0:
+            transfers.extend(settle_greedy(group))
+            group = {}
+    return transfers
+
+
+def settle(balances: Dict[str, int], method: str = 'auto') -> List[Transfer]:
+    """method: 'greedy', 'exact', or 'auto' (exact when the group is small enough)"""
+    if method == 'greedy':
+        return settle_greedy(balances)
+    if method == 'exact':
+        return settle_exact(balances)
+    if method != 'auto':
+        raise ValueError(f"Unknown settlement method: {method}")
+    if sum(1 for cents in balances.values() if cents) <= EXACT_SOLVER_MAX_PARTICIPANTS:
+        return settle_exact(balances)
+    return settle_greedy(balances)
@@ -1,3 +1,4 @@
+import click
 from app import app
 from extensions import db
 from flask_migrate import Migrate
@@ -5,10 +6,52 @@ from flask_migrate import Migrate
 # import all your models so Flask-Migrate sees them
 from models import (
     User, Role, Permission, UserRole, RefreshToken, AuthAction, 
-    LoginAttempt, SecurityLog, UserActivity, Receipt, BillSplit
+    LoginAttempt, SecurityLog, UserActivity, Receipt, BillSplit, ReceiptJob, LedgerBalance,
+    SpendingAggregate
 )
 
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, render_as_batch=True)  # SQLite needs batch mode for ALTERs
+
+
+@app.cli.command("rebuild-ledger")
+@click.option("--user-id", default=None, help="Only rebuild this user's groups")
+@click.option("--group-id", default=None, help="Only rebuild this group")
+def rebuild_ledger(user_id, group_id):
+    """Recompute group ledger balances from the stored BillSplits."""
+    from ledger import rebuild_group
+
+    query = db.select(BillSplit.user_id, BillSplit.group_id).where(BillSplit.group_id.isnot(None)).distinct()
+    if user_id:
+        query = query.where(BillSplit.user_id == user_id)
+    if group_id:
+        query = query.where(BillSplit.group_id == group_id)
+    groups = db.session.execute(query).all()
+    for owner_id, owner_group_id in groups:
+        rebuild_group(owner_id, owner_group_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {len(groups)} group ledger(s)")
+
+
+@app.cli.command("rebuild-spending")
+@click.option("--user-id", default=None, help="Only rebuild this user's aggregates")
+def rebuild_spending(user_id):
+    """Backfill per-user spending aggregates from the stored receipts."""
+    from spending import rebuild_user
+
+    user_ids = [user_id] if user_id else db.session.scalars(db.select(Receipt.user_id).distinct()).all()
+    for owner_id in user_ids:
+        rebuild_user(owner_id)
+        db.session.commit()
+    click.echo(f"Rebuilt spending aggregates for {len(user_ids)} user(s)")
+
+
+@app.cli.command("sweep-refresh-tokens")
+def sweep_refresh_tokens():
+    """Delete expired and revoked refresh tokens."""
+    from auth.tokens import refresh_tokens
+
+    click.echo(f"Deleted {refresh_tokens.sweep()} refresh token(s)")
+
 
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,244 @@
+import cProfile
+import hmac
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+
+from extensions import db
+
+PREFIX = 'easysplit'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# An endpoint whose requests land in the high buckets is issuing a query per row
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Request, stage and SQL timings, served as Prometheus text at /metrics
+
+    Each request records its duration and how many queries it ran (and how
+    long they took), labelled by endpoint. Views mark their expensive steps
+    with `metrics.stage(name)`. With PROFILE_EVERY_N_REQUESTS set, every Nth
+    request runs under cProfile and its stats are written to PROFILE_DIR.
+    Component counters (caches, queues, the audit writer) come from the
+    stats() of the registered extensions.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._request_number = 0
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_LOCAL_ONLY', True)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.config.setdefault('PROFILE_EVERY_N_REQUESTS', 0)
+        app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.extensions['metrics'] = self
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_query)
+            event.listen(db.engine, 'after_cursor_execute', self._after_query)
+            event.listen(db.engine, 'handle_error', self._query_failed)
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)  # (endpoint, method, status) -> count
+            self.durations = {}  # endpoint -> Histogram of seconds
+            self.queries = {}  # endpoint -> Histogram of queries per request
+            self.query_seconds = defaultdict(float)  # endpoint -> total seconds in SQL
+            self.stages = defaultdict(lambda: [0, 0.0])  # (endpoint, stage) -> [count, seconds]
+            self.background_queries = 0
+            self.profiles_written = 0
+
+    # -------------------------
+    # Per-request hooks
+    # -------------------------
+    def _start_request(self):
+        if not current_app.config['METRICS_ENABLED']:
+            return
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_seconds = 0.0
+        every = current_app.config['PROFILE_EVERY_N_REQUESTS']
+        if every:
+            with self._lock:
+                self._request_number += 1
+                sample = self._request_number % every == 0
+            # One profiled request at a time; a sample that would overlap is skipped
+            if sample and self._profile_lock.acquire(blocking=False):
+                g.metrics_profiler = cProfile.Profile()
+                g.metrics_profiler.enable()
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            try:
+                self._write_profile(profiler)
+            finally:
+                self._profile_lock.release()
+
+        endpoint = request.endpoint or 'unmatched'
+        # An exception that escaped the view never reached after_request
+        status = 500 if exc is not None else g.pop('metrics_status', 200)
+        with self._lock:
+            self.requests[(endpoint, request.method, status)] += 1
+            self.durations.setdefault(endpoint, Histogram(DURATION_BUCKETS)).observe(elapsed)
+            self.queries.setdefault(endpoint, Histogram(QUERY_BUCKETS)).observe(g.metrics_queries)
+            self.query_seconds[endpoint] += g.metrics_query_seconds
+
+    def _write_profile(self, profiler):
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        name = f"{request.endpoint or 'unmatched'}-{datetime.utcnow():%Y%m%d_%H%M%S_%f}.prof"
+        profiler.dump_stats(os.path.join(directory, name))
+        with self._lock:
+            self.profiles_written += 1
+
+    @contextmanager
+    def stage(self, name):
+        """Time a step of the current request (a no-op outside requests)"""
+        if not has_request_context() or 'metrics_started' not in g:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                totals = self.stages[(request.endpoint or 'unmatched', name)]
+                totals[0] += 1
+                totals[1] += elapsed
+
+    # -------------------------
+    # SQL events
+    # -------------------------
+    def _before_query(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+    def _after_query(self, conn, cursor, statement, parameters, context, executemany):
+        self._query_done(conn)
+
+    def _query_failed(self, exception_context):
+        # A statement that raised never reaches after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('metrics_query_started'):
+            self._query_done(conn)
+
+    def _query_done(self, conn):
+        elapsed = time.perf_counter() - conn.info['metrics_query_started'].pop()
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_queries += 1
+            g.metrics_query_seconds += elapsed
+        else:
+            # Background threads: receipt jobs, the audit log writer, sweepers
+            with self._lock:
+                self.background_queries += 1
+
+    # -------------------------
+    # Exposition
+    # -------------------------
+    def _metrics_view(self):
+        token = current_app.config['METRICS_TOKEN']
+        if token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                abort(404)
+        elif current_app.config['METRICS_LOCAL_ONLY'] and request.remote_addr not in LOCAL_ADDRESSES:
+            # Behind a proxy this is only the client's address with PROXY_FIX_X_FOR set
+            abort(404)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def histogram(name, histograms):
+            for endpoint, hist in sorted(histograms.items()):
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{PREFIX}_{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{PREFIX}_{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {hist.count}')
+                lines.append(f'{PREFIX}_{name}_sum{{endpoint="{endpoint}"}} {hist.sum:.6f}')
+                lines.append(f'{PREFIX}_{name}_count{{endpoint="{endpoint}"}} {hist.count}')
+
+        with self._lock:
+            family('requests_total', 'counter', 'Requests by endpoint, method and status.')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'{PREFIX}_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            family('request_duration_seconds', 'histogram', 'Request wall time.')
+            histogram('request_duration_seconds', self.durations)
+            family('request_queries', 'histogram', 'SQL statements per request.')
+            histogram('request_queries', self.queries)
+            family('request_query_seconds_total', 'counter', 'Time spent in SQL by endpoint.')
+            for endpoint, seconds in sorted(self.query_seconds.items()):
+                lines.append(f'{PREFIX}_request_query_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+            family('stage_seconds', 'summary', 'Time spent in named stages of a request.')
+            for (endpoint, stage), (count, seconds) in sorted(self.stages.items()):
+                labels = f'endpoint="{endpoint}",stage="{stage}"'
+                lines.append(f'{PREFIX}_stage_seconds_sum{{{labels}}} {seconds:.6f}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{{labels}}} {count}')
+            family('background_queries_total', 'counter', 'SQL statements run outside requests.')
+            lines.append(f'{PREFIX}_background_queries_total {self.background_queries}')
+            family('profiles_written_total', 'counter', 'Sampled request profiles written to PROFILE_DIR.')
+            lines.append(f'{PREFIX}_profiles_written_total {self.profiles_written}')
+
+        family('component', 'gauge', 'Counters reported by extensions (caches, queues, writers).')
+        for name, extension in sorted(current_app.extensions.items()):
+            stats = getattr(extension, 'stats', None)
+            if extension is self or not callable(stats):
+                continue
+            for key, value in sorted(stats().items()):
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f'{PREFIX}_component{{component="{name}",stat="{key}"}} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# The current app's metrics
+metrics = LocalProxy(lambda: current_app.extensions['metrics'])
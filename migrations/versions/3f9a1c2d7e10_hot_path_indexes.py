@@ -0,0 +1,54 @@
+"""Hot-path indexes, plus columns added since databases were created with create_all
+
+Revision ID: 3f9a1c2d7e10
+Revises:
+Create Date: 2026-10-16 12:00:00
+
+app.py still runs db.create_all() on start, which creates missing tables but
+never alters existing ones. This first revision brings such a database up to
+date and is safe to run on a fresh one: every step checks what exists.
+Existing databases: `python -m flask --app manage db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7e10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = [
+    ('receipt', sa.Column('ocr_hash', sa.String(length=64), nullable=True)),
+    ('bill_split', sa.Column('group_id', sa.String(length=64), nullable=True)),
+    ('bill_split', sa.Column('paid_by', sa.String(length=100), nullable=True)),
+]
+
+INDEXES = [
+    ('ix_receipt_ocr_hash', 'receipt', ['ocr_hash']),
+    ('ix_refresh_token_user_hash', 'refresh_token', ['user_id', 'token_hash', 'revoked']),
+    ('ix_login_attempt_email_time', 'login_attempt', ['email', 'attempted_at']),
+    ('ix_login_attempt_ip_time', 'login_attempt', ['ip_address', 'attempted_at']),
+    ('ix_receipt_user_created', 'receipt', ['user_id', 'created_at']),
+    ('ix_bill_split_user_created', 'bill_split', ['user_id', 'created_at']),
+    ('ix_bill_split_user_group', 'bill_split', ['user_id', 'group_id']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column in NEW_COLUMNS:
+        if column.name not in {c['name'] for c in inspector.get_columns(table)}:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(column)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    # Only the indexes; dropping the columns would lose data
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,57 @@
+"""Store refresh tokens as SHA-256 digests
+
+Revision ID: 8b2e5d4c1a90
+Revises: 3f9a1c2d7e10
+Create Date: 2026-10-16 15:00:00
+
+token_hash used to hold the raw refresh JWT. Existing rows are rewritten to
+the digest so the tokens already handed out keep working, and the lookup
+index moves to a unique index on the digest alone.
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d4c1a90'
+down_revision = '3f9a1c2d7e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    refresh_token = sa.table('refresh_token', sa.column('token_id', sa.String), sa.column('token_hash', sa.String))
+    rows = bind.execute(
+        sa.select(refresh_token.c.token_id, refresh_token.c.token_hash)
+        .where(sa.func.length(refresh_token.c.token_hash) != 64)
+    ).all()
+    if rows:
+        bind.execute(
+            refresh_token.update()
+            .where(refresh_token.c.token_id == sa.bindparam('b_token_id'))
+            .values(token_hash=sa.bindparam('b_token_hash')),
+            [{'b_token_id': token_id, 'b_token_hash': hashlib.sha256(token.encode()).hexdigest()}
+             for token_id, token in rows]
+        )
+
+    op.drop_index('ix_refresh_token_user_hash', table_name='refresh_token', if_exists=True)
+    with op.batch_alter_table('refresh_token') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=255), type_=sa.String(length=64),
+                              existing_nullable=False)
+    op.create_index('ix_refresh_token_hash', 'refresh_token', ['token_hash'], unique=True, if_not_exists=True)
+    op.create_index('ix_refresh_token_sweep', 'refresh_token', ['revoked', 'expires_at'], if_not_exists=True)
+
+
+def downgrade():
+    # The raw tokens can't be recovered from their digests; only the schema goes back
+    op.drop_index('ix_refresh_token_sweep', table_name='refresh_token', if_exists=True)
+    op.drop_index('ix_refresh_token_hash', table_name='refresh_token', if_exists=True)
+    with op.batch_alter_table('refresh_token') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), type_=sa.String(length=255),
+                              existing_nullable=False)
+    op.create_index('ix_refresh_token_user_hash', 'refresh_token', ['user_id', 'token_hash', 'revoked'],
+                    if_not_exists=True)
@@ -1,6 +1,6 @@
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timezone
+from auth.passwords import password_hasher
+from datetime import datetime
 import uuid
 
 # -------------------------
@@ -46,23 +46,25 @@ class User(db.Model):
     # Password Helpers
     # -------------------------
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
         self.password_changed_at = datetime.utcnow()
 
     def check_password(self, password):
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        # Upgrade hashes made with an older method/cost once we know the password
+        password_hasher.rehash_in_background(self.id, self.password_hash, password)
+        return True
     
     def has_permission(self, resource, action):
-        for role in self.roles:
-            for perm in role.permissions:
-                if perm.resource == resource and perm.action == action:
-                    return True
-        return False
+        from auth.permissions import has_permission
+        return has_permission(self.id, resource, action)
     
     def has_role(self, role_name):
-        return any(role.name == role_name for role in self.roles)
+        from auth.permissions import has_role
+        return has_role(self.id, role_name)
 
 
     def __repr__(self):
@@ -108,9 +110,16 @@ class RolePermission(db.Model):
 # Refresh Token
 # -------------------------
 class RefreshToken(db.Model):
+    # token_hash is the SHA-256 hex digest of the token (see auth/tokens.py);
+    # the sweeper finds revoked and expired rows through ix_refresh_token_sweep
+    __table_args__ = (
+        db.Index('ix_refresh_token_hash', 'token_hash', unique=True),
+        db.Index('ix_refresh_token_sweep', 'revoked', 'expires_at'),
+    )
+
     token_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey("user.id"), nullable=False)
-    token_hash = db.Column(db.String(255), nullable=False)
+    token_hash = db.Column(db.String(64), nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
     revoked = db.Column(db.Boolean, default=False)
     replaced_by = db.Column(db.String(36), nullable=True)
@@ -133,6 +142,12 @@ class AuthAction(db.Model):
 # Login Attempts
 # -------------------------
 class LoginAttempt(db.Model):
+    # Recent attempts per account / per client over a time window
+    __table_args__ = (
+        db.Index('ix_login_attempt_email_time', 'email', 'attempted_at'),
+        db.Index('ix_login_attempt_ip_time', 'ip_address', 'attempted_at'),
+    )
+
     attempt_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey("user.id"), nullable=True)
     email = db.Column(db.String(120), nullable=True)
@@ -168,6 +183,8 @@ class UserActivity(db.Model):
 # -------------------------
 # Receipt Model
 class Receipt(db.Model):
+    __table_args__ = (db.Index('ix_receipt_user_created', 'user_id', 'created_at'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     
@@ -177,24 +194,82 @@ class Receipt(db.Model):
     tax_amount = db.Column(db.Float, nullable=True)
     receipt_date = db.Column(db.String(100), nullable=True)
     raw_data = db.Column(db.JSON, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow())
-    processed_at = db.Column(db.DateTime, default=datetime.utcnow())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, default=datetime.utcnow)
     image_path = db.Column(db.String(500), nullable=True)
+    ocr_hash = db.Column(db.String(64), nullable=True, index=True)  # OCRCache key of the image
 
-    def to_dict(self):
-        return {
+    @classmethod
+    def from_parsed(cls, user_id, result, image_path=None, ocr_hash=None):
+        """Build a Receipt row from the dict returned by extract_receipt_data"""
+        return cls(
+            user_id=user_id,
+            store_name=result.get('store_name', ''),
+            total_amount=float(result.get('total', 0)) if result.get('total') else None,
+            subtotal_amount=float(result.get('subtotal', 0)) if result.get('subtotal') else None,
+            tax_amount=float(result.get('tax', 0)) if result.get('tax') else None,
+            receipt_date=result.get('date', ''),
+            raw_data=result,
+            image_path=image_path,
+            ocr_hash=ocr_hash
+        )
+
+    # Large JSON columns that list endpoints leave out unless asked for
+    HEAVY_FIELDS = ('raw_data',)
+
+    def to_dict(self, exclude=()):
+        data = {
             'id': self.id,
             'store_name': self.store_name,
             'total_amount': self.total_amount,
             'subtotal_amount': self.subtotal_amount,
             'tax_amount': self.tax_amount,
             'receipt_date': self.receipt_date,
-            'raw_data': self.raw_data,
+            'ocr_hash': self.ocr_hash,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None
         }
+        # Excluded fields are never touched, so deferred columns stay unloaded
+        for field in self.HEAVY_FIELDS:
+            if field not in exclude:
+                data[field] = getattr(self, field)
+        return data
+
+# -------------------------
+# Receipt OCR Jobs
+# -------------------------
+class ReceiptJob(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, processing, done, failed
+    image_path = db.Column(db.String(500), nullable=True)
+    receipt_id = db.Column(db.Integer, db.ForeignKey('receipt.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    receipt = db.relationship('Receipt')
+
+    PROGRESS = {'queued': 0, 'processing': 50, 'done': 100, 'failed': 100}
+
+    def to_dict(self, status=None):
+        status = status or self.status
+        return {
+            'job_id': self.id,
+            'status': status,
+            'progress': self.PROGRESS.get(status, 0),
+            'error': self.error,
+            'receipt': self.receipt.to_dict() if self.receipt else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
 
 class BillSplit(db.Model):
+    __table_args__ = (
+        db.Index('ix_bill_split_user_created', 'user_id', 'created_at'),
+        db.Index('ix_bill_split_user_group', 'user_id', 'group_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     
@@ -204,17 +279,55 @@ class BillSplit(db.Model):
     tax_rate = db.Column(db.Float, default=0.0)
     tip_percentage = db.Column(db.Float, default=0.0)
     split_result = db.Column(db.JSON, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow())
+    group_id = db.Column(db.String(64), nullable=True)  # trip/group ledger this split counts towards
+    paid_by = db.Column(db.String(100), nullable=True)  # participant who paid, defaults to the first one
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        return {
+    HEAVY_FIELDS = ('receipt_data', 'split_result')
+
+    def to_dict(self, exclude=()):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
-            'receipt_data': self.receipt_data,
             'participants': self.participants,
             'split_method': self.split_method,
             'tax_rate': self.tax_rate,
             'tip_percentage': self.tip_percentage,
-            'split_result': self.split_result,
+            'group_id': self.group_id,
+            'paid_by': self.paid_by,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        for field in self.HEAVY_FIELDS:
+            if field not in exclude:
+                data[field] = getattr(self, field)
+        return data
+
+# -------------------------
+# Group Ledger
+# -------------------------
+class LedgerBalance(db.Model):
+    """Net balance of one participant in a group, in cents; positive means they are owed money"""
+    __table_args__ = (db.UniqueConstraint('user_id', 'group_id', 'participant'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
+    group_id = db.Column(db.String(64), nullable=False)
+    participant = db.Column(db.String(100), nullable=False)
+    balance_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# -------------------------
+# Spending Aggregates
+# -------------------------
+class SpendingAggregate(db.Model):
+    """Receipt totals per user, calendar month (UTC) and store, kept up to date as receipts are saved"""
+    __table_args__ = (db.UniqueConstraint('user_id', 'month', 'store_name'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    store_name = db.Column(db.String(200), nullable=False, default='')
+    receipt_count = db.Column(db.Integer, nullable=False, default=0)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    tax_cents = db.Column(db.BigInteger, nullable=False, default=0)
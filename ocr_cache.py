@@ -0,0 +1,138 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from parse_model import PARSER_VERSION
+
+
+class OCRCache:
+    """
+    Content-addressed cache of OCR results
+
+    Keys are a SHA-256 of the decoded (RGB) pixel data plus PARSER_VERSION,
+    so re-uploading the same photo skips Tesseract entirely. Entries hold
+    the parsed dict and the raw OCR text. The in-memory tier is an LRU;
+    setting OCR_CACHE_DIR adds a JSON-file tier that survives restarts.
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('OCR_CACHE_SIZE', 256)
+        disk_dir = app.config.setdefault('OCR_CACHE_DIR', None)
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        app.extensions['ocr_cache'] = self
+
+    @staticmethod
+    def key_for(image):
+        """Hash a decoded PIL image so different encodings of it share a key"""
+        image = image.convert('RGB')
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}:{image.width}x{image.height}:".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    # -------------------------
+    # Lookup / store
+    # -------------------------
+    def get(self, key):
+        """Return {'data', 'text'} for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry)
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, entry)
+        return copy.deepcopy(entry)
+
+    def put(self, key, data, text):
+        entry = {'data': copy.deepcopy(data), 'text': text}
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > current_app.config['OCR_CACHE_SIZE']:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+    def stats(self):
+        config = current_app.config
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': config['OCR_CACHE_SIZE'],
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'disk_enabled': bool(config['OCR_CACHE_DIR'])
+            }
+
+    # -------------------------
+    # Disk tier
+    # -------------------------
+    @staticmethod
+    def _disk_path(disk_dir, key):
+        return os.path.join(disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        disk_dir = current_app.config['OCR_CACHE_DIR']
+        if not disk_dir:
+            return None
+        try:
+            with open(self._disk_path(disk_dir, key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        disk_dir = current_app.config['OCR_CACHE_DIR']
+        if not disk_dir:
+            return
+        path = self._disk_path(disk_dir, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # the disk tier is best effort
+
+
+# The current app's cache
+ocr_cache = LocalProxy(lambda: current_app.extensions['ocr_cache'])
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    """A page cursor that wasn't issued by us or no longer matches the sort"""
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Cursor -> sort key values typed like `columns`"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise CursorError('Invalid cursor')
+    try:
+        return [datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                for column, value in zip(columns, values)]
+    except (TypeError, ValueError):
+        raise CursorError('Invalid cursor')
+
+
+def page_size(value):
+    """The ?limit= argument clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def keyset_page(session, statement, columns, limit, cursor=None, descending=True):
+    """
+    One page of `statement` ordered by `columns` (which must end in a unique
+    column), continuing after `cursor`.
+
+    The page starts with a row-value comparison on the sort key instead of an
+    OFFSET, so with an index on the key every page costs the same however deep
+    it is. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, columns))
+        statement = statement.where(key < after if descending else key > after)
+    statement = statement.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    rows = session.scalars(statement.limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column in columns])
@@ -1,107 +1,140 @@
-import pytesseract
+import io
 from PIL import Image
 import re
+from image_preprocessing import preprocess_for_ocr
 
-def extract_receipt_data(image_path):
+# Bump whenever OCR or parse_receipt_text changes its output, so cached
+# OCR results produced by the old pipeline are not reused.
+PARSER_VERSION = '2'
+
+def load_image(source):
+    """Accept a PIL image, raw bytes, a file-like object or a path"""
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+# Step 1: Extract text from image
+def quick_receipt_read(source, preprocess=None):
     """
-    Complete receipt processing: OCR + parsing
-    Returns structured JSON data from receipt image
+    OCR a receipt image (anything load_image accepts). `preprocess` takes
+    PreprocessOptions; None uses the defaults and False sends the image to
+    Tesseract untouched.
     """
-    # Step 1: Extract text from image
-    def quick_receipt_read(image_path):
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
-        return text
-
-    # Step 2: Parse text into structured data
-    def parse_receipt_text(text):
-        lines = text.split('\n')
-        parsed_data = {
-            'store_name': '',
-            'items': [],
-            'subtotal': '',
-            'total': '',
-            'tax': '',
-            'date': '',
-            'cashier': ''
-        }
-        
-        # Clean the text first
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 1:  # Remove empty/short lines
-                cleaned_lines.append(line)
-        
-        # Extract store name (look for store names in first few lines)
-        store_keywords = ['STORE', 'MARKET', 'SHOP', 'GROCERY', 'SUPER', 'MART', 'FOOD', 'SAVE']
-        for i, line in enumerate(cleaned_lines[:5]):
-            # Look for lines that are likely store names (not prices, not too short)
-            if (len(line) > 2 and len(line) < 50 and 
-                not re.search(r'\d+\.\d{2}', line) and  # No prices
-                any(keyword in line.upper() for keyword in store_keywords) or
-                (re.search(r'[A-Z][a-z]+', line) and not re.search(r'\d', line))):  # Proper capitalization, no numbers
-                parsed_data['store_name'] = line
-                break
-        
-        # Extract total (look for TOTAL line)
-        for i, line in enumerate(cleaned_lines):
-            if 'TOTAL' in line.upper():
-                # Find amounts in the TOTAL line
-                amounts = re.findall(r'[0-9]+\.[0-9]{2}|[0-9]+', line)
-                if amounts:
-                    parsed_data['total'] = amounts[-1]
-        
-        # Extract subtotal
-        for i, line in enumerate(cleaned_lines):
-            if 'SUBTOTAL' in line.upper():
-                amounts = re.findall(r'[0-9]+\.[0-9]{2}|[0-9]+', line)
-                if amounts:
-                    parsed_data['subtotal'] = amounts[-1]
-        
-        # Extract items - be more selective
-        for i, line in enumerate(cleaned_lines):
-            line_upper = line.upper()
-            
-            # Skip lines that are clearly not items
-            skip_words = ['TOTAL', 'SUBTOTAL', 'TAX', 'CASH', 'CHANGE', 'ITEMS SOLD', 'DISCOUNT', 'RP', 'T#', 'OPEN', 'HOURS']
-            if any(skip_word in line_upper for skip_word in skip_words):
-                continue
-            
-            # Look for actual product names (not random text)
-            if (re.search(r'[A-Za-z]{3,}', line) and  # At least 3 letters
-                not re.search(r'[0-9]{5,}', line) and  # Not long number sequences
-                len(line) > 3 and len(line) < 50):     # Reasonable length
-                
-                # Check if this line or next line has a price
-                prices = re.findall(r'[0-9]+\.[0-9]{2}', line)
-                if prices and float(prices[0]) < 100:  # Reasonable price
-                    item_name = re.sub(r'[0-9]+\.[0-9]{2}', '', line).strip()
-                    if len(item_name) > 2:  # Valid item name
-                        parsed_data['items'].append({
-                            'name': item_name,
-                            'price': prices[0]
-                        })
-                else:
-                    # Check next line for price
-                    if i + 1 < len(cleaned_lines):
-                        next_prices = re.findall(r'[0-9]+\.[0-9]{2}', cleaned_lines[i + 1])
-                        if next_prices and float(next_prices[0]) < 100:
-                            parsed_data['items'].append({
-                                'name': line,
-                                'price': next_prices[0]
-                            })
-        
-        # Extract tax
-        for i, line in enumerate(cleaned_lines):
-            if 'TAX' in line.upper():
-                amounts = re.findall(r'[0-9]+\.[0-9]{2}|[0-9]+', line)
+    # Imported here so only processes that actually OCR load the Tesseract bindings
+    import pytesseract
+
+    image = load_image(source)
+    if preprocess is not False:
+        image = preprocess_for_ocr(image, preprocess)
+    text = pytesseract.image_to_string(image)
+    return text
+
+# Step 2: Parse text into structured data
+# Patterns are compiled once; each line is upper-cased, regex-scanned and
+# labelled a single time (header, item, subtotal, tax, total, noise).
+PRICE_RE = re.compile(r'[0-9]+\.[0-9]{2}')
+AMOUNT_RE = re.compile(r'[0-9]+\.[0-9]{2}|[0-9]+')
+STORE_PRICE_RE = re.compile(r'\d+\.\d{2}')
+STORE_KEYWORD_RE = re.compile(r'STORE|MARKET|SHOP|GROCERY|SUPER|MART|FOOD|SAVE')
+PROPER_WORD_RE = re.compile(r'[A-Z][a-z]+')
+DIGIT_RE = re.compile(r'\d')
+SKIP_RE = re.compile(r'TOTAL|SUBTOTAL|TAX|CASH|CHANGE|ITEMS SOLD|DISCOUNT|RP|T#|OPEN|HOURS')
+WORD_RE = re.compile(r'[A-Za-z]{3,}')
+LONG_NUMBER_RE = re.compile(r'[0-9]{5,}')
+STORE_NAME_LINES = 5
+MAX_ITEM_PRICE = 100
+
+
+def _is_store_name(line, upper):
+    # Look for lines that are likely store names (not prices, not too short)
+    return ((2 < len(line) < 50 and
+             not STORE_PRICE_RE.search(line) and  # No prices
+             STORE_KEYWORD_RE.search(upper)) or
+            (PROPER_WORD_RE.search(line) and not DIGIT_RE.search(line)))  # Proper capitalization, no numbers
+
+
+def classify_receipt_lines(text):
+    """
+    Single pass over the OCR text.
+    Returns (parsed_data, labels) where labels is a list of (label, line).
+    """
+    parsed_data = {
+        'store_name': '',
+        'items': [],
+        'subtotal': '',
+        'total': '',
+        'tax': '',
+        'date': '',
+        'cashier': ''
+    }
+    labels = []
+    items = parsed_data['items']
+    pending = None  # index in labels of a name line waiting for a price on the next line
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if len(line) <= 1:  # Remove empty/short lines
+            continue
+        upper = line.upper()
+        prices = PRICE_RE.findall(line)
+        label = 'noise'
+
+        # A price on this line completes the item name from the previous line
+        if pending is not None:
+            if prices and float(prices[0]) < MAX_ITEM_PRICE:
+                name = labels[pending][1]
+                items.append({'name': name, 'price': prices[0]})
+                labels[pending] = ('item', name)
+            pending = None
+
+        if not parsed_data['store_name'] and len(labels) < STORE_NAME_LINES and _is_store_name(line, upper):
+            parsed_data['store_name'] = line
+            label = 'header'
+
+        if SKIP_RE.search(upper):
+            # Totals lines; the last matching line wins, as SUBTOTAL also counts as a TOTAL line
+            is_total, is_tax = 'TOTAL' in upper, 'TAX' in upper
+            if is_total or is_tax:
+                amounts = AMOUNT_RE.findall(line)
                 if amounts:
-                    parsed_data['tax'] = amounts[-1]
-        
-        return parsed_data
+                    if is_total:
+                        parsed_data['total'] = amounts[-1]
+                        label = 'total'
+                    if is_tax:
+                        parsed_data['tax'] = amounts[-1]
+                        label = 'tax'
+                    if 'SUBTOTAL' in upper:
+                        parsed_data['subtotal'] = amounts[-1]
+                        label = 'subtotal'
+        elif (3 < len(line) < 50 and WORD_RE.search(line) and  # At least 3 letters, reasonable length
+              not LONG_NUMBER_RE.search(line)):                # Not long number sequences
+            if prices and float(prices[0]) < MAX_ITEM_PRICE:
+                item_name = PRICE_RE.sub('', line).strip()
+                if len(item_name) > 2:  # Valid item name
+                    items.append({'name': item_name, 'price': prices[0]})
+                    label = 'item'
+            else:
+                pending = len(labels)
+
+        labels.append((label, line))
+
+    return parsed_data, labels
 
-    # Execute the pipeline
-    text = quick_receipt_read(image_path)
+
+def parse_receipt_text(text):
+    return classify_receipt_lines(text)[0]
+
+def extract_receipt_data(source, return_text=False, preprocess=None):
+    """
+    Complete receipt processing: OCR + parsing
+    `source` is a PIL image, image bytes, a file-like object or a path.
+    Returns structured JSON data from receipt image
+    (and the raw OCR text as well when return_text is set)
+    """
+    text = quick_receipt_read(source, preprocess)
     result = parse_receipt_text(text)
-    return result
\ No newline at end of file
+    if return_text:
+        return result, text
+    return result
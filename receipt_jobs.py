@@ -0,0 +1,235 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from extensions import db
+from models import Receipt, ReceiptJob
+from ocr_cache import ocr_cache
+from spending import record_receipts
+from parse_model import extract_receipt_data
+
+# Pool workers start from a clean interpreter: forking this multi-threaded
+# server could hand them locks held by some other thread at fork time
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+class QueueFullError(Exception):
+    """Raised when no more receipt jobs can be accepted right now"""
+
+    def __init__(self, retry_after):
+        super().__init__("Receipt job queue is full")
+        self.retry_after = retry_after
+
+
+def run_ocr_job(image):
+    """
+    Worker entry point: OCR + parsing inside a pool process. `image` is the
+    upload as decode_image left it (size-checked, drafted), so the worker
+    never decodes the original at full resolution.
+    """
+    try:
+        return extract_receipt_data(image, return_text=True)
+    except Exception as e:
+        # Some pytesseract errors can't be pickled back to the parent and
+        # would break the whole pool, so only the message crosses over.
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class ReceiptJobQueue:
+    """
+    Bounded OCR worker pool for /api/process-receipt?async=true
+
+    Job state lives in the ReceiptJob table so the status endpoint works
+    from any request; the futures themselves are only tracked in-process.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._batch_executor = None
+        self._pending = {}  # job_id -> Future (None while the row is being created)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RECEIPT_JOB_EXECUTOR', 'process')
+        app.config.setdefault('RECEIPT_JOB_WORKERS', min(os.cpu_count() or 1, 4))
+        app.config.setdefault('RECEIPT_BATCH_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('RECEIPT_JOB_MAX_PENDING', 32)
+        app.config.setdefault('RECEIPT_JOB_RETRY_AFTER', 5)
+        app.extensions['receipt_jobs'] = self
+
+    # -------------------------
+    # Queue state
+    # -------------------------
+    @property
+    def retry_after(self):
+        return current_app.config['RECEIPT_JOB_RETRY_AFTER']
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def is_full(self):
+        return self.pending_count >= current_app.config['RECEIPT_JOB_MAX_PENDING']
+
+    def stats(self):
+        return {'pending': self.pending_count, 'max_pending': current_app.config['RECEIPT_JOB_MAX_PENDING']}
+
+    def _new_executor(self, workers):
+        if current_app.config['RECEIPT_JOB_EXECUTOR'] == 'thread':
+            return ThreadPoolExecutor(max_workers=workers)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor(current_app.config['RECEIPT_JOB_WORKERS'])
+            return self._executor
+
+    def _discard_broken(self, attr, executor):
+        """Replace a pool that lost a worker, cancelling whatever it still had queued"""
+        with self._lock:
+            if getattr(self, attr) is executor:
+                setattr(self, attr, None)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait=True):
+        for executor in (self._executor, self._batch_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        self._executor = self._batch_executor = None
+
+    # -------------------------
+    # Submit / finish
+    # -------------------------
+    def submit(self, user_id, image, image_path=None, cache_key=None):
+        """
+        Queue a decoded upload for OCR; raises QueueFullError when saturated.
+        A cache hit on cache_key (ocr_cache.key_for(image)) completes the job immediately.
+        """
+        job_id = str(uuid.uuid4())
+        cached = ocr_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            receipt = Receipt.from_parsed(user_id, cached['data'], image_path, ocr_hash=cache_key)
+            db.session.add(receipt)
+            record_receipts(user_id, [receipt])
+            db.session.flush()
+            job = ReceiptJob(id=job_id, user_id=user_id, status='done', image_path=image_path,
+                             receipt_id=receipt.id, finished_at=datetime.utcnow())
+            db.session.add(job)
+            db.session.commit()
+            return job
+
+        with self._lock:
+            if len(self._pending) >= current_app.config['RECEIPT_JOB_MAX_PENDING']:
+                raise QueueFullError(self.retry_after)
+            self._pending[job_id] = None  # reserve the slot
+
+        try:
+            job = ReceiptJob(id=job_id, user_id=user_id, status='queued', image_path=image_path)
+            db.session.add(job)
+            db.session.commit()
+            executor = self._get_executor()
+            future = executor.submit(run_ocr_job, image)
+        except Exception:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            raise
+
+        with self._lock:
+            self._pending[job_id] = future
+        # The callback thread has no app context of its own
+        app = current_app._get_current_object()
+        future.add_done_callback(lambda f: self._finish(app, job_id, user_id, image_path, cache_key, f, executor))
+        return job
+
+    def _finish(self, app, job_id, user_id, image_path, cache_key, future, executor):
+        """Store the OCR result in `app`; runs on the executor's callback thread"""
+        with app.app_context():
+            try:
+                job = db.session.get(ReceiptJob, job_id)
+                exc = future.exception()
+                if exc is None:
+                    result, text = future.result()
+                    if cache_key:
+                        ocr_cache.put(cache_key, result, text)
+                    receipt = Receipt.from_parsed(user_id, result, image_path, ocr_hash=cache_key)
+                    db.session.add(receipt)
+                    record_receipts(user_id, [receipt])
+                    db.session.flush()
+                    job.receipt_id = receipt.id
+                    job.status = 'done'
+                else:
+                    if isinstance(exc, BrokenProcessPool):
+                        self._discard_broken('_executor', executor)
+                    job.status = 'failed'
+                    job.error = str(exc)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.exception("Could not store the result of receipt job %s", job_id)
+                self._mark_failed(job_id, f"{type(e).__name__}: {e}")
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._pending.pop(job_id, None)
+
+    def _mark_failed(self, job_id, error):
+        """Record a job as failed in its own transaction, so it never stays queued"""
+        try:
+            db.session.execute(
+                db.update(ReceiptJob).where(ReceiptJob.id == job_id)
+                .values(status='failed', error=error, finished_at=datetime.utcnow())
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Could not mark receipt job %s as failed", job_id)
+
+    # -------------------------
+    # Batch uploads
+    # -------------------------
+    def ocr_many(self, images):
+        """
+        OCR several decoded uploads at once on a pool sized to the CPU count.
+        Returns one (result, text) tuple or Exception per image, in order.
+        """
+        with self._lock:
+            if self._batch_executor is None:
+                self._batch_executor = self._new_executor(current_app.config['RECEIPT_BATCH_WORKERS'])
+            executor = self._batch_executor
+        futures = [executor.submit(run_ocr_job, image) for image in images]
+
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except BrokenProcessPool as e:
+                self._discard_broken('_batch_executor', executor)
+                outcomes.append(e)
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def live_status(self, job):
+        """Row status, upgraded to 'processing' once a worker picked the job up"""
+        with self._lock:
+            future = self._pending.get(job.id)
+        if job.status == 'queued' and future is not None and future.running():
+            return 'processing'
+        return job.status
+
+
+# The current app's queue
+job_queue = LocalProxy(lambda: current_app.extensions['receipt_jobs'])
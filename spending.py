@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func
+
+from bill_splitting_logic import to_cents
+from database import upsert
+from extensions import db
+from models import Receipt, SpendingAggregate
+
+TOP_STORES = 10
+
+
+def _bucket(created_at, store_name):
+    """(month, store) a receipt is counted under"""
+    return created_at.strftime('%Y-%m'), (store_name or '').strip()[:200]
+
+
+def _add(deltas, created_at, store_name, total_amount, tax_amount):
+    delta = deltas[_bucket(created_at, store_name)]
+    delta[0] += 1
+    delta[1] += to_cents(total_amount or 0)
+    delta[2] += to_cents(tax_amount or 0)
+
+
+def record_receipts(user_id, receipts):
+    """
+    Add new Receipt rows to the user's spending aggregates in the current
+    transaction; the caller commits. One upsert covers every (month, store)
+    touched, creating buckets that don't exist yet.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])  # (month, store) -> [count, total cents, tax cents]
+    for receipt in receipts:
+        if receipt.created_at is None:
+            # Pin the timestamp now so a later rebuild puts it in the same month
+            receipt.created_at = datetime.utcnow()
+        _add(deltas, receipt.created_at, receipt.store_name, receipt.total_amount, receipt.tax_amount)
+    apply_deltas(user_id, deltas)
+
+
+def apply_deltas(user_id, deltas):
+    """
+    Add the deltas with one INSERT ... ON CONFLICT DO UPDATE keyed on
+    (user_id, month, store_name), so two requests creating the same bucket
+    don't collide on the unique constraint
+    """
+    if not deltas:
+        return
+    statement = upsert(SpendingAggregate)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'month', 'store_name'],
+        set_={'receipt_count': SpendingAggregate.receipt_count + statement.excluded.receipt_count,
+              'total_cents': SpendingAggregate.total_cents + statement.excluded.total_cents,
+              'tax_cents': SpendingAggregate.tax_cents + statement.excluded.tax_cents}
+    )
+    db.session.execute(statement, [
+        {'user_id': user_id, 'month': month, 'store_name': store,
+         'receipt_count': count, 'total_cents': total_cents, 'tax_cents': tax_cents}
+        for (month, store), (count, total_cents, tax_cents) in deltas.items()
+    ])
+
+
+def rebuild_user(user_id):
+    """Recompute a user's aggregates from their Receipt rows (backfill / repair)"""
+    db.session.execute(db.delete(SpendingAggregate).where(SpendingAggregate.user_id == user_id))
+    deltas = defaultdict(lambda: [0, 0, 0])
+    rows = db.session.execute(
+        db.select(Receipt.created_at, Receipt.store_name, Receipt.total_amount, Receipt.tax_amount)
+        .where(Receipt.user_id == user_id)
+        .execution_options(yield_per=1000)
+    )
+    for created_at, store_name, total_amount, tax_amount in rows:
+        _add(deltas, created_at or datetime.utcnow(), store_name, total_amount, tax_amount)
+    apply_deltas(user_id, deltas)
+
+
+def user_stats(user_id, months=12):
+    """Monthly spend for the last `months` months with data, top stores and overall totals"""
+    owner = SpendingAggregate.user_id == user_id
+    monthly = db.session.execute(
+        db.select(SpendingAggregate.month,
+                  func.sum(SpendingAggregate.receipt_count),
+                  func.sum(SpendingAggregate.total_cents),
+                  func.sum(SpendingAggregate.tax_cents))
+        .where(owner)
+        .group_by(SpendingAggregate.month)
+        .order_by(SpendingAggregate.month.desc())
+        .limit(months)
+    ).all()
+    stores = db.session.execute(
+        db.select(SpendingAggregate.store_name,
+                  func.sum(SpendingAggregate.receipt_count),
+                  func.sum(SpendingAggregate.total_cents).label('total'))
+        .where(owner, SpendingAggregate.store_name != '')
+        .group_by(SpendingAggregate.store_name)
+        .order_by(db.desc('total'), SpendingAggregate.store_name)
+        .limit(TOP_STORES)
+    ).all()
+    count, total, tax = db.session.execute(
+        db.select(func.coalesce(func.sum(SpendingAggregate.receipt_count), 0),
+                  func.coalesce(func.sum(SpendingAggregate.total_cents), 0),
+                  func.coalesce(func.sum(SpendingAggregate.tax_cents), 0))
+        .where(owner)
+    ).one()
+
+    return {
+        'totals': {'receipt_count': count, 'total_amount': total / 100, 'tax_amount': tax / 100},
+        'monthly': [
+            {'month': month, 'receipt_count': month_count, 'total_amount': month_total / 100,
+             'tax_amount': month_tax / 100}
+            for month, month_count, month_total, month_tax in reversed(monthly)
+        ],
+        'top_stores': [
+            {'store_name': store, 'receipt_count': store_count, 'total_amount': store_total / 100}
+            for store, store_count, store_total in stores
+        ]
+    }
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from sqlalchemy import insert
+from werkzeug.local import LocalProxy
+
+from bill_splitting_logic import compute_split
+from extensions import db
+from ledger import record_splits
+from models import BillSplit
+
+SPLIT_METHODS = ('itemized', 'even')
+
+# Fresh worker interpreters rather than forks of the multi-threaded server
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+class SplitJobError(ValueError):
+    """A split job in a batch that can't be run as given"""
+
+
+def normalize_split_job(job):
+    """Validate one job from the request body; returns the BillSplit column values"""
+    if not isinstance(job, dict):
+        raise SplitJobError("Each job must be an object")
+    receipt_data = job.get('receipt_data')
+    participants = job.get('participants') or []
+    if not receipt_data or not participants:
+        raise SplitJobError("Missing data")
+    split_method = job.get('split_method', 'itemized')
+    if split_method not in SPLIT_METHODS:
+        raise SplitJobError(f"Unknown split_method: {split_method}")
+    return {
+        'receipt_data': receipt_data,
+        'participants': participants,
+        'split_method': split_method,
+        'tax_rate': job.get('tax_rate', 0),
+        'tip_percentage': job.get('tip_percentage', 0),
+        'group_id': job.get('group_id'),
+        'paid_by': job.get('paid_by'),
+    }
+
+
+def run_split_job(job):
+    """
+    Worker entry point: one normalized job -> (split_result, elapsed_ms).
+    Errors come back as RuntimeError so they always pickle across processes.
+    """
+    start = time.perf_counter()
+    try:
+        result = compute_split(job['receipt_data'], job['participants'], job['split_method'],
+                               job['tax_rate'], job['tip_percentage'])
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _run_chunk(jobs):
+    """Run several jobs in one worker round trip; failures are returned, not raised"""
+    outcomes = []
+    for job in jobs:
+        try:
+            outcomes.append(run_split_job(job))
+        except RuntimeError as e:
+            outcomes.append(e)
+    return outcomes
+
+
+class SplitBatchRunner:
+    """
+    Runs the jobs of /api/split-bill/batch and bulk-inserts their BillSplit rows
+
+    Small batches are computed inline, since a split takes well under a
+    millisecond; from SPLIT_BATCH_PARALLEL_THRESHOLD jobs up they are sent
+    to a worker pool in chunks so the pickling cost is paid per chunk.
+    With a single worker the pool would only add overhead, so it is skipped.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SPLIT_BATCH_MAX_JOBS', 1000)
+        app.config.setdefault('SPLIT_BATCH_PARALLEL_THRESHOLD', 200)
+        app.config.setdefault('SPLIT_BATCH_EXECUTOR', 'process')
+        app.config.setdefault('SPLIT_BATCH_WORKERS', os.cpu_count() or 1)
+        app.extensions['split_batch'] = self
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                workers = current_app.config['SPLIT_BATCH_WORKERS']
+                if current_app.config['SPLIT_BATCH_EXECUTOR'] == 'thread':
+                    self._executor = ThreadPoolExecutor(max_workers=workers)
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT)
+            return self._executor
+
+    def _discard_broken(self, executor):
+        """Replace a pool that lost a worker, cancelling whatever it still had queued"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def compute(self, jobs):
+        """One (split_result, elapsed_ms) tuple or Exception per normalized job, in order"""
+        workers = current_app.config['SPLIT_BATCH_WORKERS']
+        if workers <= 1 or len(jobs) < current_app.config['SPLIT_BATCH_PARALLEL_THRESHOLD']:
+            return _run_chunk(jobs)
+
+        executor = self._get_executor()
+        chunk_size = max(1, -(-len(jobs) // (workers * 4)))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+
+        outcomes = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                outcomes.extend(future.result())
+            except BrokenProcessPool as e:
+                self._discard_broken(executor)
+                outcomes.extend([e] * len(chunk))
+        return outcomes
+
+    def save(self, user_id, rows):
+        """
+        Insert all BillSplit rows with one executemany, fold them into their
+        group ledgers, and return their ids in the order given. Commits the session.
+        """
+        if not rows:
+            return []
+        statement = insert(BillSplit).returning(BillSplit.id, sort_by_parameter_order=True)
+        ids = db.session.scalars(statement, [dict(row, user_id=user_id) for row in rows]).all()
+        record_splits(user_id, rows)
+        db.session.commit()
+        return ids
+
+
+# The current app's runner
+split_batch = LocalProxy(lambda: current_app.extensions['split_batch'])
@@ -0,0 +1,129 @@
+import threading
+import time
+import uuid
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+
+class SplitSession:
+    """A BillSplitter kept on the server while the user drags items around"""
+
+    def __init__(self, user_id, splitter, receipt_data, participants):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.splitter = splitter
+        self.receipt_data = receipt_data
+        self.participants = participants
+        self.lock = threading.Lock()
+        self.touched_at = time.monotonic()
+
+
+class SplitSessionStore:
+    """
+    In-process store of split sessions with idle expiry
+
+    Sessions live in the worker that created them, so deployments with
+    several workers need sticky routing for /api/split-sessions. A user at
+    max_per_user loses their own least recently used session first, so
+    one user opening sessions in a loop can't evict everyone else's.
+    """
+
+    def __init__(self, app=None):
+        self._sessions = {}
+        self._by_user = {}  # user_id -> {session_id: SplitSession}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SPLIT_SESSION_TTL', 1800)
+        app.config.setdefault('SPLIT_SESSION_MAX', 1000)
+        app.config.setdefault('SPLIT_SESSION_MAX_PER_USER', 10)
+        app.extensions['split_sessions'] = self
+
+    def create(self, user_id, splitter, receipt_data, participants):
+        session = SplitSession(user_id, splitter, receipt_data, participants)
+        config = current_app.config
+        with self._lock:
+            self._evict_expired()
+            own = self._by_user.get(user_id, {})
+            if len(own) >= config['SPLIT_SESSION_MAX_PER_USER']:
+                self._remove(min(own.values(), key=lambda s: s.touched_at))
+            if len(self._sessions) >= config['SPLIT_SESSION_MAX']:
+                # Drop the least recently used session to make room
+                self._remove(min(self._sessions.values(), key=lambda s: s.touched_at))
+            self._sessions[session.id] = session
+            self._by_user.setdefault(user_id, {})[session.id] = session
+        return session
+
+    def get(self, session_id, user_id):
+        ttl_seconds = current_app.config['SPLIT_SESSION_TTL']
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.user_id != user_id:
+                return None
+            if time.monotonic() - session.touched_at > ttl_seconds:
+                self._remove(session)
+                return None
+            session.touched_at = time.monotonic()
+            return session
+
+    def discard(self, session_id, user_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and session.user_id == user_id:
+                self._remove(session)
+                return True
+        return False
+
+    def _remove(self, session):
+        del self._sessions[session.id]
+        own = self._by_user[session.user_id]
+        del own[session.id]
+        if not own:
+            del self._by_user[session.user_id]
+
+    def _evict_expired(self):
+        now, ttl_seconds = time.monotonic(), current_app.config['SPLIT_SESSION_TTL']
+        for session in [s for s in self._sessions.values() if now - s.touched_at > ttl_seconds]:
+            self._remove(session)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {'active': len(self._sessions), 'max_sessions': current_app.config['SPLIT_SESSION_MAX']}
+
+
+def apply_split_ops(splitter, ops):
+    """
+    Apply a list of deltas from the client to a BillSplitter:
+      {"op": "assign", "item_id": 1, "participant_id": 2, "share": 0.5}
+      {"op": "unassign", "item_id": 1, "participant_id": 2}
+      {"op": "add_item", "name": "Fries", "price": 4.5, "participants": [1, 2]}
+      {"op": "set_tax_tip", "tax_rate": 8.875, "tip_percentage": 18}
+    Ops are applied in order; on a ValueError the ones before it stay applied.
+    """
+    for op in ops:
+        kind = op.get('op') if isinstance(op, dict) else None
+        try:
+            if kind == 'assign':
+                splitter.assign_item_to_participant(int(op['item_id']), int(op['participant_id']),
+                                                    float(op.get('share', 1.0)))
+            elif kind == 'unassign':
+                splitter.unassign_item_from_participant(int(op['item_id']), int(op['participant_id']))
+            elif kind == 'add_item':
+                splitter.add_item(op['name'], float(op.get('price') or 0.0),
+                                  participants=[int(pid) for pid in op.get('participants', [])])
+            elif kind == 'set_tax_tip':
+                splitter.set_tax_and_tip(op.get('tax_rate', splitter.tax_rate),
+                                         op.get('tip_percentage', splitter.tip_percentage))
+            else:
+                raise ValueError(f"Unknown op: {kind}")
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed {kind} op: {e}")
+
+
+# The current app's store
+split_sessions = LocalProxy(lambda: current_app.extensions['split_sessions'])
@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+from app import create_app
+from benchmarks.bench_import import LAZY_MODULES
+from config import TestingConfig
+from extensions import db
+from ocr_cache import ocr_cache
+
+SCRIPT = """
+import json, sys
+import app
+flask_app = app.create_app()
+print(json.dumps({
+    "blueprints": sorted(flask_app.blueprints),
+    "lazy_loaded": sorted(m for m in sys.modules if m.split(".")[0] in %r),
+}))
+""" % (set(LAZY_MODULES),)
+
+
+def test_startup_leaves_ocr_and_oauth_unloaded(tmp_path, monkeypatch):
+    # A fresh interpreter: this one has already imported whatever the other tests needed
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'factory.db'}")
+    out = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["blueprints"] == ["admin", "auth", "receipts", "splits"]
+    assert result["lazy_loaded"] == []
+
+
+def test_app_module_builds_the_default_app_on_access(tmp_path, monkeypatch):
+    # Also in a fresh interpreter, where config.py reads DATABASE_URL on import
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'default.db'}")
+    script = "import app; from flask import Flask; print(isinstance(app.app, Flask) and app.app is app.app)"
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "True"
+
+
+def test_apps_keep_their_own_extension_state(client, app, tmp_path):
+    class OtherConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'other.db'}"
+        UPLOAD_FOLDER = str(tmp_path)
+        OCR_CACHE_SIZE = 1
+
+    other = create_app(OtherConfig)
+    try:
+        shared = {name for name in app.extensions if other.extensions.get(name) is app.extensions[name]}
+        assert shared == {'sqlalchemy', 'flask-jwt-extended'}
+
+        ocr_cache.put("key", {"total": "1.00"}, "TEXT")
+        with other.app_context():
+            assert ocr_cache.get("key") is None
+            assert ocr_cache.stats()["max_entries"] == 1
+        assert ocr_cache.get("key")["text"] == "TEXT"
+        assert ocr_cache.stats()["max_entries"] == app.config['OCR_CACHE_SIZE']
+    finally:
+        ocr_cache.clear()
+        with other.app_context():
+            db.engine.dispose()
@@ -0,0 +1,65 @@
+import time
+import pytest
+from extensions import db
+from models import LoginAttempt, SecurityLog
+from audit_log import audit_log
+
+
+@pytest.fixture
+def client(client, app, mock_user):
+    app.config['AUDIT_LOG_MODE'] = 'buffered'
+    # Long interval so only flush(), shutdown() or a full batch write rows
+    app.config['AUDIT_LOG_FLUSH_INTERVAL'] = 60
+    yield client
+    audit_log.shutdown()
+
+
+def attempts():
+    db.session.expire_all()
+    return LoginAttempt.query.filter_by(email="testuser").order_by(LoginAttempt.attempted_at).all()
+
+
+def test_login_attempts_are_written_on_flush(client, mock_user):
+    client.post("/api/auth/login", json={"username": "testuser", "password": "wrong"})
+    client.post("/api/auth/login", json={"username": "testuser", "password": "testpassword"})
+    assert attempts() == []
+
+    assert audit_log.flush() == 2
+    rows = attempts()
+    assert [row.success for row in rows] == [False, True]
+    assert rows[0].failure_reason == "Invalid credentials"
+    assert rows[1].user_id == mock_user.id
+    assert audit_log.stats()['queue_depth'] == 0
+
+
+def test_full_batch_is_written_without_waiting(client, app):
+    app.config['AUDIT_LOG_BATCH_SIZE'] = 3
+    for _ in range(3):
+        audit_log.record(SecurityLog, event_type="batch")
+    deadline = time.monotonic() + 5
+    while SecurityLog.query.filter_by(event_type="batch").count() < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert SecurityLog.query.filter_by(event_type="batch").count() == 3
+
+
+def test_overflow_drops_and_counts_events(client, app):
+    app.config['AUDIT_LOG_MAX_QUEUE'] = 2
+    dropped = audit_log.stats()['dropped']
+    results = [audit_log.record(SecurityLog, event_type="burst") for _ in range(5)]
+    assert results == [True, True, False, False, False]
+    assert audit_log.stats()['dropped'] == dropped + 3
+    audit_log.flush()
+    assert SecurityLog.query.filter_by(event_type="burst").count() == 2
+
+
+def test_sync_mode_writes_immediately(client, app):
+    app.config['AUDIT_LOG_MODE'] = 'sync'
+    client.post("/api/auth/login", json={"username": "testuser", "password": "wrong"})
+    assert len(attempts()) == 1
+    assert audit_log.stats()['queue_depth'] == 0
+
+
+def test_shutdown_flushes_pending_events(client):
+    client.post("/api/auth/login", json={"username": "testuser", "password": "wrong"})
+    audit_log.shutdown()
+    assert len(attempts()) == 1
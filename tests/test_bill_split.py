@@ -1,5 +1,7 @@
+import json
+import random
 import pytest
-from bill_splitting_logic import BillSplitter, calculate_even_split, split_receipt_items
+from bill_splitting_logic import BillSplitter, allocate_cents, calculate_even_split, split_receipt_items
 
 
 def test_equal_split_one_item_two_people():
@@ -81,3 +83,147 @@ def test_split_even_function():
     assert result["per_person"] == pytest.approx(33.33)
     assert result["allocated_total"] == pytest.approx(99.99)
     assert result["rounding_difference"] == pytest.approx(0.01)
+
+
+def test_allocate_cents_largest_remainder():
+    assert allocate_cents(1000, [1, 1, 1]) == [334, 333, 333]
+    assert allocate_cents(100, [1, 2]) == [33, 67]
+    assert allocate_cents(5, [0, 0]) == [0, 0]
+
+
+def test_cents_engine_totals_add_up_exactly():
+    """Three-way split of an amount that doesn't divide evenly."""
+    splitter = BillSplitter()
+    ids = [splitter.add_participant(name) for name in ("Alice", "Bob", "Cara")]
+    splitter.add_item("Nachos", 10.00, participants=ids)
+    splitter.set_tax_and_tip(tax_rate=8.875, tip_percentage=18)
+
+    result = splitter.calculate_split()
+    people = result["participants"]
+
+    assert [p["subtotal"] for p in people] == [3.34, 3.33, 3.33]
+    assert round(sum(p["total"] for p in people), 2) == result["summary"]["grand_total"]
+    assert round(sum(p["tax_share"] for p in people), 2) == result["summary"]["total_tax"]
+
+
+def test_cents_engine_matches_float_engine_within_a_cent():
+    rng = random.Random(7)
+    for _ in range(20):
+        splitters = [BillSplitter(engine="cents"), BillSplitter(engine="float")]
+        people = [f"P{i}" for i in range(rng.randint(1, 6))]
+        items = [(f"Item{i}", round(rng.uniform(0.5, 60), 2), rng.sample(range(1, len(people) + 1), rng.randint(1, len(people))))
+                 for i in range(rng.randint(1, 15))]
+        tax, tip = rng.choice([0, 7.25, 10]), rng.choice([0, 15, 20])
+        for splitter in splitters:
+            for name in people:
+                splitter.add_participant(name)
+            for name, price, owners in items:
+                splitter.add_item(name, price, participants=owners)
+            splitter.set_tax_and_tip(tax, tip)
+
+        cents, floats = (s.calculate_split() for s in splitters)
+        for key in ("total_subtotal", "total_tax", "total_tip"):
+            assert cents["summary"][key] == floats["summary"][key]
+        assert cents["summary"]["grand_total"] == pytest.approx(floats["summary"]["grand_total"], abs=0.011)
+        for a, b in zip(cents["participants"], floats["participants"]):
+            assert a["subtotal"] == pytest.approx(b["subtotal"], abs=0.011)
+            assert a["total"] == pytest.approx(b["total"], abs=0.011)
+        assert round(sum(p["total"] for p in cents["participants"]), 2) == cents["summary"]["grand_total"]
+
+
+def test_leftover_cents_do_not_pile_up_across_items():
+    """Rounding happens once per bill, so nobody collects a cent per item."""
+    splitter = BillSplitter()
+    ids = [splitter.add_participant(name) for name in ("Alice", "Bob", "Cara")]
+    for i in range(500):
+        splitter.add_item(f"Item{i}", 10.00, participants=ids)
+    splitter.set_tax_and_tip(tax_rate=8.875, tip_percentage=18)
+
+    people = splitter.calculate_split()["participants"]
+    assert [p["subtotal"] for p in people] == [1666.67, 1666.67, 1666.66]
+    totals = [round(p["total"] * 100) for p in people]
+    assert max(totals) - min(totals) <= 1
+    assert all(row["price"] == 3.33 for row in people[0]["items"])
+
+
+def test_incremental_updates_match_full_recalculation():
+    rng = random.Random(3)
+    splitter = BillSplitter()
+    ids = [splitter.add_participant(f"P{i}") for i in range(5)]
+    for i in range(12):
+        splitter.add_item(f"Item{i}", round(rng.uniform(1, 40), 2))
+    splitter.set_tax_and_tip(8.25, 15)
+
+    for _ in range(60):
+        item_id, pid = rng.randint(1, 12), rng.choice(ids)
+        if rng.random() < 0.3:
+            splitter.unassign_item_from_participant(item_id, pid)
+        else:
+            splitter.assign_item_to_participant(item_id, pid)
+        incremental = splitter.calculate_split()
+
+        fresh = BillSplitter()
+        fresh.import_from_json(splitter.export_to_json())
+        assert fresh.calculate_split() == incremental
+
+
+def test_per_call_engine_overrides_the_default():
+    rng = random.Random(11)
+    items = [(f"Item{i}", round(rng.uniform(1, 40), 2), rng.sample(range(1, 5), 2)) for i in range(10)]
+    splitters = [BillSplitter(engine="float"), BillSplitter(engine="cents")]
+    for splitter in splitters:
+        for i in range(4):
+            splitter.add_participant(f"P{i}")
+        for name, price, owners in items:
+            splitter.add_item(name, price, participants=owners)
+        splitter.set_tax_and_tip(8.25, 15)
+    float_built, cents_built = splitters
+
+    assert float_built.calculate_split(engine="cents") == cents_built.calculate_split()
+    # Changes made after the cents calculation are picked up too
+    for splitter in splitters:
+        splitter.assign_item_to_participant(1, 3)
+    assert float_built.calculate_split(engine="cents") == cents_built.calculate_split()
+    assert any(p["total"] for p in float_built.calculate_split(engine="cents")["participants"])
+
+
+def test_calculate_split_is_cached_until_something_changes():
+    splitter = BillSplitter()
+    alice = splitter.add_participant("Alice")
+    item = splitter.add_item("Soup", 8.00, participants=[alice])
+    first = splitter.calculate_split()
+    assert splitter.calculate_split() is first
+
+    bob = splitter.add_participant("Bob")
+    splitter.assign_item_to_participant(item, bob)
+    second = splitter.calculate_split()
+    assert second is not first
+    assert [p["subtotal"] for p in second["participants"]] == [4.00, 4.00]
+
+
+def test_output_keeps_dict_shape_and_survives_a_json_round_trip():
+    splitter = BillSplitter()
+    alice = splitter.add_participant("Alice", "alice@example.com")
+    bob = splitter.add_participant("Bob")
+    splitter.add_item("Wine", 30.00, participants=[alice, bob], custom_shares={alice: 2 / 3, bob: 1 / 3})
+    splitter.assign_item_to_participant(1, alice, share=2 / 3)
+
+    assert splitter.items[0]["participants"] == [bob, alice]
+    assert set(splitter.participants[0]) == {
+        "id", "name", "email", "items", "subtotal", "tax_share", "tip_share", "total"
+    }
+
+    # Custom share keys come back as strings after json.dumps/loads
+    restored = BillSplitter()
+    restored.import_from_json(json.loads(json.dumps(splitter.export_to_json())))
+    assert restored.calculate_split()["participants"] == splitter.calculate_split()["participants"]
+
+
+def test_unknown_ids_are_rejected():
+    splitter = BillSplitter()
+    splitter.add_participant("Alice")
+    splitter.add_item("Tea", 3.00)
+    with pytest.raises(ValueError):
+        splitter.assign_item_to_participant(2, 1)
+    with pytest.raises(ValueError):
+        splitter.assign_item_to_participant(1, 2)
@@ -0,0 +1,43 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+import database
+from config import SQLITE_TUNED_PRAGMAS, ProductionConfig, TestingConfig, get_config, server_engine_options
+from extensions import db
+
+
+def test_profiles_by_name(monkeypatch):
+    assert get_config("testing") is TestingConfig
+    monkeypatch.setenv("APP_CONFIG", "production")
+    assert get_config() is ProductionConfig
+    with pytest.raises(ValueError):
+        get_config("staging")
+
+
+def test_pool_options_only_for_server_databases():
+    assert server_engine_options("sqlite:///app.db") == {}
+    options = server_engine_options("postgresql://app@db/easysplit")
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] > 0 and options["pool_recycle"] > 0
+
+
+def test_sqlite_pragmas_run_on_each_connection(tmp_path):
+    other = Flask("pragmas")
+    other.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'tuned.db'}"
+    other.config["SQLITE_PRAGMAS"] = SQLITE_TUNED_PRAGMAS
+    db.init_app(other)
+    database.init_app(other)
+    with other.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        db.engine.dispose()
+
+
+def test_databases_without_upsert_are_refused_at_startup(tmp_path, monkeypatch):
+    monkeypatch.delitem(database.UPSERT_INSERTS, "sqlite")
+    other = Flask("no_upsert")
+    other.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'other.db'}"
+    db.init_app(other)
+    with pytest.raises(ValueError, match="Unsupported database dialect 'sqlite'"):
+        database.init_app(other)
@@ -0,0 +1,51 @@
+import pytest
+from PIL import Image
+from benchmarks.synthetic_receipts import render_receipt
+from image_preprocessing import (
+    PreprocessOptions, RAW_OPTIONS, adaptive_threshold, crop_to_receipt, downscale,
+    estimate_skew, preprocess_for_ocr
+)
+
+
+def test_downscale_caps_long_side():
+    image = Image.new("L", (3000, 4000), 255)
+    assert max(downscale(image, max_long_side=2000).size) == 2000
+    assert downscale(Image.new("L", (800, 600)), max_long_side=2000).size == (800, 600)
+
+
+def test_downscale_uses_dpi_metadata():
+    image = Image.new("L", (1200, 1200), 255)
+    image.info["dpi"] = (600, 600)
+    assert downscale(image, target_dpi=300, max_long_side=0).size == (600, 600)
+
+
+def test_crop_removes_background():
+    image, _ = render_receipt(1, "small", skew=0)
+    cropped = crop_to_receipt(image.convert("L"))
+    assert cropped.width < image.width * 0.85
+    assert cropped.height <= image.height
+
+
+@pytest.mark.parametrize("skew", [-3.0, 2.5])
+def test_estimate_skew_recovers_rotation(skew):
+    image, _ = render_receipt(2, "small", skew=skew)
+    gray = crop_to_receipt(image.convert("L"))
+    assert estimate_skew(gray) == pytest.approx(-skew, abs=0.5)
+
+
+def test_adaptive_threshold_is_binary():
+    image, _ = render_receipt(3, "small")
+    binary = adaptive_threshold(image.convert("L"))
+    assert set(binary.tobytes()) <= {0, 255}
+
+
+def test_full_pipeline_shrinks_phone_photo():
+    image, _ = render_receipt(0, "12mp")
+    prepared = preprocess_for_ocr(image, PreprocessOptions())
+    assert prepared.mode == "L"
+    assert max(prepared.size) <= 2000
+
+
+def test_raw_options_leave_image_alone():
+    image = Image.new("RGB", (3000, 4000), "white")
+    assert preprocess_for_ocr(image, RAW_OPTIONS).size == (3000, 4000)
@@ -0,0 +1,87 @@
+import random
+from sqlalchemy import event
+from extensions import db
+from models import LedgerBalance
+from ledger import apply_deltas, group_balances, rebuild_group, settle_exact, settle_greedy, split_contributions
+
+
+def settles(balances, transfers):
+    remaining = dict(balances)
+    for debtor, creditor, cents in transfers:
+        assert cents > 0
+        remaining[debtor] += cents
+        remaining[creditor] -= cents
+    return not any(remaining.values())
+
+
+def test_contributions_credit_the_payer():
+    result = {"participants": [{"name": "Alice", "total": 12.50}, {"name": "Bob", "total": 7.50}]}
+    assert split_contributions(result, ["Alice", "Bob"], paid_by="Bob") == {"Alice": -1250, "Bob": 1250}
+    assert split_contributions(result, ["Alice", "Bob"]) == {"Alice": 750, "Bob": -750}
+    even = {"per_person": 5.00}
+    assert split_contributions(even, ["Alice", "Bob", "Cara"], paid_by="Cara") == {
+        "Alice": -500, "Bob": -500, "Cara": 1000
+    }
+
+
+def test_exact_settlement_is_never_worse_than_greedy():
+    # Two independent pairs: greedy crosses them, exact settles each pair directly
+    balances = {"A": 500, "B": -500, "C": 300, "D": -300, "E": 400, "F": -100, "G": -300}
+    assert settles(balances, settle_greedy(balances))
+    assert len(settle_exact(balances)) == 4
+
+    rng = random.Random(0)
+    for _ in range(100):
+        values = [rng.choice([-1, 1]) * rng.randint(1, 6) * 100 for _ in range(rng.randint(1, 8))]
+        values.append(-sum(values))
+        balances = {f"P{i}": v for i, v in enumerate(values)}
+        exact, greedy = settle_exact(balances), settle_greedy(balances)
+        assert settles(balances, exact) and settles(balances, greedy)
+        assert len(exact) <= len(greedy) <= max(len(balances) - 1, 0)
+
+
+def test_ledger_updates_as_splits_are_saved(client, mock_user, auth_headers):
+    receipt = {"items": [{"name": "Dinner", "price": "30.00"}]}
+    for payer, diners in (("Alice", ["Alice", "Bob", "Cara"]), ("Bob", ["Bob", "Cara"])):
+        res = client.post("/api/split-bill", json={
+            "receipt_data": {"total": "30.00", **receipt}, "participants": diners,
+            "split_method": "even", "group_id": "ski-trip", "paid_by": payer
+        }, headers=auth_headers)
+        assert res.status_code == 200
+    client.post("/api/split-bill/batch", json={"jobs": [{
+        "receipt_data": receipt, "participants": ["Cara"], "group_id": "ski-trip", "paid_by": "Alice"
+    }]}, headers=auth_headers)
+
+    res = client.get("/api/groups/ski-trip/ledger", headers=auth_headers)
+    assert res.json["balances"] == {"Alice": 50.00, "Bob": 5.00, "Cara": -55.00}
+    assert res.json["transfers"] == [
+        {"from": "Cara", "to": "Alice", "amount": 50.00},
+        {"from": "Cara", "to": "Bob", "amount": 5.00},
+    ]
+
+    before = group_balances(mock_user.id, "ski-trip")
+    rebuild_group(mock_user.id, "ski-trip")
+    db.session.commit()
+    assert group_balances(mock_user.id, "ski-trip") == before
+    assert LedgerBalance.query.count() == 3
+
+
+def test_ledger_rejects_unknown_method(client, auth_headers):
+    assert client.get("/api/groups/trip/ledger?method=magic", headers=auth_headers).status_code == 400
+
+
+def test_deltas_are_applied_in_one_upsert(client, mock_user):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    apply_deltas(mock_user.id, "trip", {"Alice": 300, "Bob": -300})
+    db.session.commit()
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        # Alice has a row already, Cara is new: no UPDATE-then-INSERT window to race in
+        apply_deltas(mock_user.id, "trip", {"Alice": -100, "Cara": 100})
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert group_balances(mock_user.id, "trip") == {"Alice": 200, "Bob": -300, "Cara": 100}
+    writes = [s for s in statements if "ledger_balance" in s]
+    assert len(writes) == 1 and "ON CONFLICT" in writes[0]
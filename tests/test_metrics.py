@@ -0,0 +1,87 @@
+import os
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from metrics import metrics
+
+SPLIT = {
+    "receipt_data": {"items": [{"name": "Pizza", "price": 20.0}], "total": 20.0},
+    "participants": ["Alice", "Bob"],
+    "split_method": "equal",
+}
+
+
+@pytest.fixture
+def client(client):
+    metrics.reset()
+    yield client
+    metrics.reset()
+
+
+def scrape(client):
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.mimetype == "text/plain"
+    return res.get_data(as_text=True)
+
+
+def test_requests_are_counted_by_endpoint_and_status(client, auth_headers):
+    client.post("/api/split-bill", json=SPLIT, headers=auth_headers)
+    client.post("/api/split-bill", json={"participants": []}, headers=auth_headers)
+    text = scrape(client)
+    assert 'easysplit_requests_total{endpoint="splits.split_bill",method="POST",status="200"} 1' in text
+    assert 'easysplit_requests_total{endpoint="splits.split_bill",method="POST",status="400"} 1' in text
+    assert 'easysplit_request_duration_seconds_count{endpoint="splits.split_bill"} 2' in text
+
+
+def test_queries_and_stages_are_recorded(client, auth_headers):
+    res = client.post("/api/split-bill", json=SPLIT, headers=auth_headers)
+    assert res.status_code == 200
+    text = scrape(client)
+    assert 'easysplit_request_queries_count{endpoint="splits.split_bill"} 1' in text
+    # The insert (and the user lookup) ran inside the request
+    assert 'easysplit_request_queries_bucket{endpoint="splits.split_bill",le="1"} 0' in text
+    assert 'easysplit_stage_seconds_count{endpoint="splits.split_bill",stage="compute"} 1' in text
+    assert 'easysplit_stage_seconds_count{endpoint="splits.split_bill",stage="commit"} 1' in text
+
+
+def test_component_stats_are_exported(client):
+    text = scrape(client)
+    assert 'easysplit_component{component="ocr_cache",stat="hits"}' in text
+    assert 'easysplit_component{component="receipt_jobs",stat="pending"}' in text
+
+
+def test_metrics_are_local_only_by_default(client, app):
+    res = client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert res.status_code == 404
+    app.config['METRICS_LOCAL_ONLY'] = False
+    res = client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert res.status_code == 200
+
+
+def test_metrics_token_replaces_the_local_check(client, app):
+    app.config['METRICS_TOKEN'] = "s3cret"
+    assert client.get("/metrics").status_code == 404
+    res = client.get("/metrics", headers={"Authorization": "Bearer s3cret"},
+                     environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert res.status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+
+
+def test_failed_queries_do_not_leave_timers_behind(client):
+    conn = db.session.connection()
+    with pytest.raises(OperationalError):
+        conn.execute(text("SELECT * FROM no_such_table"))
+    assert conn.info['metrics_query_started'] == []
+    db.session.rollback()
+
+
+def test_sampled_requests_write_profiles(client, app, auth_headers, tmp_path):
+    app.config['PROFILE_EVERY_N_REQUESTS'] = 1
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    client.post("/api/split-bill", json=SPLIT, headers=auth_headers)
+    profiles = [name for name in os.listdir(tmp_path) if name.endswith(".prof")]
+    assert any(name.startswith("splits.split_bill-") for name in profiles)
+    app.config['PROFILE_EVERY_N_REQUESTS'] = 0
+    assert "easysplit_profiles_written_total" in scrape(client)
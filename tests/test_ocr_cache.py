@@ -0,0 +1,90 @@
+import io
+import pytest
+from PIL import Image
+from unittest.mock import patch
+from models import Receipt
+from ocr_cache import OCRCache, ocr_cache
+from upload_archive import upload_archive
+
+
+def make_image(color="white"):
+    return Image.new("RGB", (32, 32), color)
+
+
+def test_key_ignores_encoding_but_not_pixels():
+    png = io.BytesIO()
+    make_image().save(png, format="PNG")
+    png.seek(0)
+    reopened = Image.open(png)
+
+    assert OCRCache.key_for(make_image()) == OCRCache.key_for(reopened)
+    assert OCRCache.key_for(make_image()) != OCRCache.key_for(make_image("black"))
+
+
+def test_lru_eviction_and_counters(client, app):
+    app.config['OCR_CACHE_SIZE'] = 2
+    cache = OCRCache()
+    cache.put("a", {"total": "1.00"}, "A")
+    cache.put("b", {"total": "2.00"}, "B")
+    assert cache.get("a")["text"] == "A"   # "a" is now most recent
+    cache.put("c", {"total": "3.00"}, "C")  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c")["data"] == {"total": "3.00"}
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_returned_entries_are_copies(client):
+    cache = OCRCache()
+    cache.put("a", {"items": []}, "A")
+    cache.get("a")["data"]["items"].append("oops")
+    assert cache.get("a")["data"]["items"] == []
+
+
+def test_disk_tier_survives_memory_eviction(client, app, tmp_path):
+    app.config['OCR_CACHE_SIZE'] = 1
+    app.config['OCR_CACHE_DIR'] = str(tmp_path)
+    cache = OCRCache()
+    cache.put("a" * 64, {"total": "1.00"}, "A")
+    cache.put("b" * 64, {"total": "2.00"}, "B")
+
+    entry = cache.get("a" * 64)
+    assert entry["data"] == {"total": "1.00"}
+    assert cache.stats()["disk_hits"] == 1
+
+    fresh = OCRCache()
+    assert fresh.get("b" * 64)["text"] == "B"
+
+
+@pytest.fixture
+def client(client, app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    ocr_cache.clear()
+    yield client
+    upload_archive.flush()
+
+
+@patch("blueprints.receipts.extract_receipt_data")
+def test_repeated_upload_skips_ocr(mock_extract, client, mock_user, auth_headers):
+    mock_extract.return_value = ({"store_name": "Cache Mart", "total": "8.00", "items": []}, "CACHE MART")
+
+    def upload():
+        buffer = io.BytesIO()
+        make_image().save(buffer, format="PNG")
+        buffer.seek(0)
+        return client.post("/api/process-receipt", data={"image": (buffer, "r.png")}, headers=auth_headers,
+                           content_type="multipart/form-data")
+
+    first, second = upload(), upload()
+    assert first.json["cached"] is False
+    assert second.json["cached"] is True
+    assert second.json["data"]["store_name"] == "Cache Mart"
+    assert mock_extract.call_count == 1
+
+    receipts = Receipt.query.filter_by(user_id=mock_user.id).all()
+    assert len(receipts) == 2
+    assert receipts[0].ocr_hash == receipts[1].ocr_hash is not None
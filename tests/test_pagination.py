@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from extensions import db
+from models import User, Role, Receipt, BillSplit
+
+START = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def walk(test_client, url, headers):
+    """Follow next_cursor to the end; returns the pages"""
+    pages, cursor = [], None
+    while True:
+        res = test_client.get(url + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+        assert res.status_code == 200
+        pages.append(res.json["items"])
+        cursor = res.json["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_receipts_are_paged_newest_first_without_raw_data(client, mock_user, auth_headers):
+    # Several receipts share a timestamp so the id tie-breaker matters
+    for i in range(7):
+        db.session.add(Receipt(user_id=mock_user.id, store_name=f"Store {i}", raw_data={"i": i},
+                               created_at=START + timedelta(minutes=i // 2)))
+    db.session.add(Receipt(user_id="someone-else", store_name="Hidden", created_at=START))
+    db.session.commit()
+
+    pages = walk(client, "/api/receipts?limit=3", auth_headers)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    stores = [item["store_name"] for page in pages for item in page]
+    assert stores == [f"Store {i}" for i in (6, 5, 4, 3, 2, 1, 0)]
+    assert all("raw_data" not in item for page in pages for item in page)
+
+    res = client.get("/api/receipts?limit=1&include=raw_data", headers=auth_headers)
+    assert res.json["items"][0]["raw_data"] == {"i": 6}
+
+
+def test_bill_splits_project_heavy_fields(client, mock_user, auth_headers):
+    db.session.add(BillSplit(user_id=mock_user.id, receipt_data={"items": []}, split_result={"summary": {}},
+                             participants=["Alice"], created_at=START))
+    db.session.commit()
+    item = client.get("/api/bill-splits", headers=auth_headers).json["items"][0]
+    assert item["participants"] == ["Alice"]
+    assert "receipt_data" not in item and "split_result" not in item
+
+    item = client.get("/api/bill-splits?include=split_result", headers=auth_headers).json["items"][0]
+    assert item["split_result"] == {"summary": {}} and "receipt_data" not in item
+
+
+def test_saved_splits_get_their_own_timestamps(client, auth_headers):
+    started = datetime.utcnow()
+    for name in ("Alice", "Bob", "Cara"):
+        res = client.post("/api/split-bill", json={
+            "receipt_data": {"items": [{"name": "Tea", "price": "3.00"}]}, "participants": [name]
+        }, headers=auth_headers)
+        assert res.status_code == 200
+
+    pages = walk(client, "/api/bill-splits?limit=2", auth_headers)
+    items = [item for page in pages for item in page]
+    assert [item["participants"] for item in items] == [["Cara"], ["Bob"], ["Alice"]]
+    stamps = [datetime.fromisoformat(item["created_at"]) for item in items]
+    assert stamps == sorted(stamps, reverse=True) and len(set(stamps)) == 3
+    assert stamps[-1] >= started
+
+
+def test_bad_cursor_is_rejected(client, auth_headers):
+    assert client.get("/api/receipts?cursor=not-a-cursor", headers=auth_headers).status_code == 400
+
+
+def test_admin_users_load_roles_in_one_query(client, mock_user, auth_headers):
+    admin, member = Role(name="admin"), Role(name="member")
+    db.session.add_all([admin, member])
+    mock_user.roles.append(admin)
+    for i in range(5):
+        db.session.add(User(username=f"user{i}", email=f"user{i}@example.com", roles=[member]))
+    db.session.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        pages = walk(client, "/api/admin/users?limit=4", auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    users = [user for page in pages for user in page]
+    assert [user["username"] for user in users] == ["testuser"] + [f"user{i}" for i in range(5)]
+    assert users[1]["roles"] == ["member"]
+    # Per page: the role check, the user page and one SELECT ... IN for their roles
+    role_loads = [sql for sql in statements if "FROM role" in sql and "user_role" in sql]
+    assert len(role_loads) <= 2 * len(pages)
@@ -0,0 +1,52 @@
+import random
+import pytest
+from benchmarks.legacy_parser import parse_receipt_text as legacy_parse
+from benchmarks.synthetic_receipts import receipt_lines
+from parse_model import classify_receipt_lines, parse_receipt_text
+
+RECEIPT = """FRESH MARKET
+OPEN 9AM-9PM
+Bananas 1.99
+Whole Milk
+3.49
+SUBTOTAL 5.48
+TAX 0.44
+TOTAL 5.92
+CASH 10.00
+CHANGE 4.08"""
+
+
+def test_parses_fields():
+    parsed = parse_receipt_text(RECEIPT)
+    assert parsed["store_name"] == "FRESH MARKET"
+    assert parsed["items"] == [{"name": "Bananas", "price": "1.99"}, {"name": "Whole Milk", "price": "3.49"}]
+    assert parsed["subtotal"] == "5.48"
+    assert parsed["tax"] == "0.44"
+    assert parsed["total"] == "5.92"
+
+
+def test_labels_each_line_once():
+    _, labels = classify_receipt_lines(RECEIPT)
+    assert [label for label, _ in labels] == [
+        "header", "noise", "item", "item", "noise", "subtotal", "tax", "total", "noise", "noise"
+    ]
+
+
+def test_subtotal_alone_also_sets_total():
+    parsed = parse_receipt_text("Shop\nSUBTOTAL 9.00")
+    assert parsed["subtotal"] == parsed["total"] == "9.00"
+
+
+NOISE = ["", " ", "x", "T# 0042 OP 7", "OPEN 9AM-9PM", "Thank You!", "4111111111111111",
+         "ITEMS SOLD 3", "DISCOUNT 1.00", "TOTAL TAX 2.10", "Gift Card 150.00", "Cheese 120.00",
+         "Sparkling Water", "2.50", "Wrap 4.00", "Corp Store", "Ünïcode Market", "TOTAL", "12"]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_legacy_parser(seed):
+    rng = random.Random(seed)
+    lines = receipt_lines(seed, item_count=rng.randint(0, 40))
+    for _ in range(rng.randint(0, 20)):
+        lines.insert(rng.randint(0, len(lines)), rng.choice(NOISE))
+    text = "\n".join(lines)
+    assert parse_receipt_text(text) == legacy_parse(text)
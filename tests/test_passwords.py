@@ -0,0 +1,71 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import User
+from auth.passwords import password_hasher
+
+OLD_METHOD = "pbkdf2:sha256:1000"
+NEW_METHOD = "pbkdf2:sha256:2000"
+
+# Every test's user has a password hashed with the outdated method
+pytestmark = pytest.mark.parametrize(
+    "mock_user", [{"password": None, "password_hash": generate_password_hash("hunter22", OLD_METHOD)}],
+    indirect=True
+)
+
+
+@pytest.fixture
+def client(client, app, mock_user):
+    app.config['PASSWORD_HASH_METHOD'] = NEW_METHOD
+    yield client
+    password_hasher.shutdown()
+
+
+def stored_hash(user):
+    db.session.expire_all()
+    return db.session.get(User, user.id).password_hash
+
+
+def test_outdated_hash_is_upgraded_after_login(client, mock_user):
+    res = client.post("/api/auth/login", json={"username": "testuser", "password": "hunter22"})
+    assert res.status_code == 200
+    password_hasher.shutdown(wait=True)  # let the background rehash finish
+
+    new_hash = stored_hash(mock_user)
+    assert new_hash.startswith(NEW_METHOD + "$")
+    assert not password_hasher.needs_rehash(new_hash)
+    res = client.post("/api/auth/login", json={"username": "testuser", "password": "hunter22"})
+    assert res.status_code == 200
+
+
+def test_failed_login_leaves_hash_alone(client, mock_user):
+    before = stored_hash(mock_user)
+    res = client.post("/api/auth/login", json={"username": "testuser", "password": "wrong"})
+    assert res.status_code == 401
+    password_hasher.shutdown(wait=True)
+    assert stored_hash(mock_user) == before
+
+
+def test_rehash_loses_to_a_concurrent_password_change(client, mock_user):
+    old_hash = mock_user.password_hash
+    mock_user.set_password("changed-password")
+    db.session.commit()
+    password_hasher.rehash_in_background(mock_user.id, old_hash, "hunter22").result()
+    assert User.query.get(mock_user.id).check_password("changed-password")
+
+
+def test_logins_do_not_wait_for_background_rehashes(client):
+    release = threading.Event()
+    password_hasher._get_rehash_executor().submit(release.wait)  # a slow rehash in flight
+    try:
+        res = client.post("/api/auth/login", json={"username": "testuser", "password": "hunter22"})
+        assert res.status_code == 200
+    finally:
+        release.set()
+
+
+def test_method_defaults_are_normalized(client, app):
+    app.config['PASSWORD_HASH_METHOD'] = "pbkdf2"
+    assert not password_hasher.needs_rehash(generate_password_hash("x", "pbkdf2:sha256"))
+    assert password_hasher.needs_rehash(generate_password_hash("x", OLD_METHOD))
@@ -0,0 +1,89 @@
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from extensions import db
+from models import Role, Permission
+from auth.permissions import has_role, has_permission
+from auth.user_context import user_context
+
+
+@pytest.fixture
+def client(client):
+    user_context.invalidate()
+    yield client
+    user_context.invalidate()
+
+
+@pytest.fixture
+def count_queries():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", listener)
+
+
+def make_admin(user):
+    admin = Role(name="admin", permissions=[Permission(name="read receipts", resource="receipt", action="read")])
+    user.roles.append(admin)
+    db.session.commit()
+    return admin
+
+
+def test_roles_are_resolved_once(client, mock_user, auth_headers, count_queries):
+    make_admin(mock_user)
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 200
+    first = len(count_queries)
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 200
+    assert len(count_queries) == first  # second request served from the cache
+
+
+def test_assigning_a_role_invalidates_the_cache(client, mock_user, auth_headers):
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 403
+    make_admin(mock_user)
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 200
+
+    mock_user.roles.clear()
+    db.session.rollback()  # an uncommitted change must not evict anything
+    assert has_role(mock_user.id, "admin")
+    mock_user.roles.clear()
+    db.session.commit()
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 403
+
+
+def test_permission_changes_invalidate_every_user(client, mock_user):
+    admin = make_admin(mock_user)
+    assert mock_user.has_permission("receipt", "read")
+    assert not mock_user.has_permission("receipt", "delete")
+
+    admin.permissions.append(Permission(name="delete receipts", resource="receipt", action="delete"))
+    db.session.commit()
+    assert mock_user.has_permission("receipt", "delete")
+
+
+def test_unknown_user_is_not_found(client):
+    token = create_access_token(identity="no-such-user")
+    res = client.get("/api/admin/ocr-cache", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 404
+
+
+def test_roles_and_permissions_share_one_lookup(client, mock_user, auth_headers, count_queries):
+    make_admin(mock_user)
+    user_id = mock_user.id
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 200
+    count_queries.clear()
+    assert has_role(user_id, "admin")
+    assert has_permission(user_id, "receipt", "read")
+    assert count_queries == []
+
+
+def test_roles_claim_is_trusted_until_a_new_token(client, app, mock_user, auth_headers):
+    app.config['JWT_ROLES_CLAIM'] = True
+    make_admin(mock_user)
+    token = create_access_token(identity=mock_user.id)
+    assert decode_token(token)["roles"] == ["admin"]
+
+    mock_user.roles.clear()
+    db.session.commit()
+    assert client.get("/api/admin/ocr-cache", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert client.get("/api/admin/ocr-cache", headers=auth_headers).status_code == 403
@@ -0,0 +1,64 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot lookups: each must be answered through
+an index (SEARCH ... USING INDEX), never a full table SCAN, and listings must
+not need a temporary B-tree to sort.
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import or_, tuple_
+from extensions import db
+from models import (
+    User, RefreshToken, LoginAttempt, Receipt, BillSplit, LedgerBalance, SpendingAggregate
+)
+
+SINCE = datetime.utcnow() - timedelta(minutes=15)
+
+
+def query_plan(session, statement):
+    """The detail column of EXPLAIN QUERY PLAN for a SQLAlchemy statement"""
+    compiled = statement.compile(dialect=db.engine.dialect)
+    # Parameter values don't change the plan without ANALYZE statistics
+    params = tuple('x' for _ in compiled.positiontup or ())
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+HOT_QUERIES = {
+    'login by username or email': db.select(User).where(
+        or_(User.username == 'x', User.email == 'x')),
+    'refresh token by digest': db.select(RefreshToken).where(
+        RefreshToken.token_hash == 'x', RefreshToken.user_id == 'x', RefreshToken.revoked.is_(False)),
+    'revoked refresh tokens to sweep': db.select(RefreshToken.token_id).where(
+        RefreshToken.revoked.is_(True)).limit(1000),
+    'expired refresh tokens to sweep': db.select(RefreshToken.token_id).where(
+        RefreshToken.revoked.is_(False), RefreshToken.expires_at <= SINCE).limit(1000),
+    'login attempts for an email': db.select(LoginAttempt).where(
+        LoginAttempt.email == 'x', LoginAttempt.attempted_at >= SINCE),
+    'login attempts from an ip': db.select(LoginAttempt).where(
+        LoginAttempt.ip_address == 'x', LoginAttempt.attempted_at >= SINCE),
+    'receipts of a user': db.select(Receipt).where(
+        Receipt.user_id == 'x').order_by(Receipt.created_at.desc()),
+    'receipts page after a cursor': db.select(Receipt).where(
+        Receipt.user_id == 'x', tuple_(Receipt.created_at, Receipt.id) < tuple_(SINCE, 1)
+    ).order_by(Receipt.created_at.desc(), Receipt.id.desc()).limit(20),
+    'admin users page after a cursor': db.select(User).where(
+        User.username > 'x').order_by(User.username).limit(20),
+    'receipt by ocr hash': db.select(Receipt).where(Receipt.ocr_hash == 'x'),
+    'bill splits of a user': db.select(BillSplit).where(
+        BillSplit.user_id == 'x').order_by(BillSplit.created_at.desc()),
+    'bill splits of a group': db.select(BillSplit).where(
+        BillSplit.user_id == 'x', BillSplit.group_id == 'x'),
+    'group ledger balances': db.select(LedgerBalance).where(
+        LedgerBalance.user_id == 'x', LedgerBalance.group_id == 'x'),
+    'spending aggregates of a user': db.select(SpendingAggregate).where(
+        SpendingAggregate.user_id == 'x'),
+}
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_an_index(session, name):
+    plan = query_plan(session, HOT_QUERIES[name])
+    assert plan
+    for step in plan:
+        assert not (step.startswith('SCAN') and 'INDEX' not in step), f"{name}: {plan}"
+        assert 'TEMP B-TREE' not in step, f"{name}: {plan}"
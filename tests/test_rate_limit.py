@@ -0,0 +1,110 @@
+import pytest
+from datetime import datetime
+from extensions import db
+from models import LoginAttempt
+from audit_log import audit_log
+from auth.passwords import password_hasher
+from auth.rate_limit import LocalBackend, RateLimitBackend, login_rate_limiter
+
+
+@pytest.fixture
+def client(client, app, mock_user):
+    app.config['LOGIN_RATE_LIMIT_ENABLED'] = True
+    app.config['LOGIN_RATE_LIMIT_PER_ACCOUNT'] = 3
+    app.config['LOGIN_RATE_LIMIT_PER_IP'] = 5
+    login_rate_limiter.backend.clear()
+    yield client
+    audit_log.flush()
+    login_rate_limiter.backend.clear()
+
+
+def login(client, username, password):
+    return client.post("/api/auth/login", json={"username": username, "password": password})
+
+
+def test_sliding_window_estimate():
+    backend = LocalBackend()
+    for now in (100, 150, 199):
+        backend.hit("k", 100, now)
+    assert backend.count("k", 100, 199) == 3
+    # Half of the previous window still overlaps the last 100 seconds
+    assert backend.count("k", 100, 250) == pytest.approx(1.5)
+    assert backend.hit("k", 100, 250) == pytest.approx(2.5)
+    assert backend.count("k", 100, 400) == 0
+
+
+def test_account_is_locked_after_repeated_failures(client, monkeypatch):
+    for _ in range(3):
+        assert login(client, "testuser", "wrong").status_code == 401
+
+    verified = []
+    monkeypatch.setattr(password_hasher, "verify", lambda *args: verified.append(args) or True)
+    res = login(client, "testuser", "testpassword")
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    assert verified == []
+
+
+def test_username_and_email_share_one_allowance(client):
+    for name in ("testuser", "test@example.com", "testuser"):
+        assert login(client, name, "wrong").status_code == 401
+    assert login(client, "test@example.com", "testpassword").status_code == 429
+
+
+def test_backends_must_implement_every_method():
+    class Partial(RateLimitBackend):
+        def hit(self, key, window, now):
+            return 0
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_successful_login_clears_the_account_counter(client):
+    for _ in range(2):
+        login(client, "testuser", "wrong")
+    assert login(client, "testuser", "testpassword").status_code == 200
+    for _ in range(2):
+        assert login(client, "testuser", "wrong").status_code == 401
+
+
+def test_ip_limit_covers_every_account(client):
+    for i in range(5):
+        assert login(client, f"nobody{i}", "wrong").status_code == 401
+    assert login(client, "testuser", "testpassword").status_code == 429
+
+
+def test_rebuild_replays_recent_failures(client, mock_user):
+    now = datetime.utcnow()
+    db.session.add_all([
+        LoginAttempt(attempt_id=f"a{i}", user_id=mock_user.id, email=name, ip_address="10.0.0.1",
+                     success=False, failure_reason="Invalid credentials", attempted_at=now)
+        for i, name in enumerate(("testuser", "test@example.com", "testuser"))
+    ])
+    db.session.commit()
+
+    assert login_rate_limiter.rebuild() == 3
+    assert login_rate_limiter.check("10.0.0.2", login_rate_limiter.account_key(mock_user.id, "x")) is not None
+    assert login_rate_limiter.check("10.0.0.2", login_rate_limiter.account_key(None, "someone-else")) is None
+
+
+def test_backend_is_pluggable(client, mock_user):
+    class RecordingBackend(LocalBackend):
+        def __init__(self):
+            super().__init__()
+            self.keys = []
+
+        def hit(self, key, window, now):
+            self.keys.append(key)
+            return super().hit(key, window, now)
+
+    original = login_rate_limiter.backend
+    login_rate_limiter.backend = RecordingBackend()
+    try:
+        login(client, "testuser", "wrong")
+        login(client, "Nobody", "wrong")
+        assert login_rate_limiter.backend.keys == [
+            "ip:127.0.0.1", f"user:{mock_user.id}", "ip:127.0.0.1", "account:nobody"
+        ]
+    finally:
+        login_rate_limiter.backend = original
@@ -0,0 +1,141 @@
+import io
+import os
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image
+from unittest.mock import patch
+from extensions import db
+from models import Receipt
+from ocr_cache import ocr_cache
+from upload_archive import upload_archive
+from receipt_jobs import job_queue
+
+PARSED = {"store_name": "Memory Mart", "total": "4.20", "items": []}
+
+
+@pytest.fixture
+def client(client, app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    app.config['RECEIPT_JOB_EXECUTOR'] = 'thread'
+    ocr_cache.clear()
+    yield client
+    job_queue.shutdown()
+    upload_archive.flush()
+
+
+def png_bytes(color="white"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (24, 24), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload(client, headers, data):
+    return client.post("/api/process-receipt", data={"image": (io.BytesIO(data), "receipt.png")},
+                       headers=headers, content_type="multipart/form-data")
+
+
+@patch("blueprints.receipts.extract_receipt_data", return_value=(PARSED, "MEMORY MART"))
+def test_ocr_runs_on_decoded_image(mock_extract, client, auth_headers):
+    res = upload(client, auth_headers, png_bytes())
+    assert res.status_code == 200
+    assert isinstance(mock_extract.call_args.args[0], Image.Image)
+
+
+@patch("blueprints.receipts.extract_receipt_data", return_value=(PARSED, "MEMORY MART"))
+def test_original_bytes_are_archived_in_background(mock_extract, client, auth_headers):
+    data = png_bytes()
+    res = upload(client, auth_headers, data)
+    upload_archive.flush()
+
+    receipt = db.session.get(Receipt, res.json["receipt_id"])
+    assert receipt.image_path.endswith(".png")
+    with open(receipt.image_path, "rb") as f:
+        assert f.read() == data
+
+
+@patch("blueprints.receipts.extract_receipt_data", return_value=(PARSED, "MEMORY MART"))
+def test_archiving_can_be_disabled(mock_extract, client, app, auth_headers):
+    app.config['RECEIPT_ARCHIVE_UPLOADS'] = False
+    res = upload(client, auth_headers, png_bytes())
+    upload_archive.flush()
+
+    assert res.status_code == 200
+    assert db.session.get(Receipt, res.json["receipt_id"]).image_path is None
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
+
+
+def fake_ocr(image, return_text=False):
+    color = image.getpixel((0, 0))
+    if color == (255, 0, 0):
+        raise RuntimeError("unreadable receipt")
+    return {"store_name": f"Store {color[1]}", "total": "1.00", "items": []}, "TEXT"
+
+
+@patch("receipt_jobs.extract_receipt_data", side_effect=fake_ocr)
+def test_batch_reports_partial_failures(mock_extract, client, auth_headers):
+    files = [
+        (io.BytesIO(png_bytes("white")), "a.png"),
+        (io.BytesIO(png_bytes("red")), "b.png"),
+        (io.BytesIO(b"not an image"), "c.txt"),
+        (io.BytesIO(b"not an image"), "d.png"),
+        (io.BytesIO(png_bytes("black")), "e.png"),
+    ]
+    res = client.post("/api/receipts/batch", data={"images": files}, headers=auth_headers,
+                      content_type="multipart/form-data")
+    assert res.status_code == 200
+    results = res.json["results"]
+    assert [r["success"] for r in results] == [True, False, False, False, True]
+    assert results[0]["data"]["store_name"] == "Store 255"
+    assert "unreadable receipt" in results[1]["error"]
+    assert "Unsupported file type" in results[2]["error"]
+    assert res.json["processed"] == 2
+    assert Receipt.query.count() == 2
+
+
+@patch("receipt_jobs.extract_receipt_data", side_effect=fake_ocr)
+def test_batch_uses_ocr_cache(mock_extract, client, auth_headers):
+    files = lambda: [(io.BytesIO(png_bytes("white")), "a.png")]
+    client.post("/api/receipts/batch", data={"images": files()}, headers=auth_headers,
+                content_type="multipart/form-data")
+    res = client.post("/api/receipts/batch", data={"images": files()}, headers=auth_headers,
+                      content_type="multipart/form-data")
+    assert res.json["results"][0]["cached"] is True
+    assert mock_extract.call_count == 1
+
+
+@patch("receipt_jobs.run_ocr_job", side_effect=BrokenProcessPool("worker died"))
+def test_batch_replaces_a_broken_pool(mock_run, client, auth_headers, mocker):
+    job_queue.ocr_many([])
+    broken = job_queue._batch_executor
+    shutdown = mocker.spy(broken, "shutdown")
+    res = client.post("/api/receipts/batch", data={"images": [(io.BytesIO(png_bytes()), "a.png")]},
+                      headers=auth_headers, content_type="multipart/form-data")
+
+    assert res.json["results"][0]["error"] == "worker died"
+    shutdown.assert_any_call(wait=False, cancel_futures=True)
+    assert job_queue._batch_executor is None
+
+
+@patch("receipt_jobs.extract_receipt_data", return_value=(PARSED, "MEMORY MART"))
+def test_workers_get_the_drafted_image_the_cache_key_was_taken_from(mock_extract, client, app, auth_headers):
+    app.config['IMAGE_DRAFT_LONG_SIDE'] = 500
+    buffer = io.BytesIO()
+    Image.new("RGB", (2400, 1200), "white").save(buffer, format="JPEG")
+    files = lambda: [(io.BytesIO(buffer.getvalue()), "big.jpg")]
+
+    res = client.post("/api/receipts/batch", data={"images": files()}, headers=auth_headers,
+                      content_type="multipart/form-data")
+    client.post("/api/process-receipt?async=1", data={"image": files()[0]}, headers=auth_headers,
+                content_type="multipart/form-data")
+    job_queue.shutdown(wait=True)
+
+    assert mock_extract.call_count == 1  # the async upload hit the batch's cache entry
+    image = mock_extract.call_args.args[0]
+    assert image.size == (600, 300)
+    receipt = db.session.get(Receipt, res.json["results"][0]["receipt_id"])
+    assert receipt.ocr_hash == ocr_cache.key_for(image)
+
+
+def test_batch_requires_files(client, auth_headers):
+    res = client.post("/api/receipts/batch", data={}, headers=auth_headers, content_type="multipart/form-data")
+    assert res.status_code == 400
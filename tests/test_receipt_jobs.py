@@ -0,0 +1,111 @@
+import io
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image
+from unittest.mock import patch
+from extensions import db
+from models import ReceiptJob
+from receipt_jobs import POOL_CONTEXT, job_queue
+from ocr_cache import ocr_cache
+from upload_archive import upload_archive
+
+
+@pytest.fixture
+def client(client, app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    app.config['RECEIPT_JOB_EXECUTOR'] = 'thread'
+    app.config['RECEIPT_JOB_MAX_PENDING'] = 32
+
+    ocr_cache.clear()
+    yield client
+    job_queue.shutdown()
+    upload_archive.flush()
+
+
+def image_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (20, 20), "white").save(buffer, format="PNG")
+    buffer.seek(0)
+    return {"image": (buffer, "receipt.png")}
+
+
+@patch("receipt_jobs.extract_receipt_data")
+def test_async_upload_returns_job_and_finishes(mock_extract, client, auth_headers):
+    mock_extract.return_value = ({"store_name": "Job Mart", "total": "12.50", "items": []}, "JOB MART\nTOTAL 12.50")
+
+    res = client.post("/api/process-receipt?async=true", data=image_upload(), headers=auth_headers,
+                      content_type="multipart/form-data")
+    assert res.status_code == 202
+    job_id = res.json["job_id"]
+
+    job_queue.shutdown(wait=True)
+
+    res = client.get(f"/api/receipts/jobs/{job_id}", headers=auth_headers)
+    assert res.status_code == 200
+    assert res.json["status"] == "done"
+    assert res.json["progress"] == 100
+    assert res.json["receipt"]["store_name"] == "Job Mart"
+    assert res.json["receipt"]["total_amount"] == 12.50
+
+
+@patch("receipt_jobs.extract_receipt_data", side_effect=RuntimeError("tesseract missing"))
+def test_failed_job_reports_error(mock_extract, client, auth_headers):
+    res = client.post("/api/process-receipt?async=1", data=image_upload(), headers=auth_headers,
+                      content_type="multipart/form-data")
+    job_queue.shutdown(wait=True)
+
+    job = db.session.get(ReceiptJob, res.json["job_id"])
+    db.session.refresh(job)
+    assert job.status == "failed"
+    assert "tesseract missing" in job.error
+
+
+@patch("receipt_jobs.record_receipts", side_effect=RuntimeError("ledger unavailable"))
+@patch("receipt_jobs.extract_receipt_data")
+def test_job_fails_when_storing_the_result_fails(mock_extract, mock_record, client, auth_headers):
+    mock_extract.return_value = ({"store_name": "Job Mart", "total": "12.50", "items": []}, "JOB MART")
+    res = client.post("/api/process-receipt?async=true", data=image_upload(), headers=auth_headers,
+                      content_type="multipart/form-data")
+    job_queue.shutdown(wait=True)
+
+    job = db.session.get(ReceiptJob, res.json["job_id"])
+    db.session.refresh(job)
+    assert job.status == "failed"
+    assert job.error == "RuntimeError: ledger unavailable"
+    assert job.receipt_id is None
+
+
+@patch("receipt_jobs.run_ocr_job", side_effect=BrokenProcessPool("worker died"))
+def test_broken_pool_is_shut_down_and_replaced(mock_run, client, auth_headers, mocker):
+    broken = job_queue._get_executor()
+    shutdown = mocker.spy(broken, "shutdown")
+    res = client.post("/api/process-receipt?async=true", data=image_upload(), headers=auth_headers,
+                      content_type="multipart/form-data")
+    broken.shutdown(wait=True)
+
+    shutdown.assert_any_call(wait=False, cancel_futures=True)
+    assert job_queue._get_executor() is not broken
+    job = db.session.get(ReceiptJob, res.json["job_id"])
+    db.session.refresh(job)
+    assert job.status == "failed"
+
+
+def test_worker_processes_are_not_forked(client, app):
+    app.config['RECEIPT_JOB_EXECUTOR'] = 'process'
+    executor = job_queue._new_executor(1)
+    assert executor._mp_context is POOL_CONTEXT
+    assert POOL_CONTEXT.get_start_method() != 'fork'
+    executor.shutdown()
+
+
+def test_full_queue_returns_429(client, app, auth_headers):
+    app.config['RECEIPT_JOB_MAX_PENDING'] = 0
+    res = client.post("/api/process-receipt?async=true", data=image_upload(), headers=auth_headers,
+                      content_type="multipart/form-data")
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == str(app.config['RECEIPT_JOB_RETRY_AFTER'])
+
+
+def test_unknown_job_is_404(client, auth_headers):
+    res = client.get("/api/receipts/jobs/does-not-exist", headers=auth_headers)
+    assert res.status_code == 404
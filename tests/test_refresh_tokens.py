@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta
+from extensions import db
+from models import RefreshToken
+from audit_log import audit_log
+from auth.tokens import refresh_tokens, token_digest
+
+
+@pytest.fixture
+def client(client, mock_user):
+    yield client
+    refresh_tokens.shutdown()
+    audit_log.flush()
+    refresh_tokens._revoked.clear()
+
+
+def login(client):
+    res = client.post("/api/auth/login", json={"username": "testuser", "password": "testpassword"})
+    assert res.status_code == 200
+    return res.json
+
+
+def refresh(client, token):
+    return client.post("/api/auth/refresh", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_only_the_digest_is_stored(client, mock_user):
+    token = login(client)["refresh_token"]
+    row = RefreshToken.query.filter_by(user_id=mock_user.id).one()
+    assert row.token_hash == token_digest(token)
+    assert len(row.token_hash) == 64
+
+
+def test_refresh_rotates_the_token(client):
+    old = login(client)["refresh_token"]
+    res = refresh(client, old)
+    assert res.status_code == 200
+    new = res.json["refresh_token"]
+    assert new != old and res.json["access_token"]
+
+    old_row = RefreshToken.query.filter_by(token_hash=token_digest(old)).one()
+    new_row = RefreshToken.query.filter_by(token_hash=token_digest(new)).one()
+    assert old_row.revoked and old_row.replaced_by == new_row.token_id
+    assert not new_row.revoked
+
+    # A used token is turned away without a query, the new one still works
+    fast_rejects = refresh_tokens.fast_rejects
+    assert refresh(client, old).status_code == 401
+    assert refresh_tokens.fast_rejects == fast_rejects + 1
+    assert refresh(client, new).status_code == 200
+
+
+def test_logout_revokes_the_token(client):
+    tokens = login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    body = {"refresh_token": tokens["refresh_token"]}
+    assert client.post("/api/auth/logout", json=body, headers=headers).status_code == 200
+    # The access token went on the denylist with it
+    assert client.post("/api/auth/logout", json=body, headers=headers).status_code == 401
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_revoked_set_is_rebuilt_from_the_database(client):
+    token = login(client)["refresh_token"]
+    refresh(client, token)
+    refresh_tokens._revoked.clear()
+    assert not refresh_tokens.is_known_revoked(token)
+
+    assert refresh_tokens.load_revoked() == 1
+    assert refresh_tokens.is_known_revoked(token)
+
+
+def test_sweep_deletes_expired_and_revoked_rows_in_chunks(client, app, mock_user):
+    app.config['REFRESH_TOKEN_SWEEP_BATCH'] = 2
+    now = datetime.utcnow()
+    db.session.add_all(
+        [RefreshToken(token_id=f"expired{i}", user_id=mock_user.id, token_hash=f"{i:064d}",
+                      expires_at=now - timedelta(days=1), revoked=False) for i in range(3)]
+        + [RefreshToken(token_id=f"revoked{i}", user_id=mock_user.id, token_hash=f"{i + 10:064d}",
+                        expires_at=now + timedelta(days=1), revoked=True) for i in range(2)]
+        + [RefreshToken(token_id="live", user_id=mock_user.id, token_hash=f"{99:064d}",
+                        expires_at=now + timedelta(days=1), revoked=False)]
+    )
+    db.session.commit()
+
+    assert refresh_tokens.sweep() == 5
+    assert [row.token_id for row in RefreshToken.query.all()] == ["live"]
@@ -0,0 +1,71 @@
+import io
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from PIL import Image
+from extensions import db
+from models import Receipt, SpendingAggregate
+from ocr_cache import ocr_cache
+from spending import apply_deltas, rebuild_user, user_stats
+
+
+@pytest.fixture
+def client(client, app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    app.config['RECEIPT_ARCHIVE_UPLOADS'] = False
+    ocr_cache.clear()
+    return client
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (24, 24), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_process_receipt_updates_aggregates(client, auth_headers):
+    parsed = [({"store_name": "Corner Cafe", "total": "12.50", "tax": "1.00"}, ""),
+              ({"store_name": "Corner Cafe ", "total": "7.25", "tax": "0.50"}, ""),
+              ({"store_name": "Grocer", "total": "40.00"}, "")]
+    with patch("blueprints.receipts.extract_receipt_data", side_effect=parsed):
+        for color in ("white", "black", "red"):
+            res = client.post("/api/process-receipt", data={"image": (io.BytesIO(png_bytes(color)), "r.png")},
+                                   headers=auth_headers, content_type="multipart/form-data")
+            assert res.status_code == 200
+
+    assert SpendingAggregate.query.count() == 2
+    stats = client.get("/api/users/me/stats", headers=auth_headers).json
+    month = datetime.utcnow().strftime("%Y-%m")
+    assert stats["totals"] == {"receipt_count": 3, "total_amount": 59.75, "tax_amount": 1.50}
+    assert stats["monthly"] == [{"month": month, "receipt_count": 3, "total_amount": 59.75, "tax_amount": 1.50}]
+    assert stats["top_stores"] == [
+        {"store_name": "Grocer", "receipt_count": 1, "total_amount": 40.00},
+        {"store_name": "Corner Cafe", "receipt_count": 2, "total_amount": 19.75},
+    ]
+
+
+def test_rebuild_backfills_existing_receipts(client, mock_user):
+    for created_at, total in ((datetime(2025, 1, 5), 10.0), (datetime(2025, 1, 20), 5.5), (datetime(2025, 3, 1), 2.0)):
+        db.session.add(Receipt(user_id=mock_user.id, store_name="Deli", total_amount=total, created_at=created_at))
+    db.session.commit()
+    assert user_stats(mock_user.id)["totals"]["receipt_count"] == 0
+
+    rebuild_user(mock_user.id)
+    db.session.commit()
+    stats = user_stats(mock_user.id, months=1)
+    assert stats["totals"]["total_amount"] == 17.50
+    assert stats["monthly"] == [{"month": "2025-03", "receipt_count": 1, "total_amount": 2.00, "tax_amount": 0.0}]
+    assert [m["month"] for m in user_stats(mock_user.id)["monthly"]] == ["2025-01", "2025-03"]
+
+
+def test_existing_and_new_buckets_are_upserted_together(client, mock_user):
+    apply_deltas(mock_user.id, {("2025-01", "Deli"): [1, 1000, 80]})
+    db.session.commit()
+    apply_deltas(mock_user.id, {("2025-01", "Deli"): [2, 500, 40], ("2025-02", "Deli"): [1, 250, 0]})
+    db.session.commit()
+    rows = {(row.month, row.receipt_count, row.total_cents, row.tax_cents) for row in SpendingAggregate.query}
+    assert rows == {("2025-01", 3, 1500, 120), ("2025-02", 1, 250, 0)}
+
+
+def test_stats_validates_months(client, auth_headers):
+    assert client.get("/api/users/me/stats?months=0", headers=auth_headers).status_code == 400
@@ -0,0 +1,79 @@
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from extensions import db
+from models import BillSplit
+from split_batch import split_batch
+
+RECEIPT = {"items": [{"name": "Pizza", "price": "20.00"}, {"name": "Salad", "price": "10.00"}], "total": "30.00"}
+
+
+@pytest.fixture
+def client(client, app):
+    app.config['SPLIT_BATCH_EXECUTOR'] = 'thread'
+    yield client
+    split_batch.shutdown()
+
+
+def test_batch_inserts_every_split(client, auth_headers):
+    jobs = [
+        {"receipt_data": RECEIPT, "participants": ["Alice", "Bob"], "tax_rate": 10},
+        {"receipt_data": RECEIPT, "participants": ["Alice", "Bob", "Cara"], "split_method": "even"},
+    ]
+    res = client.post("/api/split-bill/batch", json={"jobs": jobs}, headers=auth_headers)
+    assert res.status_code == 200
+    assert res.json["processed"] == 2
+    assert set(res.json["timings"]) == {"compute_ms", "insert_ms", "total_ms"}
+
+    first, second = res.json["results"]
+    assert first["split_result"]["summary"]["grand_total"] == 33.00
+    assert second["split_result"]["per_person"] == 10.00
+    assert first["elapsed_ms"] >= 0
+
+    rows = [db.session.get(BillSplit, r["bill_split_id"]) for r in (first, second)]
+    assert [row.split_method for row in rows] == ["itemized", "even"]
+    assert rows[0].split_result == first["split_result"]
+
+
+def test_invalid_jobs_fail_alone(client, auth_headers):
+    jobs = [
+        {"receipt_data": RECEIPT},
+        {"receipt_data": RECEIPT, "participants": ["Alice"], "split_method": "by-weight"},
+        {"receipt_data": RECEIPT, "participants": ["Alice"]},
+    ]
+    res = client.post("/api/split-bill/batch", json={"jobs": jobs}, headers=auth_headers)
+    assert res.json["processed"] == 1
+    assert res.json["results"][0]["error"] == "Missing data"
+    assert not res.json["results"][1]["success"]
+    assert res.json["results"][2]["success"]
+    assert BillSplit.query.count() == 1
+
+
+def test_large_batch_uses_worker_pool_and_keeps_order(client, app, auth_headers):
+    app.config['SPLIT_BATCH_PARALLEL_THRESHOLD'] = 5
+    app.config['SPLIT_BATCH_WORKERS'] = 2
+    jobs = [{"receipt_data": {"items": [{"name": "Item", "price": f"{i}.00"}]}, "participants": ["Alice"]}
+            for i in range(1, 31)]
+    res = client.post("/api/split-bill/batch", json={"jobs": jobs}, headers=auth_headers)
+    assert res.json["processed"] == 30
+    totals = [r["split_result"]["summary"]["total_subtotal"] for r in res.json["results"]]
+    assert totals == [float(i) for i in range(1, 31)]
+    ids = [r["bill_split_id"] for r in res.json["results"]]
+    assert ids == sorted(ids)
+
+
+def test_batch_requires_jobs(client, auth_headers):
+    assert client.post("/api/split-bill/batch", json={}, headers=auth_headers).status_code == 400
+
+
+def test_broken_pool_fails_its_jobs_and_is_replaced(client, app, auth_headers, mocker):
+    app.config['SPLIT_BATCH_PARALLEL_THRESHOLD'] = 1
+    app.config['SPLIT_BATCH_WORKERS'] = 2
+    broken = split_batch._get_executor()
+    shutdown = mocker.spy(broken, "shutdown")
+    mocker.patch("split_batch._run_chunk", side_effect=BrokenProcessPool("worker died"))
+    jobs = [{"receipt_data": RECEIPT, "participants": ["Alice"]}] * 3
+    res = client.post("/api/split-bill/batch", json={"jobs": jobs}, headers=auth_headers)
+
+    assert res.json["processed"] == 0
+    shutdown.assert_any_call(wait=False, cancel_futures=True)
+    assert split_batch._get_executor() is not broken
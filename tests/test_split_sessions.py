@@ -0,0 +1,67 @@
+from extensions import db
+from models import BillSplit
+from split_sessions import SplitSessionStore, split_sessions
+
+RECEIPT = {"items": [{"name": "Pizza", "price": "20.00"}, {"name": "Salad", "price": "10.00"}]}
+
+
+def test_session_applies_deltas(client, auth_headers):
+    res = client.post("/api/split-sessions", json={
+        "receipt_data": RECEIPT, "participants": ["Alice", "Bob"], "tax_rate": 10
+    }, headers=auth_headers)
+    assert res.status_code == 201
+    session_id = res.json["session_id"]
+    alice, bob = res.json["split_result"]["participants"]
+    assert (alice["subtotal"], bob["subtotal"]) == (30.00, 0.00)
+
+    res = client.patch(f"/api/split-sessions/{session_id}", json={"ops": [
+        {"op": "unassign", "item_id": 2, "participant_id": 1},
+        {"op": "assign", "item_id": 2, "participant_id": 2},
+        {"op": "set_tax_tip", "tip_percentage": 20},
+    ]}, headers=auth_headers)
+    assert res.status_code == 200
+    alice, bob = res.json["split_result"]["participants"]
+    assert (alice["subtotal"], bob["subtotal"]) == (20.00, 10.00)
+    assert (alice["total"], bob["total"]) == (26.00, 13.00)
+
+    res = client.post(f"/api/split-sessions/{session_id}/save", headers=auth_headers)
+    assert res.status_code == 200
+    assert db.session.get(BillSplit, res.json["bill_split_id"]).tip_percentage == 20
+    assert client.get(f"/api/split-sessions/{session_id}", headers=auth_headers).status_code == 404
+
+
+def test_bad_op_is_rejected(client, auth_headers):
+    session_id = client.post("/api/split-sessions", json={
+        "receipt_data": RECEIPT, "participants": ["Alice"]
+    }, headers=auth_headers).json["session_id"]
+    res = client.patch(f"/api/split-sessions/{session_id}", json={"ops": [{"op": "explode"}]}, headers=auth_headers)
+    assert res.status_code == 400
+
+
+def test_sessions_are_private_to_their_owner(client, auth_headers):
+    session_id = client.post("/api/split-sessions", json={
+        "receipt_data": RECEIPT, "participants": ["Alice"]
+    }, headers=auth_headers).json["session_id"]
+    assert split_sessions.get(session_id, "someone-else") is None
+
+
+def test_store_expires_idle_sessions_and_caps_size(client, app):
+    app.config.update(SPLIT_SESSION_TTL=0, SPLIT_SESSION_MAX=2)
+    store = SplitSessionStore()
+    first = store.create("u", None, {}, [])
+    assert store.get(first.id, "u") is None
+
+    app.config['SPLIT_SESSION_TTL'] = 60
+    sessions = [store.create("u", None, {}, []) for _ in range(3)]
+    assert len(store) == 2
+    assert store.get(sessions[0].id, "u") is None
+
+
+def test_one_user_only_evicts_their_own_sessions(client, app):
+    app.config.update(SPLIT_SESSION_MAX=4, SPLIT_SESSION_MAX_PER_USER=2)
+    store = SplitSessionStore()
+    others = [store.create(user, None, {}, []) for user in ("a", "b")]
+    mine = [store.create("greedy", None, {}, []) for _ in range(5)]
+    assert all(store.get(s.id, s.user_id) for s in others)
+    assert [store.get(s.id, "greedy") is not None for s in mine] == [False, False, False, True, True]
+    assert len(store) == 4
@@ -0,0 +1,94 @@
+import io
+import pytest
+from PIL import Image
+from unittest.mock import patch
+from ocr_cache import ocr_cache
+from upload_archive import upload_archive
+from uploads import UploadError, decode_image, format_size, read_upload_stream, sniff_mime_type
+
+ALLOWED = ['image/jpeg', 'image/png', 'image/webp']
+
+
+def encoded(fmt, size=(32, 32)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("fmt,mime", [("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp")])
+def test_sniff_mime_type(fmt, mime):
+    assert sniff_mime_type(encoded(fmt)[:16]) == mime
+
+
+def test_sniff_rejects_non_images():
+    assert sniff_mime_type(b"%PDF-1.7\n") is None
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_mislabeled_file_rejected_after_first_chunk():
+    stream = CountingStream(b"GIF89a" + b"\0" * (1024 * 1024))
+    with pytest.raises(UploadError) as e:
+        read_upload_stream(stream, 10 * 1024 * 1024, ALLOWED, chunk_size=4096)
+    assert e.value.status == 415
+    assert stream.bytes_read == 4096
+
+
+def test_oversized_file_stops_reading_at_limit():
+    stream = CountingStream(encoded("PNG") + b"\0" * (1024 * 1024))
+    with pytest.raises(UploadError) as e:
+        read_upload_stream(stream, 64 * 1024, ALLOWED, chunk_size=4096)
+    assert e.value.status == 413
+    assert e.value.message == "Image exceeds the 64 KB limit"
+    assert stream.bytes_read <= 64 * 1024 + 4096
+
+
+def test_format_size():
+    assert format_size(512) == "512 bytes"
+    assert format_size(64 * 1024) == "64 KB"
+    assert format_size(1536 * 1024) == "1.5 MB"
+    assert format_size(15 * 1024 * 1024) == "15 MB"
+
+
+def test_decode_refuses_too_many_pixels():
+    with pytest.raises(UploadError) as e:
+        decode_image(encoded("PNG", (400, 400)), max_pixels=100_000)
+    assert e.value.status == 413
+
+
+def test_large_jpeg_decoded_at_reduced_scale():
+    image = decode_image(encoded("JPEG", (4000, 3000)), max_pixels=50_000_000, draft_long_side=1000)
+    assert image.size == (1000, 750)
+
+
+@pytest.fixture
+def client(client, app, tmp_path):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    ocr_cache.clear()
+    yield client
+    upload_archive.flush()
+
+
+def test_oversized_request_rejected_with_json(client, app, auth_headers):
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    res = client.post("/api/process-receipt", data={"image": (io.BytesIO(b"\0" * 4096), "r.png")},
+                           headers=auth_headers, content_type="multipart/form-data")
+    assert res.status_code == 413
+    assert res.json["error"] == "Request exceeds the 1 KB limit"
+
+
+@patch("blueprints.receipts.extract_receipt_data")
+def test_image_with_wrong_extension_is_accepted_by_content(mock_extract, client, auth_headers):
+    mock_extract.return_value = ({"store_name": "Sniff Mart", "items": []}, "SNIFF MART")
+    res = client.post("/api/process-receipt", data={"image": (io.BytesIO(encoded("PNG")), "receipt.bin")},
+                           headers=auth_headers, content_type="multipart/form-data")
+    assert res.status_code == 200
@@ -0,0 +1,71 @@
+import time
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from extensions import db
+from models import User, Role
+from audit_log import audit_log
+from auth.user_context import user_context, access_denylist
+
+
+@pytest.fixture
+def client(client, mock_user):
+    user_context.invalidate()
+    yield client
+    audit_log.flush()
+    user_context.invalidate()
+    access_denylist.clear()
+
+
+@pytest.fixture
+def admin_headers(client):
+    admin = User(username="ctxadmin", email="ctxadmin@example.com", roles=[Role(name="admin")])
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=admin.id)}"}
+
+
+def test_user_row_is_looked_up_once(client, auth_headers):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/receipts", headers=auth_headers).status_code == 200
+        assert client.get("/api/receipts", headers=auth_headers).status_code == 200
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert len([s for s in statements if "FROM user " in s]) == 1
+
+
+def test_admin_deactivation_applies_immediately(client, mock_user, auth_headers, admin_headers):
+    assert client.get("/api/receipts", headers=auth_headers).status_code == 200
+
+    res = client.patch(f"/api/admin/users/{mock_user.id}/status", json={"is_active": False}, headers=admin_headers)
+    assert res.status_code == 200
+    res = client.get("/api/receipts", headers=auth_headers)
+    assert res.status_code == 403
+    assert res.json["msg"] == "Account is disabled"
+    assert client.post("/api/auth/login", json={"username": "testuser", "password": "testpassword"}).status_code == 403
+
+
+def test_deactivation_elsewhere_applies_within_the_ttl(client, app, mock_user, auth_headers):
+    app.config['USER_CONTEXT_TTL'] = 0.2
+    assert client.get("/api/receipts", headers=auth_headers).status_code == 200
+
+    # A bulk UPDATE, like a change committed by another worker, fires no session events
+    db.session.execute(db.update(User).where(User.id == mock_user.id).values(is_active=False))
+    db.session.commit()
+    assert client.get("/api/receipts", headers=auth_headers).status_code == 200
+    time.sleep(0.25)
+    assert client.get("/api/receipts", headers=auth_headers).status_code == 403
+
+
+def test_logout_denylists_the_access_token(client, auth_headers):
+    tokens = client.post("/api/auth/login", json={"username": "testuser", "password": "testpassword"}).json
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    res = client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert res.status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
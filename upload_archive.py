@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+# PIL format name -> file extension for archived originals
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+class UploadArchive:
+    """
+    Writes original upload bytes to UPLOAD_FOLDER off the request thread
+
+    OCR works on the in-memory image, so archiving is optional
+    (RECEIPT_ARCHIVE_UPLOADS) and never re-encodes the upload.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.failures = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RECEIPT_ARCHIVE_UPLOADS', True)
+        app.extensions['upload_archive'] = self
+
+    @property
+    def enabled(self):
+        return bool(current_app.config['RECEIPT_ARCHIVE_UPLOADS'])
+
+    def path_for(self, name, image_format):
+        extension = EXTENSIONS.get((image_format or '').upper(), 'bin')
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], f"{name}.{extension}")
+
+    def archive(self, image_bytes, name, image_format):
+        """Schedule the write and return the path it will land at, or None when disabled"""
+        if not self.enabled:
+            return None
+        path = self.path_for(name, image_format)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-archive')
+            self._executor.submit(self._write, path, image_bytes)
+        return path
+
+    def _write(self, path, image_bytes):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(image_bytes)
+        except OSError:
+            self.failures += 1
+
+    def flush(self):
+        """Wait for queued writes (tests, shutdown)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# The current app's archive
+upload_archive = LocalProxy(lambda: current_app.extensions['upload_archive'])
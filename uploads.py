@@ -0,0 +1,92 @@
+import io
+import math
+from PIL import Image
+
+SNIFF_BYTES = 16
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """An upload that can't be processed; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def format_size(num_bytes):
+    """Human readable byte count for error messages: 512 bytes, 64 KB, 15 MB"""
+    for unit, scale in (('MB', 1024 * 1024), ('KB', 1024)):
+        if num_bytes >= scale:
+            return f"{num_bytes / scale:g} {unit}" if num_bytes % scale else f"{num_bytes // scale} {unit}"
+    return f"{num_bytes} bytes"
+
+
+def sniff_mime_type(head):
+    """Image MIME type from the first bytes of a file, or None"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def read_upload_stream(stream, max_bytes, allowed_types, chunk_size=CHUNK_SIZE):
+    """
+    Read an uploaded file chunk by chunk.
+
+    The type is sniffed from the first chunk and the read stops as soon as
+    max_bytes is exceeded, so a mislabeled or oversized file is rejected
+    without being buffered. Returns (bytes, mime_type).
+    """
+    head = stream.read(chunk_size)
+    mime_type = sniff_mime_type(head[:SNIFF_BYTES])
+    if mime_type not in allowed_types:
+        raise UploadError(f'Unsupported file type: {mime_type or "unknown"}', 415)
+
+    buffer = io.BytesIO()
+    buffer.write(head)
+    size = len(head)
+    while size <= max_bytes:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer.write(chunk)
+        size += len(chunk)
+    if size > max_bytes:
+        raise UploadError(f'Image exceeds the {format_size(max_bytes)} limit', 413)
+    return buffer.getvalue(), mime_type
+
+
+def decode_image(image_bytes, max_pixels, draft_long_side=None):
+    """
+    Decode an upload, refusing decompression bombs before any pixel data is read.
+    Large JPEGs are decoded at a reduced DCT scale (1/2, 1/4, 1/8) via draft()
+    when that still leaves at least draft_long_side pixels on the long side.
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+    except Exception:
+        raise UploadError('File is not a readable image', 400)
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise UploadError(f'Image is too large ({width}x{height})', 413)
+
+    if draft_long_side and image.format == 'JPEG' and max(width, height) > draft_long_side:
+        scale = draft_long_side / max(width, height)
+        image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+        dpi = image.info.get('dpi')
+        if dpi and image.width != width:
+            # Keep the DPI consistent with the reduced pixel size
+            ratio = image.width / width
+            image.info['dpi'] = (dpi[0] * ratio, dpi[1] * ratio)
+
+    try:
+        image.load()
+    except Exception:
+        raise UploadError('File is not a readable image', 400)
+    return image